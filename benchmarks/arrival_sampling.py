@@ -0,0 +1,63 @@
+"""
+Benchmark: sorteo de llegadas tick a tick vs. flujo presorteado con numpy.
+
+Mide solo TrafficModel._draw_arrivals() sobre varios días con perfil
+horario, y la memoria pico del flujo según el tamaño de bloque.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.arrival_sampling
+"""
+import time
+import tracemalloc
+
+from src.config import SimulationConfig
+from src.model import TrafficModel
+
+DAYS = 10
+SECONDS_PER_TICK = 10
+CHUNKS = [1_000, 8_640, 86_400]
+
+
+def draw_all(model: TrafficModel, ticks: int) -> int:
+    arrivals = 0
+    for tick in range(ticks):
+        model.time = tick
+        arrivals += len(model._draw_arrivals())
+    return arrivals
+
+
+def timed(config: SimulationConfig, ticks: int):
+    model = TrafficModel(config)
+    t0 = time.perf_counter()
+    arrivals = draw_all(model, ticks)
+    return time.perf_counter() - t0, arrivals
+
+
+def peak_kib(config: SimulationConfig, ticks: int) -> float:
+    # Solo lo que se reserva al sortear, no la creación del modelo
+    model = TrafficModel(config)
+    tracemalloc.start()
+    draw_all(model, ticks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    ticks = DAYS * 24 * 3600 // SECONDS_PER_TICK
+    base = dict(use_time_of_day=True, seconds_per_tick=SECONDS_PER_TICK)
+
+    elapsed, arrivals = timed(SimulationConfig(**base), ticks)
+    print(f"{ticks} ticks ({DAYS} días)")
+    print(f"{'sampler':>8} {'chunk':>8} {'tiempo(s)':>10} {'llegadas':>9} {'pico KiB':>9}")
+    print(f"{'python':>8} {'-':>8} {elapsed:10.3f} {arrivals:9d} {'-':>9}")
+
+    for chunk in CHUNKS:
+        config = SimulationConfig(**base, arrival_sampler="numpy", arrival_chunk_ticks=chunk)
+        elapsed, arrivals = timed(config, ticks)
+        peak = peak_kib(config, ticks)
+        print(f"{'numpy':>8} {chunk:8d} {elapsed:10.3f} {arrivals:9d} {peak:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
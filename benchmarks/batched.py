@@ -0,0 +1,65 @@
+"""
+Benchmark: K réplicas en un solo BatchedTrafficModel vs. K corridas del
+motor de objetos (una tras otra, en un núcleo).
+
+Verifica que el resumen de cada réplica coincida con get_summary() de la
+corrida independiente con la misma semilla y reporta tiempos.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.batched [réplicas]
+
+Termina con código 1 si alguna réplica no coincide.
+"""
+import sys
+import time
+from dataclasses import replace
+
+from benchmarks.engine_equivalence import same_summary
+from src.batched import BatchedTrafficModel
+from src.config import SimulationConfig
+from src.model import create_model
+
+SECONDS_PER_TICK = 10
+SCENARIOS = [
+    dict(control_mode="fixed"),
+    dict(control_mode="adaptive"),
+    dict(control_mode="adaptive", arrival_sampler="numpy"),
+]
+
+
+def main() -> int:
+    replications = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seeds = list(range(1, replications + 1))
+    ticks = int(24 * 3600 / SECONDS_PER_TICK)
+
+    failures = 0
+    print(f"{replications} réplicas de un día")
+    print(f"{'escenario':>9} {'object s':>9} {'batched s':>10} {'speedup':>8}  resultado")
+    for i, scenario in enumerate(SCENARIOS):
+        config = SimulationConfig(
+            ticks=ticks, seconds_per_tick=SECONDS_PER_TICK, use_time_of_day=True, **scenario
+        )
+
+        t0 = time.perf_counter()
+        batched = BatchedTrafficModel(config, seeds)
+        batched.run(ticks)
+        got = batched.get_summaries()
+        t_batched = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        ref = []
+        for seed in seeds:
+            model = create_model(replace(config, seed=seed))
+            model.run(ticks)
+            ref.append(model.get_summary())
+        t_obj = time.perf_counter() - t0
+
+        bad = [seed for seed, a, b in zip(seeds, ref, got) if not same_summary(a, b)]
+        failures += bool(bad)
+        print(f"{i:>9} {t_obj:>9.2f} {t_batched:>10.2f} {t_obj / t_batched:>7.2f}x  "
+              f"{'OK' if not bad else f'DISTINTO (semillas {bad})'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Comprueba que el motor vectorizado (engine="numpy") da los mismos
+resúmenes que el motor de objetos (referencia) y compara tiempos.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.engine_equivalence
+
+Termina con código 1 si algún escenario no coincide.
+
+Referencia (speedup = object / numpy, tick a tick):
+
+    escenario                          antes    con SMALL_LANE_MAX
+    0-1  3000 ticks, tasas fijas        ~1.2x    ~1.3-1.7x
+    2-3  saturados / geometría no ent.  ~2.5x    ~2.3-3.0x
+    4-5  día completo (perfil horario)  0.12x/0.18x   ~0.6x
+
+Con colas cortas (el caso realista) el motor de objetos sigue siendo el
+más rápido, por eso engine="numpy" no es el predeterminado.
+"""
+import math
+import sys
+import time
+
+from src.config import SimulationConfig
+from src.model import create_model
+
+SCENARIOS = [
+    dict(control_mode="fixed", ticks=3000, seed=1),
+    dict(control_mode="adaptive", ticks=3000, seed=2),
+    # Saturado: colas largas que se extienden más allá de max_distance
+    dict(control_mode="adaptive", ticks=3000, seed=3, arrival_rate_ns=0.6, arrival_rate_ew=0.5),
+    # Geometría no entera: fuerza redondeos en la recurrencia de seguimiento
+    dict(control_mode="fixed", ticks=3000, seed=4, arrival_rate_ns=0.5, arrival_rate_ew=0.4,
+         vehicle_speed=0.7, min_vehicle_gap=3.3, max_distance=29),
+    dict(control_mode="fixed", ticks=8640, seed=42, use_time_of_day=True, seconds_per_tick=10),
+    dict(control_mode="adaptive", ticks=8640, seed=42, use_time_of_day=True, seconds_per_tick=10),
+]
+
+
+def run(engine: str, scenario: dict):
+    config = SimulationConfig(engine=engine, **scenario)
+    model = create_model(config)
+    t0 = time.perf_counter()
+    for _ in range(config.ticks):
+        model.step()
+    return model.get_summary(), time.perf_counter() - t0
+
+
+def same_summary(a, b) -> bool:
+    for key in a:
+        x, y = a[key], b[key]
+        if isinstance(x, float) and math.isnan(x):
+            if not (isinstance(y, float) and math.isnan(y)):
+                return False
+        elif x != y:
+            return False
+    return True
+
+
+def main() -> int:
+    failures = 0
+    print(f"{'escenario':>9} {'object s':>9} {'numpy s':>9} {'speedup':>8}  resultado")
+    for i, scenario in enumerate(SCENARIOS):
+        ref, t_obj = run("object", scenario)
+        got, t_np = run("numpy", scenario)
+        ok = same_summary(ref, got)
+        failures += not ok
+        print(f"{i:>9} {t_obj:>9.2f} {t_np:>9.2f} {t_obj / t_np:>7.2f}x  {'OK' if ok else 'DISTINTO'}")
+        if not ok:
+            print(f"    object: {ref}\n    numpy:  {got}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
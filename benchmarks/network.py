@@ -0,0 +1,58 @@
+"""
+Benchmark: escalado de NetworkModel de 1 a 100 intersecciones.
+
+Corre un corredor de n intersecciones (1 x n) durante un día con 1
+proceso y con `workers` procesos, verifica que los resúmenes coincidan y
+reporta intersecciones-tick por segundo.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.network [workers] [link_ticks]
+
+Termina con código 1 si algún tamaño da distinto según los procesos.
+"""
+import os
+import sys
+import time
+
+from src.config import SimulationConfig
+from src.network import NetworkModel
+
+SIZES = [1, 2, 5, 10, 25, 50, 100]
+SECONDS_PER_TICK = 30
+
+
+def run(config: SimulationConfig, n: int, workers: int, link_ticks: int):
+    t0 = time.perf_counter()
+    with NetworkModel(config, rows=1, cols=n, link_ticks=link_ticks, workers=workers) as network:
+        network.run(config.ticks)
+        summary = network.get_summary()
+    return summary, time.perf_counter() - t0
+
+
+def main() -> int:
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    link_ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    config = SimulationConfig(
+        control_mode="adaptive",
+        ticks=int(24 * 3600 / SECONDS_PER_TICK),
+        seconds_per_tick=SECONDS_PER_TICK,
+        use_time_of_day=True,
+    )
+
+    failures = 0
+    print(f"Corredor de n intersecciones, un día, link_ticks={link_ticks}")
+    print(f"{'n':>4} {'1 proc s':>9} {f'{workers} proc s':>10} {'speedup':>8} "
+          f"{'int-tick/s':>11}  iguales")
+    for n in SIZES:
+        ref, t_one = run(config, n, 1, link_ticks)
+        got, t_par = run(config, n, workers, link_ticks)
+        ok = ref == got
+        failures += not ok
+        rate = n * config.ticks / min(t_one, t_par)
+        print(f"{n:>4} {t_one:>9.2f} {t_par:>10.2f} {t_one / t_par:>7.2f}x "
+              f"{rate:>11.0f}  {'OK' if ok else 'DIFF'}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
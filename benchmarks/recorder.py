@@ -0,0 +1,63 @@
+"""
+Benchmark: costo de TimeSeriesRecorder sobre el tiempo de paso.
+
+Corre los mismos días sin grabar y grabando (todo, diezmado y en buffer
+circular), tick a tick, y además sin grabar y diezmado con fast-forward;
+reporta el sobrecosto (contra "sin grabar" con el mismo fast-forward) y la
+memoria de las columnas. Cada modo se corre REPEATS veces, intercaladas,
+y se toma el mejor tiempo.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.recorder [días]
+"""
+import sys
+import time
+
+from src.config import SimulationConfig
+from src.model import create_model
+
+SECONDS_PER_TICK = 10
+REPEATS = 3
+MODES = [
+    ("sin grabar", dict(record_every=0)),
+    ("cada tick", dict(record_every=1)),
+    ("cada 10 ticks", dict(record_every=10)),
+    ("circular 10k", dict(record_every=1, record_capacity=10_000)),
+    ("ff sin grabar", dict(record_every=0, fast_forward=True)),
+    ("ff cada 10", dict(record_every=10, fast_forward=True)),
+]
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    ticks = days * int(24 * 3600 / SECONDS_PER_TICK)
+
+    best = {label: float("inf") for label, _ in MODES}
+    recorders = {}
+    for _ in range(REPEATS):
+        for label, overrides in MODES:
+            options = {"fast_forward": False, **overrides}
+            config = SimulationConfig(
+                control_mode="adaptive", ticks=ticks, seconds_per_tick=SECONDS_PER_TICK,
+                use_time_of_day=True, **options,
+            )
+            model = create_model(config)
+            t0 = time.perf_counter()
+            model.run(ticks)
+            best[label] = min(best[label], time.perf_counter() - t0)
+            recorders[label] = model.recorder
+
+    print(f"{days} días, {ticks} ticks, mejor de {REPEATS}")
+    print(f"{'modo':>14} {'µs/tick':>8} {'sobrecosto':>11} {'muestras':>9} {'KiB':>8}")
+    for label, overrides in MODES:
+        base = best["ff sin grabar" if overrides.get("fast_forward") else "sin grabar"]
+        recorder = recorders[label]
+        samples = kib = 0
+        if recorder is not None:
+            samples = len(recorder.columns()["tick"])
+            kib = sum(c.nbytes for c in recorder._columns.values()) / 1024
+        print(f"{label:>14} {best[label] / ticks * 1e6:8.2f} {best[label] / base - 1:10.1%} "
+              f"{samples:9d} {kib:8.0f}")
+
+if __name__ == "__main__":
+    main()
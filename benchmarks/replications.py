@@ -0,0 +1,40 @@
+"""
+Benchmark: speedup de run_replications() según la cantidad de procesos.
+
+Corre las mismas réplicas (mismas semillas) con 1, 2, 4, ... procesos
+hasta os.cpu_count(), verifica que los resúmenes coincidan y reporta el
+tiempo de reloj y el speedup respecto de 1 proceso.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.replications [réplicas]
+"""
+import os
+import sys
+
+from src.replications import run_replications
+
+SECONDS_PER_TICK = 10
+
+
+def main():
+    replications = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    cores = os.cpu_count() or 1
+    counts = sorted({1, cores} | {2 ** k for k in range(1, 8) if 2 ** k < cores})
+
+    print(f"{replications} réplicas de un día, {cores} núcleos")
+    print(f"{'procesos':>9} {'tiempo(s)':>10} {'speedup':>8}  iguales")
+    base = None
+    for workers in counts:
+        report = run_replications(
+            replications=replications, seconds_per_tick=SECONDS_PER_TICK,
+            workers=workers, verbose=False,
+        )
+        if base is None:
+            base = report
+        same = report.summaries == base.summaries
+        print(f"{workers:9d} {report.elapsed:10.2f} {base.elapsed / report.elapsed:7.2f}x  "
+              f"{'OK' if same else 'DIFF'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: ticks/s según la cantidad de vehículos en el sistema,
+con el orden global por distancia ("sorted", motor original) vs.
+el recorrido por carriles ("lanes").
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.step_order
+"""
+import time
+
+from src.config import SimulationConfig
+from src.model import TrafficModel
+
+VEHICLE_COUNTS = [50, 100, 200, 400, 800, 1600]
+MEASURE_TICKS = 200
+REPEATS = 3
+
+
+def build_loaded_model(n_vehicles: int, step_order: str, seed: int = 42) -> TrafficModel:
+    """Llena la intersección con demanda saturada hasta tener n_vehicles."""
+    config = SimulationConfig(
+        control_mode="fixed",
+        arrival_rate_ns=0.9,
+        arrival_rate_ew=0.9,
+        seed=seed,
+        step_order=step_order,
+    )
+    model = TrafficModel(config)
+    while len(model.vehicles) < n_vehicles:
+        model.step()
+    return model
+
+
+def ticks_per_second(model: TrafficModel, ticks: int) -> float:
+    # Mejor de REPEATS bloques consecutivos, para reducir ruido
+    best = 0.0
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        for _ in range(ticks):
+            model.step()
+        best = max(best, ticks / (time.perf_counter() - t0))
+    return best
+
+
+def main():
+    print(f"{'vehículos':>10} {'sorted t/s':>12} {'lanes t/s':>12} {'speedup':>8}")
+    for n in VEHICLE_COUNTS:
+        results = {}
+        for step_order in ("sorted", "lanes"):
+            # Misma semilla -> misma situación de partida en ambos modos
+            model = build_loaded_model(n, step_order)
+            results[step_order] = ticks_per_second(model, MEASURE_TICKS)
+        speedup = results["lanes"] / results["sorted"]
+        print(f"{n:>10} {results['sorted']:>12.1f} {results['lanes']:>12.1f} {speedup:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: memoria por vehículo y asignaciones de VehicleAgent.
+
+1. Bytes por instancia con __slots__ vs. una clase equivalente con __dict__
+   (como era VehicleAgent antes).
+2. Varios días simulados con y sin reciclaje (VehiclePool): instancias
+   creadas, reutilizadas y memoria pico medida con tracemalloc.
+
+Uso (desde la raíz del repo):
+    python -m benchmarks.vehicle_memory
+"""
+import gc
+import time
+import tracemalloc
+
+from src.agents import Direction, VehicleAgent
+from src.config import SimulationConfig
+from src.model import TrafficModel
+
+N_INSTANCES = 100_000
+DAYS = 3
+SECONDS_PER_TICK = 10
+
+
+class DictVehicle:
+    """Mismos atributos que VehicleAgent, pero con __dict__ por instancia."""
+
+    def __init__(self, vehicle_id, direction, start_time, start_distance):
+        self.id = vehicle_id
+        self.direction = direction
+        self.distance = start_distance
+        self.start_time = start_time
+        self.exit_time = None
+        self.ahead = None
+        self.behind = None
+        self.in_detection_zone = False
+
+
+def bytes_per_instance(cls) -> float:
+    # La lista se reserva antes de medir: solo cuentan los objetos
+    objs = [None] * N_INSTANCES
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for i in range(N_INSTANCES):
+        objs[i] = cls(i, Direction.NORTH_SOUTH, 0, 30.0)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objs
+    return (after - before) / N_INSTANCES
+
+
+def run_days(pool_size: int):
+    ticks = DAYS * int(24 * 3600 / SECONDS_PER_TICK)
+    config = SimulationConfig(
+        control_mode="adaptive",
+        ticks=ticks,
+        seconds_per_tick=SECONDS_PER_TICK,
+        use_time_of_day=True,
+        vehicle_pool_size=pool_size,
+    )
+    gc.collect()
+    tracemalloc.start()
+    model = TrafficModel(config)
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        model.step()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return model.vehicle_pool, peak, elapsed
+
+
+def main():
+    print("Memoria por instancia (incluye el objeto y, si tiene, su __dict__):")
+    for cls in (DictVehicle, VehicleAgent):
+        print(f"  {cls.__name__:<14} {bytes_per_instance(cls):7.1f} bytes")
+
+    print(f"\n{DAYS} días simulados ({SECONDS_PER_TICK} s/tick, adaptive):")
+    print(f"  {'pool':>6} {'creados':>9} {'reciclados':>11} {'pico KiB':>9} {'tiempo s':>9}")
+    for pool_size in (0, 256):
+        pool, peak, elapsed = run_days(pool_size)
+        print(
+            f"  {pool_size:>6} {pool.allocated:>9} {pool.reused:>11} "
+            f"{peak / 1024:>9.1f} {elapsed:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Exporta un día simulado a imágenes (y opcionalmente a video) sin pantalla.
+
+Uso:
+    python main_offline.py <carpeta> [stride] [workers] [video.mp4]
+
+stride: un frame cada cuántos ticks (por defecto 10).
+"""
+import sys
+
+from src.config import SimulationConfig
+from src.offline import encode_video, export_frames
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    out_dir = sys.argv[1]
+    stride = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    # Mismo escenario que main_visual (modo adaptive, 30 s/tick)
+    seconds_per_tick = 30
+    config = SimulationConfig(
+        control_mode="adaptive",
+        ticks=int(24 * 3600 / seconds_per_tick),
+        seconds_per_tick=seconds_per_tick,
+        use_time_of_day=True,
+        seed=42,
+    )
+    stats = export_frames(config, out_dir, stride=stride, workers=workers)
+    print(f"{stats.frames} frames en {out_dir} | simulación {stats.record_s:.1f} s, "
+          f"dibujo {stats.render_s:.1f} s con {stats.workers} procesos")
+
+    if len(sys.argv) > 4:
+        encode_video(out_dir, sys.argv[4])
+        print(f"Video: {sys.argv[4]}")
+
+
+if __name__ == "__main__":
+    main()
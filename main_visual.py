@@ -1,13 +1,30 @@
 import pygame
 from pygame.locals import K_ESCAPE, K_UP, K_DOWN, K_RIGHT
-import csv
 import os
+import sys
+from dataclasses import asdict
 
 from src.config import SimulationConfig
+from src.lockstep import LockstepComparison
+from src.agents import Direction
+from src.metrics import PERCENTILES, parse_windows, percentile_summary
+from src.metrics_store import MetricsStore
 from src.model import TrafficModel
+from src.runner import ModelSnapshot, SimulationRunner
 from src.visualization import TrafficVisualizer
 
-METRICS_FILE = "metrics_log.csv"
+# Métricas por día (SQLite, lo lee metrics_ui.py). Si todavía no hay
+# corridas y existe el CSV de versiones anteriores, se importa.
+METRICS_DB = "metrics.db"
+LEGACY_METRICS_FILE = "metrics_log.csv"
+
+# Estado de la comparación: se guarda al cerrar cada día y al salir;
+# `python main_visual.py --resume` continúa desde ahí
+CHECKPOINT_FILE = "checkpoint_visual.bin"
+
+FPS = 30
+# Tope de ticks por frame con las flechas (en --decoupled, más arriba = máx.)
+MAX_SIM_SPEED = 20
 
 
 def compute_day_summary(
@@ -21,119 +38,140 @@ def compute_day_summary(
     Calcula el resumen SOLO para los vehículos que terminaron su viaje
     entre day_start_tick (incluido) y day_end_tick (excluido).
 
-    Además calcula métricas de horas punta:
-    - Mañana: 07:00–09:00
-    - Tarde:  18:00–21:00
+    Además resume cada ventana horaria de config.summary_windows (por
+    defecto las horas punta 07:00–09:00 y 18:00–21:00), a partir de los
+    bins por minuto de ExitMetrics, y cada acceso. Los percentiles
+    (p50/p95/p99_travel_time, en ticks) salen de los sketches del día.
+    Después libera el detalle del día en ExitMetrics.
     """
-    # Vehículos que salieron en este día
-    vehicles_in_day = [
-        v for v in model.exited_vehicles
-        if v.exit_time is not None
-        and day_start_tick <= v.exit_time < day_end_tick
-    ]
-
-    # Duraciones globales (todo el día)
-    durations_all = []
-    for v in vehicles_in_day:
-        if v.start_time is None:
-            continue
-        durations_all.append(v.exit_time - v.start_time)
-
-    vehicles_exited = len(durations_all)
-    if vehicles_exited > 0:
-        total_travel = sum(durations_all)
-        avg_travel_time = total_travel / vehicles_exited
-    else:
-        avg_travel_time = 0.0
+    metrics = model.exit_metrics
+    day = day_start_tick // ticks_per_day
+
+    # Agregado de todo el día (se actualiza en streaming al salir cada auto)
+    day_stats = metrics.day(day)
+    vehicles_exited = day_stats.count
+    avg_travel_time = day_stats.mean(default=0.0)
 
     vehicles_remaining = len(model.vehicles)
 
-    # --- Horas punta ---
-    ticks_per_hour = ticks_per_day // 24
-
-    # 07:00–09:00
-    morning_start = day_start_tick + 7 * ticks_per_hour
-    morning_end   = day_start_tick + 9 * ticks_per_hour
-
-    # 18:00–21:00
-    evening_start = day_start_tick + 18 * ticks_per_hour
-    evening_end   = day_start_tick + 21 * ticks_per_hour
-
-    def summarize_window(start_tick, end_tick):
-        vs = [
-            v for v in vehicles_in_day
-            if start_tick <= v.exit_time < end_tick
-        ]
-        durs = []
-        for v in vs:
-            if v.start_time is None:
-                continue
-            durs.append(v.exit_time - v.start_time)
-
-        n = len(durs)
-        if n > 0:
-            avg_t = sum(durs) / n
-        else:
-            avg_t = 0.0
+    windows = {}
+    for window in parse_windows(model.config.summary_windows):
+        stats = metrics.window(day, window.start_minute, window.end_minute)
+        windows[window.name] = {
+            "label": window.describe(),
+            "vehicles_exited": stats.count,
+            "avg_travel_time": stats.mean(default=0.0),  # en ticks
+            **percentile_summary(stats.sketch, default=0.0),
+        }
 
-        return {
-            "vehicles_exited": n,
-            "avg_travel_time": avg_t,  # en ticks
+    directions = {}
+    for direction in Direction:
+        sketch = metrics.direction(direction, day)
+        directions[direction.name.lower()] = {
+            "vehicles_exited": sketch.count,
+            **percentile_summary(sketch, default=0.0),
         }
 
-    morning_peak = summarize_window(morning_start, morning_end)
-    evening_peak = summarize_window(evening_start, evening_end)
+    # Ya resumido: el detalle del día no hace falta más
+    metrics.release_day(day)
 
     return {
         "day": day_index,
         "ticks": day_end_tick - day_start_tick,
         "vehicles_exited": vehicles_exited,
         "avg_travel_time": avg_travel_time,
+        **percentile_summary(day_stats.sketch, default=0.0),
         "vehicles_remaining": vehicles_remaining,
-        "morning_peak": morning_peak,
-        "evening_peak": evening_peak,
+        "windows": windows,
+        "directions": directions,
     }
 
-def append_metrics_to_csv(day_index, summary_fixed, summary_adaptive, seconds_per_tick):
+def append_metrics(store: MetricsStore, run_id: int, day_index: int,
+                   summaries, seconds_per_tick: int):
     """
-    Guarda en metrics_log.csv un resumen de FIXED y ADAPTIVE por día.
-    Si el archivo no existe, escribe cabecera.
+    Guarda en el store el resumen del día de cada variante (fixed,
+    adaptive, ...): vehículos (veh), tiempo medio en ticks (avg_ticks) y
+    minutos (avg_min) y percentiles en minutos (p50_min, p95_min,
+    p99_min), para el día y cada ventana horaria.
     """
-    file_exists = os.path.isfile(METRICS_FILE)
-
     # Convertir tiempos de ticks a minutos
     def ticks_to_min(ticks):
         return (ticks * seconds_per_tick) / 60.0
 
-    row = {
-        "day": day_index,
-        "fixed_veh_day": summary_fixed["vehicles_exited"],
-        "fixed_avg_ticks_day": summary_fixed["avg_travel_time"],
-        "fixed_avg_min_day": ticks_to_min(summary_fixed["avg_travel_time"]),
-        "fixed_veh_morning": summary_fixed["morning_peak"]["vehicles_exited"],
-        "fixed_avg_ticks_morning": summary_fixed["morning_peak"]["avg_travel_time"],
-        "fixed_avg_min_morning": ticks_to_min(summary_fixed["morning_peak"]["avg_travel_time"]),
-        "fixed_veh_evening": summary_fixed["evening_peak"]["vehicles_exited"],
-        "fixed_avg_ticks_evening": summary_fixed["evening_peak"]["avg_travel_time"],
-        "fixed_avg_min_evening": ticks_to_min(summary_fixed["evening_peak"]["avg_travel_time"]),
-        "adaptive_veh_day": summary_adaptive["vehicles_exited"],
-        "adaptive_avg_ticks_day": summary_adaptive["avg_travel_time"],
-        "adaptive_avg_min_day": ticks_to_min(summary_adaptive["avg_travel_time"]),
-        "adaptive_veh_morning": summary_adaptive["morning_peak"]["vehicles_exited"],
-        "adaptive_avg_ticks_morning": summary_adaptive["morning_peak"]["avg_travel_time"],
-        "adaptive_avg_min_morning": ticks_to_min(summary_adaptive["morning_peak"]["avg_travel_time"]),
-        "adaptive_veh_evening": summary_adaptive["evening_peak"]["vehicles_exited"],
-        "adaptive_avg_ticks_evening": summary_adaptive["evening_peak"]["avg_travel_time"],
-        "adaptive_avg_min_evening": ticks_to_min(summary_adaptive["evening_peak"]["avg_travel_time"]),
+    values = {}
+    for mode, summary in summaries.items():
+        parts = {"day": summary, **summary["windows"]}
+        values[mode] = {
+            name: {
+                "veh": part["vehicles_exited"],
+                "avg_ticks": part["avg_travel_time"],
+                "avg_min": ticks_to_min(part["avg_travel_time"]),
+                **{
+                    f"p{p}_min": ticks_to_min(part[f"p{p}_travel_time"])
+                    for p in PERCENTILES
+                },
+            }
+            for name, part in parts.items()
+        }
+    store.add_day(run_id, day_index, values)
+
+
+def open_metrics_store(comparison: LockstepComparison, resume: bool):
+    """Abre METRICS_DB y devuelve (store, run_id): la última corrida si se reanuda, si no una nueva."""
+    store = MetricsStore(METRICS_DB)
+    if not store.runs() and os.path.isfile(LEGACY_METRICS_FILE):
+        store.import_csv(LEGACY_METRICS_FILE, name=LEGACY_METRICS_FILE)
+        print(f"Importado {LEGACY_METRICS_FILE} a {METRICS_DB}")
+
+    run_id = store.latest_run() if resume else None
+    if run_id is None:
+        base = comparison.models["fixed"].config
+        run_id = store.create_run(
+            "main_visual " + " vs ".join(comparison.models),
+            seconds_per_tick=base.seconds_per_tick,
+            config={name: asdict(model.config) for name, model in comparison.models.items()},
+        )
+    return store, run_id
+
+def finish_day(comparison: LockstepComparison, visualizer: TrafficVisualizer,
+               prev_day: int, ticks_per_day: int, seconds_per_tick: int,
+               metrics, log: bool):
+    """
+    Cierra el día prev_day (0-based): resumen en el HUD y, con log,
+    métricas (metrics = (store, run_id)) + checkpoint.
+    """
+    # Día completado: prev_day (0-based); para humanos, prev_day + 1
+    day_index = prev_day + 1
+    day_start = prev_day * ticks_per_day
+    day_end = day_start + ticks_per_day
+
+    summaries = {
+        name: compute_day_summary(model, day_start, day_end, day_index, ticks_per_day)
+        for name, model in comparison.models.items()
     }
 
-    fieldnames = list(row.keys())
+    visualizer.finished = True
+    visualizer.final_summary = {"day": day_index, **summaries}
+    if log:
+        store, run_id = metrics
+        append_metrics(store, run_id, day_index, summaries, seconds_per_tick)
+        comparison.save_checkpoint(CHECKPOINT_FILE)
+
+
+def step_comparison(comparison: LockstepComparison, visualizer: TrafficVisualizer,
+                    ticks_per_day: int, seconds_per_tick: int, metrics, log: bool = True):
+    """Avanza ambos modelos un tick (SIEMPRE en lockstep) y cierra el día si corresponde."""
+    prev_day = comparison.time // ticks_per_day
+    comparison.step()
+    new_day = comparison.time // ticks_per_day
+
+    # Actualizar día actual mostrado en HUD
+    visualizer.current_day = new_day + 1
+
+    # ¿Cruzamos el límite de un día en este paso?
+    if new_day > prev_day:
+        finish_day(comparison, visualizer, prev_day, ticks_per_day, seconds_per_tick, metrics, log)
 
-    with open(METRICS_FILE, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(row)
 
 def main():
     pygame.init()
@@ -143,30 +181,49 @@ def main():
     ticks_per_day = int(24 * 3600 / seconds_per_tick)
 
     # Config base (solo cambia el modo de control)
-    base_kwargs = dict(
+    base_config = SimulationConfig(
         ticks=ticks_per_day,          # lo usamos como "ticks por día"
         seconds_per_tick=seconds_per_tick,
         use_time_of_day=True,
-        seed=42,                      # misma semilla para que los dos vean patrones similares
+        seed=42,
     )
 
-    # Modelo FIXED
-    config_fixed = SimulationConfig(
-        control_mode="fixed",
-        **base_kwargs,
-    )
-    model_fixed = TrafficModel(config_fixed)
-
-    # Modelo ADAPTIVE
-    config_adaptive = SimulationConfig(
-        control_mode="adaptive",
-        **base_kwargs,
-    )
-    model_adaptive = TrafficModel(config_adaptive)
+    # FIXED y ADAPTIVE con un único flujo de llegadas: los dos ven
+    # exactamente los mismos autos
+    resume = "--resume" in sys.argv and os.path.isfile(CHECKPOINT_FILE)
+    if resume:
+        comparison = LockstepComparison.load_checkpoint(CHECKPOINT_FILE)
+        print(f"Reanudando desde el tick {comparison.time}")
+    else:
+        comparison = LockstepComparison(base_config, {
+            "fixed": {"control_mode": "fixed"},
+            "adaptive": {"control_mode": "adaptive"},
+        })
+    model_adaptive = comparison.models["adaptive"]
+    metrics = open_metrics_store(comparison, resume)
 
     # Visualizador: mostramos el modelo adaptive (el más interesante visualmente)
     visualizer = TrafficVisualizer(model_adaptive)
 
+    # Día simulado actual
+    current_day_index = comparison.time // ticks_per_day  # 0-based
+    visualizer.current_day = current_day_index + 1
+
+    try:
+        if "--decoupled" in sys.argv:
+            run_decoupled(comparison, visualizer, ticks_per_day, seconds_per_tick, metrics)
+        else:
+            run_in_frame_loop(comparison, visualizer, ticks_per_day, seconds_per_tick, metrics)
+    finally:
+        metrics[0].close()
+
+    comparison.save_checkpoint(CHECKPOINT_FILE)
+    pygame.quit()
+
+
+def run_in_frame_loop(comparison: LockstepComparison, visualizer: TrafficVisualizer,
+                      ticks_per_day: int, seconds_per_tick: int, metrics):
+    """Modo original: sim_speed ticks por frame dentro del bucle de pygame."""
     clock = pygame.time.Clock()
     running = True
 
@@ -176,10 +233,6 @@ def main():
 
     step_once = False
 
-    # Día simulado actual
-    current_day_index = 0  # 0-based
-    visualizer.current_day = 1
-
     while running:
         # 1. Eventos
         for event in pygame.event.get():
@@ -189,7 +242,7 @@ def main():
                 if event.key == K_ESCAPE:
                     running = False
                 elif event.key == K_UP:
-                    sim_speed = min(sim_speed + 1, 20)
+                    sim_speed = min(sim_speed + 1, MAX_SIM_SPEED)
                 elif event.key == K_DOWN:
                     sim_speed = max(sim_speed - 1, 0)
                 elif event.key == K_RIGHT:
@@ -197,83 +250,70 @@ def main():
 
         visualizer.sim_speed = sim_speed if sim_speed > 0 else 0
 
-        # 2. Avanzar ambos modelos (SIEMPRE en lockstep)
+        # 2. Avanzar ambos modelos
         if sim_speed > 0:
             for _ in range(sim_speed):
-                prev_time = model_adaptive.time  # mismo que fixed
-                prev_day = prev_time // ticks_per_day
-
-                # Avanzar los dos
-                model_fixed.step()
-                model_adaptive.step()
-
-                new_time = model_adaptive.time
-                new_day = new_time // ticks_per_day
-
-                # Actualizar día actual mostrado en HUD
-                visualizer.current_day = new_day + 1
-
-                # ¿Cruzamos el límite de un día en este paso?
-                if new_day > prev_day:
-                    # Día completado: prev_day (0-based); para humanos, prev_day + 1
-                    day_index = prev_day + 1
-                    day_start = prev_day * ticks_per_day
-                    day_end = day_start + ticks_per_day
-
-                    summary_fixed = compute_day_summary(
-                        model_fixed, day_start, day_end, day_index, ticks_per_day
-                    )
-                    summary_adaptive = compute_day_summary(
-                        model_adaptive, day_start, day_end, day_index, ticks_per_day
-                    )
-
-                    visualizer.finished = True
-                    visualizer.final_summary = {
-                        "day": day_index,
-                        "fixed": summary_fixed,
-                        "adaptive": summary_adaptive,
-                    }
-                    append_metrics_to_csv(day_index, summary_fixed, summary_adaptive, seconds_per_tick)
-
+                step_comparison(comparison, visualizer, ticks_per_day, seconds_per_tick, metrics)
         elif step_once:
-            prev_time = model_adaptive.time
-            prev_day = prev_time // ticks_per_day
-
-            model_fixed.step()
-            model_adaptive.step()
+            step_comparison(comparison, visualizer, ticks_per_day, seconds_per_tick, metrics,
+                            log=False)
             step_once = False
 
-            new_time = model_adaptive.time
-            new_day = new_time // ticks_per_day
-
-            visualizer.current_day = new_day + 1
-
-            if new_day > prev_day:
-                day_index = prev_day + 1
-                day_start = prev_day * ticks_per_day
-                day_end = day_start + ticks_per_day
-
-                summary_fixed = compute_day_summary(
-                    model_fixed, day_start, day_end, day_index
-                )
-                summary_adaptive = compute_day_summary(
-                    model_adaptive, day_start, day_end, day_index
-                )
-
-                visualizer.finished = True
-                visualizer.final_summary = {
-                    "day": day_index,
-                    "fixed": summary_fixed,
-                    "adaptive": summary_adaptive,
-                }
-
         # 3. Dibujar (muestra solo el modelo adaptive)
         visualizer.draw()
 
         # 4. FPS
-        clock.tick(30)
+        clock.tick(FPS)
 
-    pygame.quit()
+
+def run_decoupled(comparison: LockstepComparison, visualizer: TrafficVisualizer,
+                  ticks_per_day: int, seconds_per_tick: int, metrics):
+    """
+    La simulación corre en un hilo aparte (SimulationRunner) y cada frame
+    dibuja el último estado publicado: un frame lento no frena la
+    simulación. Por encima de MAX_SIM_SPEED la velocidad es "máx.": tantos
+    ticks como se pueda, mostrando los que entren en cada frame.
+    """
+    model_adaptive = comparison.models["adaptive"]
+    runner = SimulationRunner(
+        step=lambda log: step_comparison(comparison, visualizer, ticks_per_day,
+                                         seconds_per_tick, metrics, log=log),
+        snapshot=lambda: ModelSnapshot(model_adaptive),
+        fps=FPS,
+    )
+    runner.start()
+
+    clock = pygame.time.Clock()
+    running = True
+    sim_speed = 1  # ticks por frame; None = máxima
+
+    try:
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == K_ESCAPE:
+                        running = False
+                    elif event.key == K_UP:
+                        if sim_speed is not None:
+                            sim_speed = None if sim_speed >= MAX_SIM_SPEED else sim_speed + 1
+                    elif event.key == K_DOWN:
+                        sim_speed = MAX_SIM_SPEED if sim_speed is None else max(sim_speed - 1, 0)
+                    elif event.key == K_RIGHT:
+                        runner.request_step()
+                    runner.set_speed(sim_speed)
+
+            if sim_speed is None:
+                visualizer.sim_speed = f"máx. ({runner.ticks_per_second:.0f} ticks/s)"
+            else:
+                visualizer.sim_speed = sim_speed
+            visualizer.model = runner.latest()
+            visualizer.draw()
+            clock.tick(FPS)
+    finally:
+        runner.stop()
+        visualizer.model = model_adaptive
 
 
 if __name__ == "__main__":
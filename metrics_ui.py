@@ -1,16 +1,189 @@
 # metrics_ui.py
-import csv
-import os
+import bisect
+import math
 import tkinter as tk
 from tkinter import ttk
 
+import numpy as np
 from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-METRICS_FILE = "metrics_log.csv"
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+from src.config import SimulationConfig
+from src.metrics import parse_windows
+from src.metrics_store import MetricsStore
+
+# Lo escribe main_visual.py; se muestra su última corrida
+METRICS_DB = "metrics.db"
+
+# Variantes que se comparan (una tabla y un gráfico cada una)
+VARIANTS = ("fixed", "adaptive")
+
+# Ventana del día completo; las demás salen de las columnas de la corrida
+DAY_WINDOW = "day"
+
+# Estilos de las curvas, por ventana en orden (se repiten si hay más)
+LINESTYLES = ("-", "--", ":", "-.")
+
+# Con más puntos visibles que esto, las curvas se dibujan sin marcadores
+MARKER_MAX_POINTS = 200
+
+
+def row_windows(rows, variants=VARIANTS):
+    """Ventanas con tiempo medio (<variante>_avg_min_<ventana>) en las filas, sin repetir."""
+    prefixes = tuple(f"{variant}_avg_min_" for variant in variants)
+    names = {}
+    for row in rows:
+        for column in row:
+            for prefix in prefixes:
+                if column.startswith(prefix):
+                    names.setdefault(column[len(prefix):], None)
+    return list(names)
+
+
+def window_labels(config):
+    """
+    Etiqueta de cada ventana ("Punta mañana 07:00–09:00"), según las
+    summary_windows guardadas con la corrida y, si no están (CSV importado),
+    las de SimulationConfig por defecto.
+    """
+    labels = {DAY_WINDOW: "Día completo"}
+    sources = [c.get("summary_windows", ()) for c in (config or {}).values() if isinstance(c, dict)]
+    sources.append(SimulationConfig.summary_windows)
+    for windows in sources:
+        for window in parse_windows([tuple(w) for w in windows]):
+            labels.setdefault(window.name, window.describe())
+    return labels
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def nearest_index(values, x):
+    """Índice del valor más cercano a x en una lista ordenada (el menor si empatan)."""
+    i = bisect.bisect_left(values, x)
+    if i == len(values) or (i > 0 and x - values[i - 1] <= values[i] - x):
+        return i - 1
+    return i
+
+
+def minmax_downsample(x, y, lo, hi, buckets):
+    """
+    Puntos de (x, y) a dibujar entre lo y hi con `buckets` columnas de
+    píxeles: si son pocos, todos; si no, el mínimo y el máximo de cada
+    columna, así los picos no se pierden. x tiene que estar ordenado.
+    Incluye un punto a cada lado del rango para que la curva llegue al borde.
+    """
+    start = max(int(np.searchsorted(x, lo, "left")) - 1, 0)
+    end = min(int(np.searchsorted(x, hi, "right")) + 1, len(x))
+    x, y = x[start:end], y[start:end]
+    if len(x) <= 2 * buckets or hi <= lo:
+        return x, y
+
+    bucket = ((x - lo) * (buckets / (hi - lo))).astype(np.int64)
+    # Ordenados por columna y, dentro de cada una, por y
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+    ends = np.append(starts[1:], len(x)) - 1
+    keep = np.unique(np.concatenate((order[starts], order[ends], [0, len(x) - 1])))
+    return x[keep], y[keep]
+
+
+class VirtualTable:
+    """
+    Treeview con muchas filas que solo tiene como ítems las que entran en
+    pantalla: al desplazarse (barra o rueda) se cambian sus valores en vez
+    de insertar o borrar. Si se está viendo el final, sigue a las filas
+    nuevas.
+    """
+
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.rows = []
+        self.first = 0
+        self.visible = int(tree.cget("height"))
+
+        scrollbar.configure(command=self.yview)
+        tree.bind("<Configure>", self._on_configure)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            tree.bind(sequence, self._on_wheel)
+
+    def append(self, rows):
+        at_end = self.first + self.visible >= len(self.rows)
+        self.rows.extend(rows)
+        if at_end:
+            self.first = max(0, len(self.rows) - self.visible)
+        self._render()
+
+    def clear(self):
+        self.rows.clear()
+        self.first = 0
+        self._render()
+
+    def yview(self, *args):
+        """Comando de la barra: ("moveto", fracción) o ("scroll", n, "units"|"pages")."""
+        if args[0] == "moveto":
+            first = round(float(args[1]) * len(self.rows))
+        else:
+            step = self.visible if args[2] == "pages" else 1
+            first = self.first + int(args[1]) * step
+        self._scroll_to(first)
+
+    def _scroll_to(self, first):
+        first = max(0, min(first, len(self.rows) - self.visible))
+        if first != self.first:
+            self.first = first
+            self._render()
+
+    def _on_wheel(self, event):
+        up = event.num == 4 or event.delta > 0
+        self._scroll_to(self.first + (-3 if up else 3))
+        return "break"  # sin el desplazamiento propio del Treeview
+
+    def _on_configure(self, event):
+        # Filas que entran según la altura real de la primera
+        items = self.tree.get_children()
+        bbox = self.tree.bbox(items[0]) if items else ""
+        if not bbox:
+            return
+        _, top, _, row_height = bbox
+        visible = max(1, (event.height - top) // row_height)
+        if visible != self.visible:
+            at_end = self.first + self.visible >= len(self.rows)
+            self.visible = visible
+            self.first = max(0, min(self.first, len(self.rows) - visible))
+            if at_end:
+                self.first = max(0, len(self.rows) - visible)
+            self._render()
+
+    def _render(self):
+        window = self.rows[self.first:self.first + self.visible]
+        items = self.tree.get_children()
+        for item, values in zip(items, window):
+            self.tree.item(item, values=values)
+        for values in window[len(items):]:
+            self.tree.insert("", "end", values=values)
+        if len(items) > len(window):
+            self.tree.delete(*items[len(window):])
+
+        total = len(self.rows)
+        if total:
+            self.scrollbar.set(self.first / total, (self.first + len(window)) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
 
 
 class MetricsWindow:
+    """
+    Tablas y curvas de tiempos medios por día de cada variante. Las
+    columnas se arman con las ventanas que tiene la corrida (día completo
+    + config.summary_windows), así que sirve con ventanas personalizadas.
+    """
+
     def __init__(self, root):
         self.root = root
         self.root.title("Comparación de semáforo fijo vs adaptativo")
@@ -19,422 +192,286 @@ class MetricsWindow:
         frame_top = ttk.Frame(root)
         frame_top.pack(side="top", fill="x", expand=False)
 
-        frame_top_fixed = ttk.Frame(frame_top)
-        frame_top_fixed.pack(side="left", fill="both", expand=True, padx=5, pady=5)
-
-        frame_top_adaptive = ttk.Frame(frame_top)
-        frame_top_adaptive.pack(side="right", fill="both", expand=True, padx=5, pady=5)
-
         frame_bottom = ttk.Frame(root)
         frame_bottom.pack(side="bottom", fill="both", expand=True)
 
-        # ---------------- TABLA FIXED ----------------
-        ttk.Label(
-            frame_top_fixed,
-            text="FIXED - métricas por día",
-            font=("Arial", 11, "bold")
-        ).pack(side="top", anchor="w")
-
-        columns_fixed = [
-            "day",
-            "fixed_veh_day",
-            "fixed_avg_min_day",
-            "fixed_veh_morning",
-            "fixed_avg_min_morning",
-            "fixed_veh_evening",
-            "fixed_avg_min_evening",
-        ]
-
-        self.tree_fixed = ttk.Treeview(
-            frame_top_fixed, columns=columns_fixed, show="headings", height=4
-        )
-        self.tree_fixed.pack(side="left", fill="both", expand=True)
-
-        vsb_f = ttk.Scrollbar(
-            frame_top_fixed, orient="vertical", command=self.tree_fixed.yview
-        )
-        self.tree_fixed.configure(yscroll=vsb_f.set)
-        vsb_f.pack(side="right", fill="y")
-
-        headers_fixed = {
-            "day": "Día",
-            "fixed_veh_day": "Vehículos / día",
-            "fixed_avg_min_day": "Tiempo medio / día (min)",
-            "fixed_veh_morning": "Vehículos 7:00–9:00",
-            "fixed_avg_min_morning": "Tiempo medio 7:00–9:00 (min)",
-            "fixed_veh_evening": "Vehículos 18:00–21:00",
-            "fixed_avg_min_evening": "Tiempo medio 18:00–21:00 (min)",
-        }
-
-        for col in columns_fixed:
-            self.tree_fixed.heading(col, text=headers_fixed[col])
-            self.tree_fixed.column(col, width=130, anchor="center")
-
-        # ---------------- TABLA ADAPTIVE ----------------
-        ttk.Label(
-            frame_top_adaptive,
-            text="ADAPTIVE - métricas por día",
-            font=("Arial", 11, "bold")
-        ).pack(side="top", anchor="w")
-
-        columns_adaptive = [
-            "day",
-            "adaptive_veh_day",
-            "adaptive_avg_min_day",
-            "adaptive_veh_morning",
-            "adaptive_avg_min_morning",
-            "adaptive_veh_evening",
-            "adaptive_avg_min_evening",
-        ]
-
-        self.tree_adaptive = ttk.Treeview(
-            frame_top_adaptive, columns=columns_adaptive, show="headings", height=4
-        )
-        self.tree_adaptive.pack(side="left", fill="both", expand=True)
-
-        vsb_a = ttk.Scrollbar(
-            frame_top_adaptive, orient="vertical", command=self.tree_adaptive.yview
-        )
-        self.tree_adaptive.configure(yscroll=vsb_a.set)
-        vsb_a.pack(side="right", fill="y")
-
-        headers_adaptive = {
-            "day": "Día",
-            "adaptive_veh_day": "Vehículos / día",
-            "adaptive_avg_min_day": "Tiempo medio / día (min)",
-            "adaptive_veh_morning": "Vehículos 7:00–9:00",
-            "adaptive_avg_min_morning": "Tiempo medio 7:00–9:00 (min)",
-            "adaptive_veh_evening": "Vehículos 18:00–21:00",
-            "adaptive_avg_min_evening": "Tiempo medio 18:00–21:00 (min)",
-        }
-        for col in columns_adaptive:
-            self.tree_adaptive.heading(col, text=headers_adaptive[col])
-            self.tree_adaptive.column(col, width=130, anchor="center")
+        # ---------------- TABLAS ----------------
+        # Una por variante; las columnas se configuran en _set_windows
+        self.trees = {}
+        self.tables = {}
+        for variant, side in zip(VARIANTS, ("left", "right")):
+            frame = ttk.Frame(frame_top)
+            frame.pack(side=side, fill="both", expand=True, padx=5, pady=5)
+
+            ttk.Label(
+                frame,
+                text=f"{variant.upper()} - métricas por día",
+                font=("Arial", 11, "bold")
+            ).pack(side="top", anchor="w")
+
+            tree = ttk.Treeview(frame, columns=["day"], show="headings", height=4)
+            tree.pack(side="left", fill="both", expand=True)
+
+            vsb = ttk.Scrollbar(frame, orient="vertical")
+            vsb.pack(side="right", fill="y")
+            self.trees[variant] = tree
+            # Solo las filas visibles son ítems del Treeview
+            self.tables[variant] = VirtualTable(tree, vsb)
 
         # ---------------- GRÁFICOS ----------------
         self.fig = Figure(figsize=(8, 3.2), dpi=100)
-        self.ax_fixed = self.fig.add_subplot(1, 2, 1)
-        self.ax_adaptive = self.fig.add_subplot(1, 2, 2)
-
-        self.ax_fixed.set_title("FIXED - evolución tiempos medios")
-        self.ax_adaptive.set_title("ADAPTIVE - evolución tiempos medios")
-
-        for ax in (self.ax_fixed, self.ax_adaptive):
+        self.axes = {}
+        for i, variant in enumerate(VARIANTS, start=1):
+            ax = self.fig.add_subplot(1, len(VARIANTS), i)
+            ax.set_title(f"{variant.upper()} - evolución tiempos medios")
             ax.set_xlabel("Día")
             ax.set_ylabel("Tiempo medio (min)")
+            ax.grid(True, alpha=0.3)
+            # Al hacer zoom o desplazar, más detalle en el rango visible
+            ax.callbacks.connect("xlim_changed", self._draw_lines)
+            self.axes[variant] = ax
 
         self.canvas = FigureCanvasTkAgg(self.fig, master=frame_bottom)
+        # Zoom y desplazamiento; doble clic vuelve a la vista completa
+        self.toolbar = NavigationToolbar2Tk(self.canvas, frame_bottom)
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
 
-        # Datos de las curvas
+        # Ventanas de la corrida (en orden de columnas) y sus etiquetas
+        self.windows = []
+        self.labels = window_labels(None)
+
+        # Datos de las curvas: series[variante][i] = tiempos medios de la
+        # ventana windows[i], alineados con days (NaN si falta el valor)
         self.days = []
-        self.fixed_day = []
-        self.fixed_morning = []
-        self.fixed_evening = []
-        self.adaptive_day = []
-        self.adaptive_morning = []
-        self.adaptive_evening = []
+        self.series = {variant: [] for variant in VARIANTS}
+
+        # Lectura incremental: solo los días posteriores al último leído
+        self.store = MetricsStore(METRICS_DB)
+        self.run_id = None
+        self.last_day = 0
+
+        # Curvas: se crean en _set_windows y se actualizan con set_data. Se
+        # dibuja una versión reducida a la vista actual (ver _draw_lines);
+        # los datos completos quedan en self._x / self._y.
+        self.lines = []
+        self._x = np.empty(0)
+        self._y = {}
 
         # Elementos interactivos
-        self.annot_fixed = None
-        self.annot_adaptive = None
-        self.vline_fixed = None
-        self.vline_adaptive = None
+        self._create_interactive_elements()
 
-        # Evento de movimiento del mouse
+        # Eventos del mouse y de tamaño
         self.canvas.mpl_connect("motion_notify_event", self.on_mouse_move)
+        self.canvas.mpl_connect("button_press_event", self.on_click)
+        self.canvas.mpl_connect("resize_event", self.on_resize)
 
         # Arrancar
         self.refresh()
 
     def refresh(self):
-        # Limpiar tablas
-        for row in self.tree_fixed.get_children():
-            self.tree_fixed.delete(row)
-        for row in self.tree_adaptive.get_children():
-            self.tree_adaptive.delete(row)
-
-        days = []
-        fixed_day = []
-        fixed_morning = []
-        fixed_evening = []
-        adaptive_day = []
-        adaptive_morning = []
-        adaptive_evening = []
-
-        if os.path.isfile(METRICS_FILE):
-            with open(METRICS_FILE, newline="", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                for r in reader:
-                    try:
-                        day = r["day"]
-
-                        # Tabla FIXED
-                        self.tree_fixed.insert(
-                            "",
-                            "end",
-                            values=[
-                                day,
-                                r["fixed_veh_day"],
-                                f"{float(r['fixed_avg_min_day']):.1f}",
-                                r["fixed_veh_morning"],
-                                f"{float(r['fixed_avg_min_morning']):.1f}",
-                                r["fixed_veh_evening"],
-                                f"{float(r['fixed_avg_min_evening']):.1f}",
-                            ],
-                        )
-
-                        # Tabla ADAPTIVE
-                        self.tree_adaptive.insert(
-                            "",
-                            "end",
-                            values=[
-                                day,
-                                r["adaptive_veh_day"],
-                                f"{float(r['adaptive_avg_min_day']):.1f}",
-                                r["adaptive_veh_morning"],
-                                f"{float(r['adaptive_avg_min_morning']):.1f}",
-                                r["adaptive_veh_evening"],
-                                f"{float(r['adaptive_avg_min_evening']):.1f}",
-                            ],
-                        )
-
-                        # Datos para gráficos
-                        d = int(day)
-                        days.append(d)
-
-                        fixed_day.append(float(r["fixed_avg_min_day"]))
-                        fixed_morning.append(float(r["fixed_avg_min_morning"]))
-                        fixed_evening.append(float(r["fixed_avg_min_evening"]))
-
-                        adaptive_day.append(float(r["adaptive_avg_min_day"]))
-                        adaptive_morning.append(float(r["adaptive_avg_min_morning"]))
-                        adaptive_evening.append(float(r["adaptive_avg_min_evening"]))
-                    except (KeyError, ValueError):
-                        continue
-
-        # Guardar
-        self.days = days
-        self.fixed_day = fixed_day
-        self.fixed_morning = fixed_morning
-        self.fixed_evening = fixed_evening
-        self.adaptive_day = adaptive_day
-        self.adaptive_morning = adaptive_morning
-        self.adaptive_evening = adaptive_evening
-
-        # Redibujar
-        self.ax_fixed.clear()
-        self.ax_adaptive.clear()
-
-        self.ax_fixed.set_title("FIXED - evolución tiempos medios")
-        self.ax_adaptive.set_title("ADAPTIVE - evolución tiempos medios")
-        for ax in (self.ax_fixed, self.ax_adaptive):
-            ax.set_xlabel("Día")
-            ax.set_ylabel("Tiempo medio (min)")
-            ax.grid(True, alpha=0.3)
+        run_id = self.store.latest_run()
+        reset = run_id != self.run_id
+        if reset:
+            # Corrida nueva: se empieza de cero, con sus etiquetas de ventana
+            self.run_id = run_id
+            self.labels = window_labels(None if run_id is None else self.store.run_config(run_id))
+            self._set_windows([])
+        rows = [] if run_id is None else self.store.days_since(run_id, self.last_day)
+        new = [name for name in row_windows(rows) if name not in self.windows]
+        if new:
+            # Ventanas que no tienen columna: se rearman tablas y curvas y
+            # se relee la corrida desde el principio
+            self._set_windows(self.windows + new)
+            rows = self.store.days_since(run_id, 0)
+            reset = True
+        if rows:
+            self.last_day = rows[-1]["day"]
+            self._append_rows(rows)
+        if reset or rows:
+            self._update_lines()
+            self.canvas.draw_idle()
 
-        if days:
-            self.ax_fixed.plot(days, fixed_day, marker="o", label="Día completo")
-            self.ax_fixed.plot(days, fixed_morning, marker="o", linestyle="--",
-                               label="Punta 7–9")
-            self.ax_fixed.plot(days, fixed_evening, marker="o", linestyle=":",
-                               label="Punta 18–21")
-            self.ax_fixed.legend(loc="upper right")
-
-            self.ax_adaptive.plot(days, adaptive_day, marker="o", label="Día completo")
-            self.ax_adaptive.plot(days, adaptive_morning, marker="o", linestyle="--",
-                                  label="Punta 7–9")
-            self.ax_adaptive.plot(days, adaptive_evening, marker="o", linestyle=":",
-                                  label="Punta 18–21")
-            self.ax_adaptive.legend(loc="upper right")
+        self.root.after(1000, self.refresh)
 
-        self._create_interactive_elements()
-        self.canvas.draw_idle()
+    def _label(self, name):
+        return self.labels.get(name, name)
 
-        self.root.after(1000, self.refresh)
+    def _set_windows(self, windows):
+        """Columnas y curvas para estas ventanas (el día completo primero); vacía los datos."""
+        order = list(self.labels)
+        self.windows = sorted(
+            windows,
+            key=lambda name: (name != DAY_WINDOW,
+                              order.index(name) if name in order else len(order)),
+        )
+
+        for variant, tree in self.trees.items():
+            columns = ["day"] + [
+                f"{variant}_{metric}_{name}" for name in self.windows for metric in ("veh", "avg_min")
+            ]
+            tree.configure(columns=columns)
+            tree.heading("day", text="Día")
+            tree.column("day", width=60, anchor="center")
+            for name in self.windows:
+                label = "/ día" if name == DAY_WINDOW else self._label(name)
+                tree.heading(f"{variant}_veh_{name}", text=f"Vehículos {label}")
+                tree.heading(f"{variant}_avg_min_{name}", text=f"Tiempo medio {label} (min)")
+                for metric in ("veh", "avg_min"):
+                    tree.column(f"{variant}_{metric}_{name}", width=130, anchor="center")
+
+        for _, line, _ in self.lines:
+            line.remove()
+        self.lines = []
+        self.series = {variant: [[] for _ in self.windows] for variant in VARIANTS}
+        for variant, ax in self.axes.items():
+            for i, (name, values) in enumerate(zip(self.windows, self.series[variant])):
+                (line,) = ax.plot([], [], marker="o", linestyle=LINESTYLES[i % len(LINESTYLES)],
+                                  label=self._label(name))
+                self.lines.append((ax, line, values))
+            if self.windows:
+                ax.legend(loc="upper right")
+            elif ax.get_legend() is not None:
+                ax.get_legend().remove()
+
+        self.days.clear()
+        for table in self.tables.values():
+            table.clear()
+        self.last_day = 0
+
+    def _append_rows(self, rows):
+        table_rows = {variant: [] for variant in VARIANTS}
+        for r in rows:
+            try:
+                d = int(r["day"])
+            except (KeyError, TypeError, ValueError):
+                print(f"metrics_ui: fila sin día válido, se ignora: {r!r}")
+                continue
+
+            self.days.append(d)
+            for variant in VARIANTS:
+                table_row = [d]
+                for name, values in zip(self.windows, self.series[variant]):
+                    avg = _number(r.get(f"{variant}_avg_min_{name}"))
+                    values.append(avg)
+                    table_row += [r.get(f"{variant}_veh_{name}", ""),
+                                  "" if math.isnan(avg) else f"{avg:.1f}"]
+                table_rows[variant].append(table_row)
+
+        for variant, table in self.tables.items():
+            table.append(table_rows[variant])
+
+    def _update_lines(self):
+        self._x = np.asarray(self.days, dtype=float)
+        self._y = {line: np.asarray(values, dtype=float) for _, line, values in self.lines}
+        for ax in self.axes.values():
+            self._draw_lines(ax)
+            # Límites según los datos completos, no los dibujados (si el
+            # usuario hizo zoom, autoscale está apagado y la vista se mantiene)
+            ax.relim(visible_only=True)
+            ys = [self._y[line] for line_ax, line, _ in self.lines if line_ax is ax]
+            ys = [y[~np.isnan(y)] for y in ys]
+            ys = [y for y in ys if len(y)]
+            if len(self._x) and ys:
+                ax.update_datalim([
+                    (self._x[0], min(y.min() for y in ys)),
+                    (self._x[-1], max(y.max() for y in ys)),
+                ])
+            ax.autoscale_view()
+
+    def _draw_lines(self, ax):
+        """Curvas de ax reducidas a mín./máx. por columna de píxeles del rango visible."""
+        lo, hi = ax.get_xlim()
+        buckets = max(1, int(ax.bbox.width))
+        for line_ax, line, _ in self.lines:
+            if line_ax is not ax:
+                continue
+            x, y = minmax_downsample(self._x, self._y.get(line, self._x), lo, hi, buckets)
+            line.set_data(x, y)
+            line.set_marker("o" if len(x) <= MARKER_MAX_POINTS else "None")
+
+    def on_resize(self, event):
+        for ax in self.axes.values():
+            self._draw_lines(ax)
+
+    def on_click(self, event):
+        if event.dblclick and event.inaxes in self.axes.values():
+            for ax in self.axes.values():
+                ax.autoscale(True)
+            self._update_lines()
+            self.canvas.draw_idle()
 
     # ---------- ELEMENTOS INTERACTIVOS ----------
 
     def _create_interactive_elements(self):
-        # Limpiar anteriores si existen
-        if self.annot_fixed is not None:
-            try:
-                self.annot_fixed.remove()
-                self.annot_adaptive.remove()
-                self.vline_fixed.remove()
-                self.vline_adaptive.remove()
-            except Exception:
-                pass
-
-        self.annot_fixed = self.ax_fixed.annotate(
-            "",
-            xy=(0, 0),
-            xytext=(10, 10),
-            textcoords="offset points",
-            bbox=dict(boxstyle="round", fc="white", alpha=0.8),
-            arrowprops=dict(arrowstyle="->"),
-        )
-        self.annot_fixed.set_visible(False)
-
-        self.annot_adaptive = self.ax_adaptive.annotate(
-            "",
-            xy=(0, 0),
-            xytext=(10, 10),
-            textcoords="offset points",
-            bbox=dict(boxstyle="round", fc="white", alpha=0.8),
-            arrowprops=dict(arrowstyle="->"),
-        )
-        self.annot_adaptive.set_visible(False)
-
-        # Líneas verticales
-        self.vline_fixed = self.ax_fixed.axvline(
-            x=self.days[0] if self.days else 0,
-            color="gray",
-            linestyle="--",
-            alpha=0.5,
-        )
-        self.vline_fixed.set_visible(False)
-
-        self.vline_adaptive = self.ax_adaptive.axvline(
-            x=self.days[0] if self.days else 0,
-            color="gray",
-            linestyle="--",
-            alpha=0.5,
-        )
-        self.vline_adaptive.set_visible(False)
+        self.annots = {}
+        self.vlines = {}
+        for variant, ax in self.axes.items():
+            annot = ax.annotate(
+                "",
+                xy=(0, 0),
+                xytext=(10, 10),
+                textcoords="offset points",
+                bbox=dict(boxstyle="round", fc="white", alpha=0.8),
+                arrowprops=dict(arrowstyle="->"),
+            )
+            annot.set_visible(False)
+            self.annots[variant] = annot
+
+            # Línea vertical (invisible: no cuenta para los límites del eje)
+            vline = ax.axvline(
+                x=0,
+                color="gray",
+                linestyle="--",
+                alpha=0.5,
+            )
+            vline.set_visible(False)
+            self.vlines[variant] = vline
 
     def on_mouse_move(self, event):
-        """Muestra tooltip SOLO de la serie más cercana (día completo / 7–9 / 18–21),
-        y lo refleja también en el otro gráfico para el mismo día y misma serie.
+        """Muestra tooltip SOLO de la serie más cercana, y lo refleja también
+        en los otros gráficos para el mismo día y misma ventana.
         """
         if not self.days:
             return
 
-        if event.inaxes not in (self.ax_fixed, self.ax_adaptive):
+        source = next((v for v, ax in self.axes.items() if ax is event.inaxes), None)
+        if source is None:
             # Fuera de los ejes: ocultar todo
-            if self.annot_fixed is not None:
-                self.annot_fixed.set_visible(False)
-                self.annot_adaptive.set_visible(False)
-                if self.vline_fixed is not None:
-                    self.vline_fixed.set_visible(False)
-                if self.vline_adaptive is not None:
-                    self.vline_adaptive.set_visible(False)
-                self.canvas.draw_idle()
+            for artist in (*self.annots.values(), *self.vlines.values()):
+                artist.set_visible(False)
+            self.canvas.draw_idle()
             return
 
         if event.xdata is None or event.ydata is None:
             return
 
-        x = event.xdata
-        y = event.ydata
-
-        # Día más cercano al cursor
-        idx = min(range(len(self.days)), key=lambda i: abs(self.days[i] - x))
+        # Día más cercano al cursor (los días llegan en orden)
+        idx = nearest_index(self.days, event.xdata)
         day = self.days[idx]
 
-        # Decide en qué panel estás y qué serie está más cerca en Y
-        if event.inaxes == self.ax_fixed:
-            # --- Panel FIXED como origen del hover ---
-            candidates = []
-            if idx < len(self.fixed_day):
-                candidates.append(("day", "Día completo", self.fixed_day[idx]))
-            if idx < len(self.fixed_morning):
-                candidates.append(("morning", "Punta 7–9", self.fixed_morning[idx]))
-            if idx < len(self.fixed_evening):
-                candidates.append(("evening", "Punta 18–21", self.fixed_evening[idx]))
-
-            if not candidates:
-                return
-
-            # Serie más cercana en Y
-            series_key, series_label, series_y = min(
-                candidates, key=lambda t: abs(t[2] - y)
-            )
-
-            # Línea vertical
-            if self.vline_fixed is not None:
-                self.vline_fixed.set_xdata([day, day])
-                self.vline_fixed.set_visible(True)
-            if self.vline_adaptive is not None:
-                self.vline_adaptive.set_xdata([day, day])
-                self.vline_adaptive.set_visible(True)
-
-            # Tooltip FIXED (solo serie seleccionada)
-            self.annot_fixed.xy = (day, series_y)
-            self.annot_fixed.set_text(
-                f"Día {day}\n{series_label}: {series_y:.1f} min"
-            )
-            self.annot_fixed.set_visible(True)
-
-            # Tooltip ADAPTIVE para misma serie y día
-            if series_key == "day" and idx < len(self.adaptive_day):
-                y2 = self.adaptive_day[idx]
-            elif series_key == "morning" and idx < len(self.adaptive_morning):
-                y2 = self.adaptive_morning[idx]
-            elif series_key == "evening" and idx < len(self.adaptive_evening):
-                y2 = self.adaptive_evening[idx]
-            else:
-                y2 = None
-
-            if y2 is not None:
-                self.annot_adaptive.xy = (day, y2)
-                self.annot_adaptive.set_text(
-                    f"Día {day}\n{series_label}: {y2:.1f} min"
-                )
-                self.annot_adaptive.set_visible(True)
-            else:
-                self.annot_adaptive.set_visible(False)
-
-        else:
-            # --- Panel ADAPTIVE como origen del hover ---
-            candidates = []
-            if idx < len(self.adaptive_day):
-                candidates.append(("day", "Día completo", self.adaptive_day[idx]))
-            if idx < len(self.adaptive_morning):
-                candidates.append(("morning", "Punta 7–9", self.adaptive_morning[idx]))
-            if idx < len(self.adaptive_evening):
-                candidates.append(("evening", "Punta 18–21", self.adaptive_evening[idx]))
-
-            if not candidates:
-                return
-
-            series_key, series_label, series_y = min(
-                candidates, key=lambda t: abs(t[2] - y)
-            )
-
-            # Línea vertical
-            if self.vline_fixed is not None:
-                self.vline_fixed.set_xdata([day, day])
-                self.vline_fixed.set_visible(True)
-            if self.vline_adaptive is not None:
-                self.vline_adaptive.set_xdata([day, day])
-                self.vline_adaptive.set_visible(True)
-
-            # Tooltip ADAPTIVE
-            self.annot_adaptive.xy = (day, series_y)
-            self.annot_adaptive.set_text(
-                f"Día {day}\n{series_label}: {series_y:.1f} min"
-            )
-            self.annot_adaptive.set_visible(True)
-
-            # Tooltip FIXED misma serie
-            if series_key == "day" and idx < len(self.fixed_day):
-                y2 = self.fixed_day[idx]
-            elif series_key == "morning" and idx < len(self.fixed_morning):
-                y2 = self.fixed_morning[idx]
-            elif series_key == "evening" and idx < len(self.fixed_evening):
-                y2 = self.fixed_evening[idx]
-            else:
-                y2 = None
-
-            if y2 is not None:
-                self.annot_fixed.xy = (day, y2)
-                self.annot_fixed.set_text(
-                    f"Día {day}\n{series_label}: {y2:.1f} min"
-                )
-                self.annot_fixed.set_visible(True)
-            else:
-                self.annot_fixed.set_visible(False)
+        # Ventana cuya curva está más cerca en Y en el panel del cursor
+        candidates = [
+            (i, values[idx])
+            for i, values in enumerate(self.series[source])
+            if idx < len(values) and not math.isnan(values[idx])
+        ]
+        if not candidates:
+            return
+        window, _ = min(candidates, key=lambda t: abs(t[1] - event.ydata))
+        label = self._label(self.windows[window])
+
+        for variant, annot in self.annots.items():
+            self.vlines[variant].set_xdata([day, day])
+            self.vlines[variant].set_visible(True)
+
+            values = self.series[variant][window]
+            y = values[idx] if idx < len(values) else math.nan
+            if math.isnan(y):
+                annot.set_visible(False)
+                continue
+            annot.xy = (day, y)
+            annot.set_text(f"Día {day}\n{label}: {y:.1f} min")
+            annot.set_visible(True)
 
         self.canvas.draw_idle()
 
@@ -1,6 +1,7 @@
 import math
 import random
 from enum import Enum, auto
+from typing import NamedTuple, Optional
 
 
 class Direction(Enum):
@@ -11,17 +12,38 @@ class Direction(Enum):
 
 
 class VehicleAgent:
-    
-    _id_counter = 0
 
-    def __init__(self, direction: Direction, start_time: int, start_distance: float):
-        VehicleAgent._id_counter += 1
-        self.id = VehicleAgent._id_counter
+    # Sin __dict__ por instancia: menos memoria por auto
+    __slots__ = (
+        "id",
+        "direction",
+        "distance",
+        "start_time",
+        "exit_time",
+        "ahead",
+        "behind",
+        "in_detection_zone",
+    )
+
+    def __init__(self, vehicle_id: int, direction: Direction, start_time: int,
+                 start_distance: float):
+        self.reset(vehicle_id, direction, start_time, start_distance)
+
+    def reset(self, vehicle_id: int, direction: Direction, start_time: int,
+              start_distance: float):
+        """(Re)inicializa el vehículo; VehiclePool lo usa para reciclar instancias."""
+        self.id = vehicle_id
         self.direction = direction
         self.distance = start_distance 
         self.start_time = start_time
         self.exit_time = None
 
+        # Vecinos en la cola del carril (los mantiene LaneQueue)
+        self.ahead = None
+        self.behind = None
+        # ¿Está dentro de la zona de detección? (lo mantiene TrafficModel)
+        self.in_detection_zone = False
+
     def step(self, model: "TrafficModel"):
         
         if self.exit_time is not None:
@@ -42,6 +64,7 @@ class VehicleAgent:
             if model.traffic_light.can_cross(self.direction):
                 step_distance = min(cfg.vehicle_speed, cfg.post_cross_distance)
                 self.distance -= step_distance
+                model.mark_vehicle_crossed(self)
             else:
                 return
         else:
@@ -58,6 +81,51 @@ class VehicleAgent:
             new_distance = max(new_distance, 0.0)
 
             self.distance = new_distance
+            model.mark_vehicle_moved(self)
+
+
+class VehicleSnapshot(NamedTuple):
+    """
+    Vista de solo lectura de un vehículo: la usan el motor vectorizado
+    (que no tiene VehicleAgent) y las copias de estado para dibujar.
+    """
+    id: int
+    direction: Direction
+    distance: float
+    start_time: int
+    exit_time: Optional[int] = None
+
+
+class VehiclePool:
+    """
+    Free-list de vehículos que ya salieron, para reutilizarlos en nuevas
+    llegadas en lugar de crear (y que el GC recoja) un objeto por auto.
+    max_size = 0 desactiva el reciclaje.
+
+    También numera los vehículos: los ids son por modelo (empiezan en 1),
+    así que no dependen de otras simulaciones del mismo proceso.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.free = []
+        self.last_id = 0
+        self.allocated = 0  # instancias nuevas creadas
+        self.reused = 0     # llegadas servidas desde la free-list
+
+    def acquire(self, direction: Direction, start_time: int, start_distance: float) -> VehicleAgent:
+        self.last_id += 1
+        if self.free:
+            self.reused += 1
+            vehicle = self.free.pop()
+            vehicle.reset(self.last_id, direction, start_time, start_distance)
+            return vehicle
+        self.allocated += 1
+        return VehicleAgent(self.last_id, direction, start_time, start_distance)
+
+    def release(self, vehicle: VehicleAgent):
+        if len(self.free) < self.max_size:
+            self.free.append(vehicle)
 
 
 class TrafficLightPhase(Enum):
@@ -89,6 +157,62 @@ class TrafficLightAgent:
             else:
                 self._handle_adaptive_cycle(model)
 
+    # ---------- AVANCE POR EVENTOS ----------
+    # Mientras las colas detectadas no cambien, el ciclo es determinista
+    # (en fixed siempre lo es): se puede saber cuándo cambia cada fase.
+
+    def _phase_limit(self, phase: "TrafficLightPhase", green_direction: str,
+                     model: "TrafficModel") -> int:
+        # Valor de time_in_phase con el que step() termina la fase
+        if phase == TrafficLightPhase.YELLOW:
+            return self.config.yellow_time
+        if self.config.control_mode == "fixed":
+            return self.config.green_min
+
+        queue_ns = model.get_queue_size_ns()
+        queue_ew = model.get_queue_size_ew()
+        if green_direction == "NS":
+            my_queue, other_queue = queue_ns, queue_ew
+        else:
+            my_queue, other_queue = queue_ew, queue_ns
+        if other_queue > my_queue + 3:
+            return self.config.green_min
+        return max(self.config.green_min, self.config.green_max)
+
+    def first_green_tick(self, model: "TrafficModel", direction: Direction, after: int) -> int:
+        """Primer t >= after tal que tras t llamadas a step() `direction` puede cruzar."""
+        phase = self.phase
+        green_direction = self.current_green_direction
+        time_in_phase = self.time_in_phase
+        start = 0
+        while True:
+            # La fase actual se mantiene para t en [start, end)
+            limit = self._phase_limit(phase, green_direction, model)
+            end = start + max(limit - time_in_phase, 1)
+            if end > after and self._phase_allows(phase, direction):
+                return max(start, after)
+            if phase == TrafficLightPhase.YELLOW:
+                phase = TrafficLightPhase.NS_GREEN if green_direction == "EW" else TrafficLightPhase.EW_GREEN
+                green_direction = "NS" if green_direction == "EW" else "EW"
+            else:
+                phase = TrafficLightPhase.YELLOW
+            time_in_phase = 0
+            start = end
+
+    def skip(self, model: "TrafficModel", ticks: int):
+        """Equivale a `ticks` llamadas a step() mientras las colas no cambien."""
+        while ticks > 0:
+            limit = self._phase_limit(self.phase, self.current_green_direction, model)
+            until_change = max(limit - self.time_in_phase, 1)
+            if ticks < until_change:
+                self.time_in_phase += ticks
+                return
+            ticks -= until_change
+            if self.phase == TrafficLightPhase.YELLOW:
+                self._switch_to_opposite_green()
+            else:
+                self._switch_to_yellow()
+
     def _handle_fixed_cycle(self):
         # Ciclo muy simple: green_min = green_max = duración fija, por ejemplo
         if self.time_in_phase >= self.config.green_min:
@@ -127,11 +251,15 @@ class TrafficLightAgent:
         self.time_in_phase = 0
 
     def can_cross(self, direction: Direction) -> bool:
-        if self.phase == TrafficLightPhase.YELLOW:
+        return self._phase_allows(self.phase, direction)
+
+    @staticmethod
+    def _phase_allows(phase: "TrafficLightPhase", direction: Direction) -> bool:
+        if phase == TrafficLightPhase.YELLOW:
             return False
 
-        if self.phase == TrafficLightPhase.NS_GREEN:
+        if phase == TrafficLightPhase.NS_GREEN:
             return direction in (Direction.NORTH_SOUTH, Direction.SOUTH_NORTH)
-        elif self.phase == TrafficLightPhase.EW_GREEN:
+        elif phase == TrafficLightPhase.EW_GREEN:
             return direction in (Direction.EAST_WEST, Direction.WEST_EAST)
         return False
@@ -0,0 +1,65 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .agents import Direction
+from .demand import ArrivalSchedule
+
+NS_DIRECTIONS = (Direction.NORTH_SOUTH, Direction.SOUTH_NORTH)
+EW_DIRECTIONS = (Direction.EAST_WEST, Direction.WEST_EAST)
+
+
+class ArrivalStream:
+    """
+    Llegadas presorteadas por bloques de `chunk_ticks` ticks con un
+    numpy.random.Generator, en lugar de rng.random()/rng.choice() por tick.
+
+    Cada tick usa cuatro uniformes (Bernoulli NS, Bernoulli EW y el sentido
+    de cada eje), sorteadas en orden de tick: la secuencia no depende del
+    tamaño de bloque, que solo fija cuánta memoria se usa. Del bloque se
+    guardan solo los ticks con llegadas.
+    """
+
+    def __init__(self, schedule: ArrivalSchedule, seed: int, chunk_ticks: int = 8640):
+        self.generator = np.random.default_rng(seed)
+        self.chunk_ticks = max(1, chunk_ticks)
+        self._probabilities = np.array(schedule.table, dtype=np.float64).reshape(-1, 2)
+        self._period = schedule.period
+
+        self._start = 0
+        self._end = 0
+        self._arrivals: Dict[int, Tuple[Direction, ...]] = {}
+
+    def draw(self, tick: int) -> Tuple[Direction, ...]:
+        """Llegadas del tick (0, 1 o 2 direcciones); los ticks se piden en orden."""
+        if tick >= self._end:
+            self._fill(tick)
+        return self._arrivals.get(tick, ())
+
+    def _fill(self, tick: int):
+        # Los bloques se sortean en secuencia: uno que se saltea igual se consume
+        while self._end <= tick:
+            self._start = self._end
+            self._end = self._start + self.chunk_ticks
+            self._arrivals = self._sample(self._start, self.chunk_ticks)
+
+    def _sample(self, start: int, n: int) -> Dict[int, Tuple[Direction, ...]]:
+        u = self.generator.random((n, 4))
+        p = self._probabilities[np.arange(start, start + n) % self._period]
+        hit_ns = u[:, 0] < p[:, 0]
+        hit_ew = u[:, 1] < p[:, 1]
+
+        ticks = np.flatnonzero(hit_ns | hit_ew)
+        side = (u[ticks, 2:] >= 0.5).tolist()
+        arrivals = {}
+        for i, ns, ew, (side_ns, side_ew) in zip(
+            ticks.tolist(), hit_ns[ticks].tolist(), hit_ew[ticks].tolist(), side
+        ):
+            # Mismo orden que el sorteo tick a tick: primero NS, luego EW
+            row = ()
+            if ns:
+                row += (NS_DIRECTIONS[side_ns],)
+            if ew:
+                row += (EW_DIRECTIONS[side_ew],)
+            arrivals[start + i] = row
+        return arrivals
@@ -0,0 +1,318 @@
+import random
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .agents import Direction
+from .config import SimulationConfig
+from .demand import arrival_schedule_for
+from .metrics import QuantileSketch, percentile_summary
+from .vectorized import STOP_LINE_TOL, follow_exact
+
+# Carriles en el orden de Direction: 0, 1 = eje NS; 2, 3 = eje EW
+LANES = tuple(Direction)
+NS_LANES = (0, 1)
+EW_LANES = (2, 3)
+
+# Fases del semáforo como enteros (ver TrafficLightPhase)
+NS_GREEN, EW_GREEN, YELLOW = 0, 1, 2
+# Sentido con verde (current_green_direction): 0 = "NS", 1 = "EW"
+GREEN_NS, GREEN_EW = 0, 1
+
+NO_ARRIVAL = -1
+PAD_ID = np.iinfo(np.int64).max
+
+
+class BatchedLane:
+    """
+    Un carril de las K réplicas: arrays (K, slots) ordenados por fila con el
+    mismo orden (distance, id) que LaneArrays. Los slots libres quedan al
+    final con distance = inf.
+    """
+
+    def __init__(self, k: int, slots: int = 16):
+        self.distance = np.full((k, slots), np.inf)
+        self.start_time = np.zeros((k, slots), dtype=np.int64)
+        self.vid = np.full((k, slots), PAD_ID, dtype=np.int64)
+        self.count = np.zeros(k, dtype=np.int64)
+
+    @property
+    def slots(self) -> int:
+        return self.distance.shape[1]
+
+    def grow(self, needed: int):
+        slots = self.slots
+        while slots < needed:
+            slots *= 2
+        extra = slots - self.slots
+        if not extra:
+            return
+        k = self.distance.shape[0]
+        self.distance = np.hstack([self.distance, np.full((k, extra), np.inf)])
+        self.start_time = np.hstack([self.start_time, np.zeros((k, extra), dtype=np.int64)])
+        self.vid = np.hstack([self.vid, np.full((k, extra), PAD_ID, dtype=np.int64)])
+
+    def sort_rows(self, rows: np.ndarray):
+        for r in rows.tolist():
+            order = np.lexsort((self.vid[r], self.distance[r]))
+            for arr in (self.distance, self.start_time, self.vid):
+                arr[r] = arr[r][order]
+
+    def shift_rows(self, rows: np.ndarray, n: np.ndarray):
+        # Saca los primeros n[i] vehículos de cada fila rows[i]
+        cols = np.arange(self.slots)[None, :] + n[:, None]
+        valid = cols < self.slots
+        cols = np.minimum(cols, self.slots - 1)
+        for name, pad in (("distance", np.inf), ("start_time", 0), ("vid", PAD_ID)):
+            arr = getattr(self, name)
+            arr[rows] = np.where(valid, np.take_along_axis(arr[rows], cols, axis=1), pad)
+        self.count[rows] -= n
+
+
+class BatchedTrafficModel:
+    """
+    K réplicas independientes de la intersección (misma config, distinta
+    semilla) avanzadas juntas: el estado de vehículos y semáforos vive en
+    arrays (réplica x slot) y cada tick es un paso vectorizado sobre las K.
+
+    Cada réplica reproduce a TrafficModel con su semilla: get_summaries()[i]
+    coincide con get_summary() de create_model(replace(config, seed=seeds[i])).
+    Con arrival_sampler="python" las llegadas se sortean réplica por réplica
+    con random.Random (lo más caro del paso); con "numpy", por bloques.
+
+    Como el motor vectorizado, cuenta la zona de detección a partir de las
+    distancias actuales.
+    """
+
+    def __init__(self, config: SimulationConfig, seeds: Sequence[int], chunk_ticks: int = 1024):
+        self.config = config
+        self.seeds = list(seeds)
+        self.k = k = len(self.seeds)
+        self.time = 0
+
+        self.schedule = arrival_schedule_for(config)
+        self.chunk_ticks = chunk_ticks
+        if config.arrival_sampler == "numpy":
+            self.generators = [np.random.default_rng(seed) for seed in self.seeds]
+        else:
+            self.rngs = [random.Random(seed) for seed in self.seeds]
+        self._chunk_start = 0
+        self._chunk_end = 0
+
+        self.phase = np.full(k, NS_GREEN, dtype=np.int8)
+        self.time_in_phase = np.zeros(k, dtype=np.int64)
+        self.green_direction = np.full(k, GREEN_NS, dtype=np.int8)
+
+        # Los 4 carriles de las K réplicas en un solo bloque: fila = carril * K + réplica
+        self.lanes = BatchedLane(len(LANES) * k)
+        self.next_id = np.zeros(k, dtype=np.int64)
+        self._queue = np.zeros(len(LANES) * k, dtype=np.int64)
+
+        self.vehicles_exited = np.zeros(k, dtype=np.int64)
+        self.total_travel_time = np.zeros(k, dtype=np.int64)
+        # Percentiles de tiempo de viaje por réplica
+        self.sketches = [QuantileSketch(config.quantile_accuracy) for _ in range(k)]
+
+    # ---------- LLEGADAS ----------
+
+    def _fill_arrivals(self):
+        # Fila del carril de llegada por tick del bloque y réplica
+        # (NO_ARRIVAL = ninguna)
+        start = self._chunk_end
+        n = self.chunk_ticks
+        k = self.k
+        rates = [self.schedule.rates(t) for t in range(start, start + n)]
+        ns = np.full((n, k), NO_ARRIVAL, dtype=np.int64)
+        ew = np.full((n, k), NO_ARRIVAL, dtype=np.int64)
+
+        if self.config.arrival_sampler == "numpy":
+            # Mismas uniformes y en el mismo orden que ArrivalStream
+            p = np.array(rates, dtype=np.float64)
+            for r, gen in enumerate(self.generators):
+                u = gen.random((n, 4))
+                ns[:, r] = np.where(u[:, 0] < p[:, 0], NS_LANES[0] + (u[:, 2] >= 0.5), NO_ARRIVAL)
+                ew[:, r] = np.where(u[:, 1] < p[:, 1], EW_LANES[0] + (u[:, 3] >= 0.5), NO_ARRIVAL)
+        else:
+            # Mismas llamadas al RNG que draw_arrivals()
+            for r, rng in enumerate(self.rngs):
+                rand, choice = rng.random, rng.choice
+                col_ns, col_ew = [NO_ARRIVAL] * n, [NO_ARRIVAL] * n
+                for c, (p_ns, p_ew) in enumerate(rates):
+                    if rand() < p_ns:
+                        col_ns[c] = choice(NS_LANES)
+                    if rand() < p_ew:
+                        col_ew[c] = choice(EW_LANES)
+                ns[:, r] = col_ns
+                ew[:, r] = col_ew
+
+        replica = np.arange(k)
+        for arr in (ns, ew):
+            arr[:] = np.where(arr == NO_ARRIVAL, NO_ARRIVAL, arr * k + replica)
+        self._arrivals_ns, self._arrivals_ew = ns, ew
+        self._chunk_start, self._chunk_end = start, start + n
+
+    def _add_arrivals(self):
+        if self.time >= self._chunk_end:
+            self._fill_arrivals()
+        c = self.time - self._chunk_start
+        # Primero la llegada NS y luego la EW, como en draw_arrivals()
+        for arrivals in (self._arrivals_ns[c], self._arrivals_ew[c]):
+            replicas = np.flatnonzero(arrivals != NO_ARRIVAL)
+            if len(replicas):
+                self.next_id[replicas] += 1
+                self._insert(arrivals[replicas], self.next_id[replicas])
+
+    def _insert(self, rows: np.ndarray, ids: np.ndarray):
+        cfg = self.config
+        lane = self.lanes
+        lane.grow(int(lane.count[rows].max()) + 1)
+        slot = lane.count[rows]
+        max_distance = float(cfg.max_distance)
+        lane.distance[rows, slot] = max_distance
+        lane.start_time[rows, slot] = self.time
+        lane.vid[rows, slot] = ids
+        lane.count[rows] += 1
+        if cfg.detection_zone_min < max_distance <= cfg.detection_zone_max:
+            self._queue[rows] += 1
+        # Si la cola ya pasa de max_distance, el nuevo no va último
+        behind = slot > 0
+        prev = lane.distance[rows[behind], slot[behind] - 1]
+        if np.any(prev > max_distance):
+            lane.sort_rows(rows[behind][prev > max_distance])
+
+    # ---------- SEMÁFORO ----------
+
+    def _step_lights(self):
+        cfg = self.config
+        self.time_in_phase += 1
+        tip = self.time_in_phase
+        yellow = self.phase == YELLOW
+
+        # Amarillo -> verde del sentido opuesto
+        to_green = yellow & (tip >= cfg.yellow_time)
+
+        # Verde -> amarillo
+        if cfg.control_mode == "fixed":
+            to_yellow = ~yellow & (tip >= cfg.green_min)
+        else:
+            queue = self._queue.reshape(len(LANES), self.k)
+            queue_ns = queue[0] + queue[1]
+            queue_ew = queue[2] + queue[3]
+            mine = np.where(self.green_direction == GREEN_NS, queue_ns, queue_ew)
+            other = np.where(self.green_direction == GREEN_NS, queue_ew, queue_ns)
+            to_yellow = ~yellow & (tip >= cfg.green_min) & (
+                (other > mine + 3) | (tip >= cfg.green_max)
+            )
+
+        self.phase[to_yellow] = YELLOW
+        self.phase[to_green] = np.where(self.green_direction[to_green] == GREEN_EW, NS_GREEN, EW_GREEN)
+        self.green_direction[to_green] = 1 - self.green_direction[to_green]
+        tip[to_yellow | to_green] = 0
+
+    # ---------- VEHÍCULOS ----------
+
+    def _step_lane(self, lane: BatchedLane, green: np.ndarray) -> np.ndarray:
+        cfg = self.config
+        speed = cfg.vehicle_speed
+        gap = cfg.min_vehicle_gap
+        d = lane.distance
+
+        # 1. Los que ya cruzaron avanzan y, si llegan al final, salen
+        departing = d < 0.0
+        if departing.any():
+            d[departing] -= speed
+            out = d <= -cfg.post_cross_distance
+            n_out = out.sum(axis=1)
+            rows = np.flatnonzero(n_out)
+            if len(rows):
+                travel = np.zeros(len(n_out), dtype=np.int64)
+                travel[rows] = self.time * n_out[rows] - (lane.start_time[rows] * out[rows]).sum(axis=1)
+                self.vehicles_exited += n_out.reshape(len(LANES), self.k).sum(axis=0)
+                self.total_travel_time += travel.reshape(len(LANES), self.k).sum(axis=0)
+                exit_rows, exit_cols = np.nonzero(out)
+                travel_times = self.time - lane.start_time[exit_rows, exit_cols]
+                for r, value in zip((exit_rows % self.k).tolist(), travel_times.tolist()):
+                    self.sketches[r].add(value)
+                lane.shift_rows(rows, n_out[rows])
+                d = lane.distance
+
+        # 2. Los detenidos en la línea de stop cruzan si el semáforo lo permite
+        stopped = (d >= 0.0) & (d <= STOP_LINE_TOL)
+        moving = (d > STOP_LINE_TOL) & (d < np.inf)
+        crossing = stopped & green[:, None]
+        held = stopped & ~green[:, None]
+        # Con rojo, el líder del primero que avanza es el último detenido
+        leader = held.copy()
+        leader[:, :-1] &= ~held[:, 1:]
+        if crossing.any():
+            d[crossing] -= min(speed, cfg.post_cross_distance)
+
+        # 3. El resto avanza en flujo libre, respetando min_vehicle_gap.
+        # Como en VectorizedTrafficModel._follow: máximo acumulado por fila,
+        # verificado contra la recurrencia exacta.
+        if moving.any():
+            j = np.arange(lane.slots) * gap
+            desired = d - np.minimum(speed, d)
+            c = np.full(d.shape, -np.inf)
+            c[moving] = (desired - j)[moving]
+            c[leader] = (d - j)[leader]
+            guess = np.maximum.accumulate(c, axis=1) + j
+
+            prev = np.full(d.shape, -np.inf)
+            prev[:, 1:] = np.where(moving | leader, guess, -np.inf)[:, :-1]
+            expected = np.maximum(np.maximum(desired, prev + gap), 0.0)
+            bad = ((guess != expected) | (prev >= d)) & moving
+            new = np.where(moving, guess, d)
+            for r in np.flatnonzero(bad.any(axis=1)).tolist():
+                self._follow_row_exact(new[r], d[r], moving[r], held[r], desired[r])
+            lane.distance = d = new
+
+        # Empates de distancia tienen que quedar ordenados por id
+        same = d[:, 1:] == d[:, :-1]
+        misordered = (d[:, 1:] < d[:, :-1]) | (same & (lane.vid[:, 1:] < lane.vid[:, :-1]))
+        rows = np.flatnonzero(misordered.any(axis=1))
+        if len(rows):
+            lane.sort_rows(rows)
+            d = lane.distance
+
+        zone = (d > cfg.detection_zone_min) & (d <= cfg.detection_zone_max)
+        return zone.sum(axis=1)
+
+    def _follow_row_exact(self, new: np.ndarray, d: np.ndarray, moving: np.ndarray,
+                          held: np.ndarray, desired: np.ndarray):
+        idx = np.flatnonzero(moving)
+        first = idx[0]
+        leader = float(d[first - 1]) if first > 0 and held[first - 1] else None
+        new[idx] = follow_exact(d[idx], desired[idx], leader, self.config.min_vehicle_gap)
+
+    # ---------- PASO ----------
+
+    def step(self):
+        self._add_arrivals()
+        self._step_lights()
+        if self.lanes.count.any():
+            green_ns = self.phase == NS_GREEN
+            green_ew = self.phase == EW_GREEN
+            green = np.concatenate((green_ns, green_ns, green_ew, green_ew))
+            self._queue = self._step_lane(self.lanes, green)
+        self.time += 1
+
+    def run(self, ticks: int):
+        for _ in range(ticks):
+            self.step()
+
+    def get_summaries(self) -> List[Dict[str, float]]:
+        remaining = self.lanes.count.reshape(len(LANES), self.k).sum(axis=0)
+        summaries = []
+        for r in range(self.k):
+            exited = int(self.vehicles_exited[r])
+            summaries.append({
+                "ticks": self.time,
+                "vehicles_exited": exited,
+                "avg_travel_time": (
+                    int(self.total_travel_time[r]) / exited if exited else float("nan")
+                ),
+                **percentile_summary(self.sketches[r]),
+                "vehicles_remaining": int(remaining[r]),
+            })
+        return summaries
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict
+from typing import Dict, Optional
+
+from .config import SimulationConfig
+
+# Subir cuando cambie el resultado de una simulación para una misma config
+# (lógica de vehículos, semáforo, llegadas...) o lo que trae el resumen:
+# invalida todo lo cacheado
+ENGINE_VERSION = "2"
+
+# Campos que no cambian el resultado (están verificados como equivalentes)
+# y por lo tanto no forman parte de la clave
+NON_RESULT_FIELDS = (
+    "fast_forward",
+    "step_order",
+    "vehicle_pool_size",
+    "exited_vehicles_retention",
+    "arrival_chunk_ticks",
+    "checkpoint_every",
+    "checkpoint_path",
+    "exit_bin_minutes",
+    "summary_windows",
+    "exit_metrics_retain_days",
+    "record_every",
+    "record_capacity",
+)
+
+
+def config_key(config: SimulationConfig) -> str:
+    """Hash estable de la config completa + ENGINE_VERSION (+ contenido del perfil)."""
+    fields = asdict(config)
+    for name in NON_RESULT_FIELDS:
+        fields.pop(name, None)
+    if config.use_time_of_day and config.demand_profile is not None:
+        # Importa el contenido del perfil, no su ruta
+        with open(config.demand_profile, "rb") as f:
+            fields["demand_profile"] = hashlib.sha256(f.read()).hexdigest()
+    payload = json.dumps({"engine_version": ENGINE_VERSION, "config": fields},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Caché en disco de resultados de simulación, direccionada por contenido:
+    <directory>/<clave>.json guarda el resumen y, opcionalmente,
+    <clave>.npz las series por tick. Cuando el total supera max_bytes se
+    borran las entradas usadas hace más tiempo (LRU por mtime, que se
+    actualiza en cada acierto).
+    """
+
+    def __init__(self, directory: str = ".sim_cache", max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, config: SimulationConfig) -> str:
+        return config_key(config)
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, key + ext)
+
+    # ---------- LECTURA ----------
+
+    def get(self, key: str) -> Optional[Dict[str, float]]:
+        path = self._path(key, ".json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                summary = json.load(f)["summary"]
+        except (OSError, ValueError, KeyError, TypeError):
+            # Ilegible o con otro formato (p. ej. de otra versión): es un fallo
+            return None
+        self._touch(key)
+        return summary
+
+    def get_trace(self, key: str) -> Optional[Dict]:
+        """Series por tick guardadas con put(..., trace=...), como arrays NumPy."""
+        path = self._path(key, ".npz")
+        import numpy as np
+        try:
+            with np.load(path) as data:
+                trace = {name: data[name] for name in data.files}
+        except (OSError, ValueError):
+            # Sin traza, o la borró otro proceso (evict) mientras tanto
+            return None
+        self._touch(key)
+        return trace
+
+    def _touch(self, key: str):
+        for ext in (".json", ".npz"):
+            try:
+                os.utime(self._path(key, ext))
+            except FileNotFoundError:
+                pass
+
+    # ---------- ESCRITURA ----------
+
+    def put(self, key: str, summary: Dict[str, float], trace: Optional[Dict] = None):
+        if trace is not None:
+            import numpy as np
+            self._write_atomic(key, ".npz", lambda f: np.savez_compressed(f, **trace))
+        # El .json va último: su presencia marca la entrada como completa
+        data = json.dumps({"summary": summary}).encode("utf-8")
+        self._write_atomic(key, ".json", lambda f: f.write(data))
+        self.evict()
+
+    def _write_atomic(self, key: str, ext: str, write):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, self._path(key, ext))
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def evict(self):
+        """
+        Borra las entradas menos usadas hasta quedar dentro de max_bytes.
+        Con varios procesos a la vez, un archivo puede desaparecer entre
+        listarlo y usarlo: ya lo borró otro, se sigue.
+        """
+        entries: Dict[str, list] = {}
+        for name in os.listdir(self.directory):
+            key, ext = os.path.splitext(name)
+            if ext not in (".json", ".npz"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            info = entries.setdefault(key, [0.0, 0])
+            info[0] = max(info[0], st.st_mtime)
+            info[1] += st.st_size
+
+        total = sum(size for _, size in entries.values())
+        for key, (_, size) in sorted(entries.items(), key=lambda e: e[1][0]):
+            if total <= self.max_bytes:
+                break
+            for ext in (".json", ".npz"):
+                try:
+                    os.remove(self._path(key, ext))
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith((".json", ".npz", ".tmp")):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
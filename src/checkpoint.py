@@ -0,0 +1,40 @@
+import os
+import pickle
+import tempfile
+import zlib
+from typing import Dict
+
+# Cabecera de los archivos de checkpoint: magic + versión del formato
+MAGIC = b"TSIMCKPT"
+FORMAT_VERSION = 3
+
+
+def write_checkpoint(path: str, state: Dict):
+    """
+    Guarda el estado de un modelo (ver TrafficModel.get_state) comprimido.
+    La escritura es atómica: un corte a mitad de camino deja el checkpoint
+    anterior intacto.
+    """
+    payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 6)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(bytes([FORMAT_VERSION]))
+            f.write(payload)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def read_checkpoint(path: str) -> Dict:
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path}: no es un checkpoint de simulación")
+    version = data[len(MAGIC)]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path}: versión de checkpoint {version} no soportada")
+    return pickle.loads(zlib.decompress(data[len(MAGIC) + 1:]))
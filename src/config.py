@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional, Tuple
 
 @dataclass
 class SimulationConfig:
@@ -19,7 +20,73 @@ class SimulationConfig:
     
     post_cross_distance: float = 25.0
 
+    # Zona de detección del controlador adaptativo, antes de la línea de
+    # stop: cuenta los autos con detection_zone_min < distance <= detection_zone_max
+    detection_zone_min: float = 0.0
+    detection_zone_max: float = 5.0
+
     seed: int = 42
 
     seconds_per_tick: int = 10
     use_time_of_day: bool = False
+    # Perfil de demanda por hora del día (CSV o JSON, ver src/demand.py).
+    # None = perfil por defecto. Solo se usa con use_time_of_day.
+    demand_profile: Optional[str] = None
+
+    # Sorteo de llegadas:
+    # "python" -> rng.random()/rng.choice() tick a tick (referencia)
+    # "numpy"  -> flujo presorteado por bloques con numpy.random.Generator
+    #             (requiere numpy; es otra secuencia, no reproduce a "python")
+    arrival_sampler: str = "python"
+    # Ticks sorteados por bloque con arrival_sampler="numpy"
+    arrival_chunk_ticks: int = 8640
+
+    # Métricas: ancho de los bins del histograma de tiempos de viaje (ticks)
+    histogram_bin_ticks: int = 10
+    # Error relativo de los percentiles de tiempo de viaje (P50/P95/P99)
+    quantile_accuracy: float = 0.01
+    # Ancho (minutos simulados) de los bins por hora de salida, con los que
+    # se resumen las ventanas horarias
+    exit_bin_minutes: int = 1
+    # Días con detalle (bins por minuto) que se guardan en memoria; los
+    # anteriores se descartan. None = todos
+    exit_metrics_retain_days: Optional[int] = 7
+    # Ventanas del resumen diario: (nombre, etiqueta, "HH:MM", "HH:MM"), el
+    # fin excluido. El nombre identifica la ventana en metrics.db.
+    summary_windows: Tuple[Tuple[str, str, str, str], ...] = (
+        ("morning", "Punta mañana", "07:00", "09:00"),
+        ("evening", "Punta tarde", "18:00", "21:00"),
+    )
+    # Cuántos vehículos que ya salieron se guardan en exited_vehicles
+    # (buffer circular). 0 = ninguno; None = todos, sin límite de memoria.
+    exited_vehicles_retention: Optional[int] = 0
+    # Máximo de vehículos libres para reciclar (0 = sin reciclaje). Solo se
+    # usa si exited_vehicles_retention es 0.
+    vehicle_pool_size: int = 256
+
+    # Orden de actualización de los vehículos en cada tick:
+    # "lanes"  -> carril por carril, de la línea de stop hacia atrás
+    # "sorted" -> orden global por distancia (motor original, referencia)
+    step_order: str = "lanes"
+
+    # TrafficModel.run(): aplicar de una vez los tramos en los que no cruza
+    # ni sale nadie, en lugar de simular tick a tick (mismo resultado)
+    fast_forward: bool = True
+
+    # Checkpoints automáticos en TrafficModel.run(): cada checkpoint_every
+    # ticks (0 = nunca) se guarda el estado completo en checkpoint_path
+    checkpoint_every: int = 0
+    checkpoint_path: Optional[str] = None
+
+    # Serie de tiempo por tick (src/recorder.py, requiere numpy): una
+    # muestra cada record_every ticks (0 = no grabar). record_capacity =
+    # últimas N muestras en un buffer circular (None = todas).
+    record_every: int = 0
+    record_capacity: Optional[int] = None
+
+    # Motor de vehículos:
+    # "object" -> un VehicleAgent por auto (referencia)
+    # "numpy"  -> arrays por carril, actualizados por lotes (requiere numpy).
+    #             Solo conviene con colas largas (saturación); con tráfico
+    #             normal es más lento (ver benchmarks/engine_equivalence.py)
+    engine: str = "object"
@@ -0,0 +1,145 @@
+import csv
+import json
+import math
+import os
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+class DemandInterval(NamedTuple):
+    """Demanda constante desde start_second (segundo del día) hasta el próximo intervalo."""
+    start_second: int
+    rate_ns: float  # veh/h, eje Norte-Sur
+    rate_ew: float  # veh/h, eje Este-Oeste
+
+
+# Perfil de un día típico (veh/h por eje)
+DEFAULT_PROFILE: Tuple[DemandInterval, ...] = (
+    DemandInterval(0 * 3600, 5.0, 5.0),     # madrugada
+    DemandInterval(5 * 3600, 15.0, 15.0),
+    DemandInterval(7 * 3600, 40.0, 40.0),   # punta de la mañana
+    DemandInterval(9 * 3600, 25.0, 25.0),
+    DemandInterval(13 * 3600, 35.0, 15.0),  # mediodía, NS > EW
+    DemandInterval(16 * 3600, 30.0, 30.0),  # punta de la tarde
+    DemandInterval(19 * 3600, 20.0, 20.0),
+    DemandInterval(21 * 3600, 8.0, 8.0),
+    DemandInterval(23 * 3600, 4.0, 4.0),
+)
+
+
+# ---------- CARGA DE PERFILES ----------
+
+def _parse_start(value) -> int:
+    # "HH:MM", "HH:MM:SS" o un número de horas (puede ser decimal)
+    if isinstance(value, str) and ":" in value:
+        parts = [int(p) for p in value.split(":")]
+        hours, minutes, seconds = (parts + [0, 0])[:3]
+        return hours * 3600 + minutes * 60 + seconds
+    return int(round(float(value) * 3600))
+
+
+def _intervals_from_rows(rows: Sequence[dict], source: str) -> Tuple[DemandInterval, ...]:
+    intervals = []
+    for row in rows:
+        try:
+            interval = DemandInterval(
+                _parse_start(row["start"]), float(row["rate_ns"]), float(row["rate_ew"])
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"{source}: fila inválida {row!r} ({exc})") from None
+        intervals.append(interval)
+
+    if not intervals:
+        raise ValueError(f"{source}: el perfil no tiene intervalos")
+    starts = [i.start_second for i in intervals]
+    if starts[0] != 0:
+        raise ValueError(f"{source}: el primer intervalo tiene que empezar a las 00:00")
+    if any(b <= a for a, b in zip(starts, starts[1:])) or starts[-1] >= SECONDS_PER_DAY:
+        raise ValueError(f"{source}: los inicios tienen que ser crecientes y menores a 24:00")
+    if any(i.rate_ns < 0 or i.rate_ew < 0 for i in intervals):
+        raise ValueError(f"{source}: las tasas no pueden ser negativas")
+    return tuple(intervals)
+
+
+def load_demand_profile(path: str) -> Tuple[DemandInterval, ...]:
+    """
+    Lee un perfil de demanda de un CSV o JSON con campos start, rate_ns y
+    rate_ew (veh/h). start es "HH:MM[:SS]" o un número de horas; cada
+    intervalo dura hasta el siguiente y el último hasta las 24:00.
+
+    CSV: una fila por intervalo con encabezado start,rate_ns,rate_ew.
+    JSON: una lista de objetos, o {"intervals": [...]}.
+    """
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        rows = data["intervals"] if isinstance(data, dict) else data
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    return _intervals_from_rows(rows, path)
+
+
+# ---------- TABLA PRECALCULADA ----------
+
+class ArrivalSchedule:
+    """
+    Probabilidades de llegada (ns, ew) por tick, calculadas una sola vez.
+    El patrón se repite cada `period` ticks, así que rates() es un acceso a
+    una tupla. Los ticks de un mismo intervalo comparten la misma entrada.
+    """
+
+    def __init__(self, table: Sequence[Tuple[float, float]]):
+        self.table = tuple(table)
+        self.period = len(self.table)
+
+    def rates(self, tick: int) -> Tuple[float, float]:
+        return self.table[tick % self.period]
+
+    @classmethod
+    def constant(cls, p_ns: float, p_ew: float) -> "ArrivalSchedule":
+        return cls([(p_ns, p_ew)])
+
+    @classmethod
+    def from_profile(cls, profile: Sequence[DemandInterval],
+                     seconds_per_tick: int) -> "ArrivalSchedule":
+        # Probabilidad por tick de cada intervalo: veh/h repartidos en los
+        # ticks de una hora, como máximo una llegada por tick y eje
+        ticks_per_hour = max(1, int(3600 / seconds_per_tick))
+        probabilities = [
+            (min(i.rate_ns / ticks_per_hour, 1.0), min(i.rate_ew / ticks_per_hour, 1.0))
+            for i in profile
+        ]
+        starts = [i.start_second for i in profile]
+
+        # Si seconds_per_tick no divide al día, el patrón se repite recién
+        # tras mcm(día, seconds_per_tick) segundos
+        period = SECONDS_PER_DAY // math.gcd(SECONDS_PER_DAY, seconds_per_tick)
+        table: List[Tuple[float, float]] = []
+        for tick in range(period):
+            second = (tick * seconds_per_tick) % SECONDS_PER_DAY
+            table.append(probabilities[bisect_right(starts, second) - 1])
+        return cls(table)
+
+
+@lru_cache(maxsize=32)
+def _cached_schedule(use_time_of_day: bool, arrival_rate_ns: float, arrival_rate_ew: float,
+                     seconds_per_tick: int, profile_path: Optional[str],
+                     profile_mtime: Optional[float]) -> ArrivalSchedule:
+    if not use_time_of_day:
+        return ArrivalSchedule.constant(arrival_rate_ns, arrival_rate_ew)
+    profile = DEFAULT_PROFILE if profile_path is None else load_demand_profile(profile_path)
+    return ArrivalSchedule.from_profile(profile, seconds_per_tick)
+
+
+def arrival_schedule_for(config) -> ArrivalSchedule:
+    """Tabla de llegadas de un SimulationConfig (compartida entre modelos iguales)."""
+    path = config.demand_profile if config.use_time_of_day else None
+    mtime = os.path.getmtime(path) if path is not None else None
+    return _cached_schedule(
+        config.use_time_of_day, config.arrival_rate_ns, config.arrival_rate_ew,
+        config.seconds_per_tick, path, mtime,
+    )
@@ -0,0 +1,240 @@
+import math
+from typing import Iterator, Optional
+
+from .agents import VehicleAgent
+
+
+class LaneQueue:
+    """
+    Cola ordenada de un carril (una Direction), de adelante hacia atrás.
+
+    Es una lista doblemente enlazada: cada vehículo guarda punteros
+    `ahead` / `behind`, así el líder de un auto y las altas/bajas cuestan O(1).
+
+    - Adelante van los que ya cruzaron (distance < 0), en orden de cruce:
+      todos avanzan a la misma velocidad, el primero en cruzar sale primero.
+    - Desde `stop_line` hacia atrás van los que aún no cruzaron
+      (distance >= 0), ordenados por (distance, id).
+
+    Recorrer la cola de adelante hacia atrás da el mismo orden de
+    actualización que el ordenamiento global por distancia del motor original.
+    """
+
+    def __init__(self):
+        self.front: Optional[VehicleAgent] = None
+        self.back: Optional[VehicleAgent] = None
+        # Primer vehículo que todavía no cruzó la línea de stop
+        self.stop_line: Optional[VehicleAgent] = None
+        self.n_approaching = 0
+        self.n_departing = 0
+
+    def __len__(self) -> int:
+        return self.n_approaching + self.n_departing
+
+    def __iter__(self) -> Iterator[VehicleAgent]:
+        v = self.front
+        while v is not None:
+            nxt = v.behind
+            yield v
+            v = nxt
+
+    # ---------- ALTAS / BAJAS ----------
+
+    def insert(self, vehicle: VehicleAgent):
+        """
+        Inserta un vehículo que acaba de llegar. Normalmente queda al final,
+        pero si la cola ya se extiende más allá de max_distance se ubica
+        delante de los autos más lejanos para respetar el orden (distance, id).
+        """
+        after = self.back
+        while after is not None and after.distance > vehicle.distance:
+            after = after.ahead
+        self._link_after(vehicle, after)
+        if after is None or after.distance < 0.0:
+            self.stop_line = vehicle
+        self.n_approaching += 1
+
+    def append(self, vehicle: VehicleAgent):
+        """Agrega al final sin reordenar (para reconstruir una cola ya ordenada)."""
+        self._link_after(vehicle, self.back)
+        if vehicle.distance < 0.0:
+            self.n_departing += 1
+        else:
+            if self.stop_line is None:
+                self.stop_line = vehicle
+            self.n_approaching += 1
+
+    def mark_crossed(self, vehicle: VehicleAgent):
+        """El vehículo pasó la línea de stop: queda como último de los que cruzaron."""
+        if vehicle is self.stop_line:
+            self.stop_line = vehicle.behind
+        else:
+            self._unlink(vehicle)
+            after = self.back if self.stop_line is None else self.stop_line.ahead
+            self._link_after(vehicle, after)
+        self.n_approaching -= 1
+        self.n_departing += 1
+
+    def remove(self, vehicle: VehicleAgent):
+        if vehicle is self.stop_line:
+            self.stop_line = vehicle.behind
+        if vehicle.distance < 0.0:
+            self.n_departing -= 1
+        else:
+            self.n_approaching -= 1
+        self._unlink(vehicle)
+
+    # ---------- CONSULTAS ----------
+
+    def leader_distance(self, vehicle: VehicleAgent) -> Optional[float]:
+        """
+        Distancia del vehículo más cercano por delante que aún no cruzó
+        (el de mayor distance estrictamente menor que la del vehículo),
+        o None si no hay.
+
+        Los de adelante ya fueron actualizados en este tick y sus distancias
+        son no decrecientes hacia atrás, así que basta con saltar los empates.
+        """
+        leader = vehicle.ahead
+        while leader is not None and leader.distance >= vehicle.distance:
+            leader = leader.ahead
+        if leader is None or leader.distance < 0.0:
+            return None
+        return leader.distance
+
+    def restore_order(self, vehicle: VehicleAgent):
+        """
+        Tras actualizar `vehicle`, si quedó empatado con autos de id mayor
+        por delante, lo adelanta para mantener el orden (distance, id) que
+        usaba el ordenamiento global del motor original.
+        """
+        ahead = vehicle.ahead
+        if ahead is None or ahead.distance != vehicle.distance or ahead.id < vehicle.id:
+            return
+        while (
+            ahead.ahead is not None
+            and ahead.ahead.distance == vehicle.distance
+            and ahead.ahead.id > vehicle.id
+        ):
+            ahead = ahead.ahead
+        if ahead is self.stop_line:
+            self.stop_line = vehicle
+        self._unlink(vehicle)
+        self._link_after(vehicle, ahead.ahead)
+
+    # ---------- AVANCE POR EVENTOS ----------
+
+    def quiet_ticks(self, model, direction, track_zone: bool) -> int:
+        """
+        Cuántos ticks puede avanzar el carril, sin llegadas, sin que ningún
+        vehículo cruce ni salga. En ese tramo los que se acercan forman un
+        pelotón cuya posición tras t ticks tiene forma cerrada (ver
+        advance_quiet). Con track_zone también corta cuando un auto entra o
+        sale de la zona de detección, porque eso cambia el ciclo adaptativo.
+
+        Supone geometría entera y min_vehicle_gap > 0 (ver TrafficModel._quiet_ticks).
+        """
+        cfg = model.config
+        speed = cfg.vehicle_speed
+        gap = cfg.min_vehicle_gap
+        horizon = math.inf
+        i = 0
+        peak = prev_next = 0.0
+
+        v = self.front
+        while v is not None:
+            d = v.distance
+            if d < 0.0:
+                # Ya cruzó: avanza hasta el tick en que sale
+                horizon = min(horizon, math.ceil((d + cfg.post_cross_distance) / speed) - 1)
+            else:
+                if i == 0:
+                    # Primero del carril: cruza en el primer tick con verde
+                    # después de llegar a la línea de stop
+                    peak = d
+                    nxt = max(d - speed, 0.0)
+                    cross = model.traffic_light.first_green_tick(
+                        model, direction, math.ceil(d / speed) + 1
+                    )
+                    horizon = min(horizon, cross - 1)
+                else:
+                    peak = max(d, peak + gap)
+                    nxt = max(peak - speed, i * gap)
+                    # Su líder tiene que ser el anterior y no puede retroceder
+                    if d == 0.0 or prev_next >= d or nxt > d:
+                        return 0
+                if track_zone:
+                    horizon = min(horizon, self._ticks_until_zone_change(d, peak, i, cfg))
+                prev_next = nxt
+                i += 1
+            if horizon < 1:
+                return 0
+            v = v.behind
+        return horizon
+
+    @staticmethod
+    def _ticks_until_zone_change(d: float, peak: float, i: int, cfg) -> float:
+        # Primer t >= 1 en que max(peak - t * speed, i * gap) pasa el borde siguiente
+        for edge in (cfg.detection_zone_max, cfg.detection_zone_min):
+            if d > edge:
+                if i * cfg.min_vehicle_gap > edge:
+                    return math.inf
+                return max(1, math.ceil((peak - edge) / cfg.vehicle_speed))
+        return math.inf
+
+    def advance_quiet(self, model, ticks: int):
+        """
+        Aplica `ticks` ticks de un tramo calculado con quiet_ticks().
+
+        Para el i-ésimo auto que se acerca (0 = el más adelantado), la
+        recurrencia n_i = max(d_i - speed, n_{i-1} + gap) da, tras t ticks,
+        max(peak_i - t * speed, i * gap) con peak_i = max(d_i, peak_{i-1} + gap);
+        el primero se detiene en la línea de stop (i * gap = 0).
+        """
+        cfg = model.config
+        shift = ticks * cfg.vehicle_speed
+        gap = cfg.min_vehicle_gap
+        i = 0
+        peak = 0.0
+
+        v = self.front
+        while v is not None:
+            d = v.distance
+            if d < 0.0:
+                v.distance = d - shift
+            else:
+                peak = d if i == 0 else max(d, peak + gap)
+                new = max(peak - shift, float(i * gap))
+                if new != d:
+                    v.distance = new
+                    model.mark_vehicle_moved(v)
+                i += 1
+            v = v.behind
+
+    # ---------- LISTA ENLAZADA ----------
+
+    def _link_after(self, vehicle: VehicleAgent, after: Optional[VehicleAgent]):
+        # after = None -> el vehículo queda primero en la cola
+        before = self.front if after is None else after.behind
+        vehicle.ahead = after
+        vehicle.behind = before
+        if after is None:
+            self.front = vehicle
+        else:
+            after.behind = vehicle
+        if before is None:
+            self.back = vehicle
+        else:
+            before.ahead = vehicle
+
+    def _unlink(self, vehicle: VehicleAgent):
+        if vehicle.ahead is None:
+            self.front = vehicle.behind
+        else:
+            vehicle.ahead.behind = vehicle.behind
+        if vehicle.behind is None:
+            self.back = vehicle.ahead
+        else:
+            vehicle.behind.ahead = vehicle.ahead
+        vehicle.ahead = None
+        vehicle.behind = None
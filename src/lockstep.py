@@ -0,0 +1,112 @@
+from dataclasses import replace
+from typing import Dict, List, Optional, Sequence
+
+from .checkpoint import read_checkpoint, write_checkpoint
+from .config import SimulationConfig
+from .model import DemandSource, TrafficModel, control_rng_for, create_model
+
+# Campos que definen la demanda: los comparte todo el lockstep y una
+# variante no puede cambiarlos
+DEMAND_FIELDS = (
+    "seed",
+    "arrival_rate_ns",
+    "arrival_rate_ew",
+    "use_time_of_day",
+    "seconds_per_tick",
+    "demand_profile",
+    "arrival_sampler",
+    "arrival_chunk_ticks",
+)
+
+
+class LockstepComparison:
+    """
+    N variantes de controlador alimentadas por un único flujo de llegadas
+    (números aleatorios comunes): todas ven exactamente los mismos autos,
+    así que las diferencias entre ellas se deben solo al control, y las
+    llegadas se sortean una vez por tick en lugar de una vez por variante.
+
+    `variants` mapea un nombre a overrides de `base` (control_mode,
+    green_min, ...); los campos de DEMAND_FIELDS son comunes a todas.
+    """
+
+    def __init__(self, base: SimulationConfig, variants: Dict[str, Dict]):
+        for name, overrides in variants.items():
+            shared = set(overrides) & set(DEMAND_FIELDS)
+            if shared:
+                raise ValueError(f"La variante {name!r} no puede cambiar la demanda: {sorted(shared)}")
+
+        self.base = base
+        self.time = 0
+        # Todas las variantes sortean de esta demanda; cada una tiene su
+        # propio RNG de control
+        self.demand = DemandSource(base)
+        self.models: Dict[str, TrafficModel] = {}
+        for name, overrides in variants.items():
+            config = replace(base, **overrides)
+            self.models[name] = create_model(config, self.demand, control_rng_for(config))
+
+    def step(self):
+        arrivals = self.demand.draw(self.time)
+        for model in self.models.values():
+            model.step_with_arrivals(arrivals)
+        self.time += 1
+
+    def run(self, ticks: int):
+        for _ in range(ticks):
+            self.step()
+
+    def summaries(self) -> Dict[str, Dict[str, float]]:
+        return {name: model.get_summary() for name, model in self.models.items()}
+
+    # ---------- CHECKPOINTS ----------
+
+    def save_checkpoint(self, path: str):
+        write_checkpoint(path, {
+            "base": self.base,
+            "time": self.time,
+            "demand": (self.demand.rng.getstate(), self.demand.stream),
+            "models": {name: model.get_state() for name, model in self.models.items()},
+        })
+
+    @classmethod
+    def load_checkpoint(cls, path: str) -> "LockstepComparison":
+        state = read_checkpoint(path)
+        comparison = cls.__new__(cls)
+        comparison.base = state["base"]
+        comparison.time = state["time"]
+        comparison.demand = DemandSource(comparison.base)
+        comparison.models = {}
+        for name, model_state in state["models"].items():
+            config = SimulationConfig(**model_state["config"])
+            model = create_model(config, comparison.demand, control_rng_for(config))
+            model.set_state(model_state)
+            comparison.models[name] = model
+        # Después de los modelos: set_state también escribe en la demanda compartida
+        rng_state, comparison.demand.stream = state["demand"]
+        comparison.demand.rng.setstate(rng_state)
+        return comparison
+
+
+def run_paired(
+    base: SimulationConfig,
+    variants: Dict[str, Dict],
+    seeds: Sequence[int],
+    reference: str,
+    metric: str = "avg_travel_time",
+    ticks: Optional[int] = None,
+) -> Dict[str, List[float]]:
+    """
+    Corre el lockstep con cada semilla y devuelve, por variante, las
+    diferencias pareadas `metric(variante) - metric(reference)` por semilla.
+    Con summarize_metric (src/replications.py) se obtiene media e IC.
+    """
+    ticks = base.ticks if ticks is None else ticks
+    differences: Dict[str, List[float]] = {name: [] for name in variants if name != reference}
+    for seed in seeds:
+        comparison = LockstepComparison(replace(base, seed=seed), variants)
+        comparison.run(ticks)
+        summaries = comparison.summaries()
+        for name in differences:
+            differences[name].append(summaries[name][metric] - summaries[reference][metric])
+    return differences
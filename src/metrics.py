@@ -0,0 +1,365 @@
+import math
+from array import array
+from typing import Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+# Percentiles de tiempo de viaje que se reportan (resúmenes, log, HUD)
+PERCENTILES = (50, 95, 99)
+
+
+class QuantileSketch:
+    """
+    Cuantiles en streaming con error relativo acotado (estilo DDSketch).
+
+    Cada valor x > 0 cuenta en el bucket ceil(log_gamma(x)), con
+    gamma = (1 + a) / (1 - a) y a = relative_accuracy, así que cualquier
+    cuantil se estima con error relativo <= a. El resultado no depende del
+    orden de llegada y dos sketches se combinan sumando buckets: merge()
+    es exacto (réplicas, procesos, días).
+
+    Los buckets son contiguos (un array de contadores desde min_key) y a lo
+    sumo max_buckets; si se pasa, se juntan los más bajos, que son los que
+    menos importan para P95/P99. Con tiempos de viaje en ticks y a = 1 %
+    son unos pocos cientos, sin importar cuántos vehículos se sumen.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy tiene que estar en (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.zeros = 0  # valores <= 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.min_key = 0
+        self.counts = array("q")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, value: float):
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= 0:
+            self.zeros += 1
+        else:
+            self._add_key(math.ceil(math.log(value) / self._log_gamma), 1)
+
+    def _add_key(self, key: int, n: int):
+        counts = self.counts
+        i = key - self.min_key
+        if not counts:
+            self.min_key, i = key, 0
+            counts.append(0)
+        elif i < 0:
+            self.counts = counts = array("q", bytes(8 * -i)) + counts
+            self.min_key, i = key, 0
+        elif i >= len(counts):
+            counts.frombytes(bytes(8 * (i - len(counts) + 1)))
+        counts[i] += n
+        if len(counts) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        excess = len(self.counts) - self.max_buckets
+        low = sum(self.counts[:excess + 1])
+        self.counts = array("q", [low]) + self.counts[excess + 1:]
+        self.min_key += excess
+
+    def merge(self, other: "QuantileSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("No se pueden combinar sketches con distinta precisión")
+        self.count += other.count
+        self.zeros += other.zeros
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for i, n in enumerate(other.counts):
+            if n:
+                self._add_key(other.min_key + i, n)
+
+    def copy(self) -> "QuantileSketch":
+        sketch = QuantileSketch(self.relative_accuracy, self.max_buckets)
+        sketch.merge(self)
+        return sketch
+
+    def quantile(self, q: float, default: float = float("nan")) -> float:
+        """Cuantil q en [0, 1]; `default` si no hay valores."""
+        if self.count == 0:
+            return default
+        rank = q * (self.count - 1)
+        if rank < self.zeros:
+            return self._clamp(0.0)
+        seen = self.zeros
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen > rank:
+                # Punto del bucket (gamma^(k-1), gamma^k] con error relativo <= a
+                return self._clamp(2 * self.gamma ** (self.min_key + i) / (self.gamma + 1))
+        return float(self.max)
+
+    def _clamp(self, value: float) -> float:
+        return float(min(max(value, self.min), self.max))
+
+    def percentiles(self, percentiles: Sequence[int] = PERCENTILES,
+                    default: float = float("nan")) -> Dict[int, float]:
+        return {p: self.quantile(p / 100, default) for p in percentiles}
+
+
+def percentile_summary(sketch: QuantileSketch, default: float = float("nan")) -> Dict[str, float]:
+    """Percentiles de PERCENTILES como claves de get_summary(): p50_travel_time, ..."""
+    return {f"p{p}_travel_time": value for p, value in sketch.percentiles(default=default).items()}
+
+
+class TravelTimeStats:
+    """Agregado de tiempos de viaje (en ticks): conteo, suma, histograma y sketch de cuantiles."""
+
+    def __init__(self, bin_ticks: int, relative_accuracy: float = 0.01):
+        self.bin_ticks = bin_ticks
+        self.count = 0
+        self.total_travel_time = 0
+        # bin -> cantidad; el bin b cubre [b * bin_ticks, (b + 1) * bin_ticks)
+        self.histogram: Dict[int, int] = {}
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, travel_time: int):
+        self.count += 1
+        self.total_travel_time += travel_time
+        b = travel_time // self.bin_ticks
+        self.histogram[b] = self.histogram.get(b, 0) + 1
+        self.sketch.add(travel_time)
+
+    def merge(self, other: "TravelTimeStats"):
+        self.count += other.count
+        self.total_travel_time += other.total_travel_time
+        for b, n in other.histogram.items():
+            self.histogram[b] = self.histogram.get(b, 0) + n
+        self.sketch.merge(other.sketch)
+
+    def mean(self, default: float = float("nan")) -> float:
+        if self.count == 0:
+            return default
+        return self.total_travel_time / self.count
+
+    def quantile(self, q: float, default: float = float("nan")) -> float:
+        return self.sketch.quantile(q, default)
+
+
+class WindowStats(NamedTuple):
+    """
+    Salidas dentro de una ventana horaria: conteo y suma de tiempos de
+    viaje, y el sketch de cuantiles si la ventana es una de las que
+    ExitMetrics sigue (si no, quantile() da `default`).
+    """
+    count: int
+    total_travel_time: int
+    sketch: Optional[QuantileSketch] = None
+
+    def mean(self, default: float = float("nan")) -> float:
+        if self.count == 0:
+            return default
+        return self.total_travel_time / self.count
+
+    def quantile(self, q: float, default: float = float("nan")) -> float:
+        if self.sketch is None:
+            return default
+        return self.sketch.quantile(q, default)
+
+
+class SummaryWindow(NamedTuple):
+    """Ventana horaria con nombre, en minutos del día: [start, end)."""
+    name: str
+    label: str
+    start_minute: int
+    end_minute: int
+
+    def describe(self) -> str:
+        return f"{self.label} {_format_minute(self.start_minute)}–{_format_minute(self.end_minute)}"
+
+
+def parse_windows(windows: Sequence[Tuple[str, str, str, str]]) -> List[SummaryWindow]:
+    """(nombre, etiqueta, "HH:MM", "HH:MM") -> SummaryWindow. "24:00" vale como fin."""
+    parsed = []
+    for name, label, start, end in windows:
+        parsed.append(SummaryWindow(name, label, _parse_minute(start), _parse_minute(end)))
+    return parsed
+
+
+def _parse_minute(text: str) -> int:
+    hour, minute = (int(part) for part in text.split(":"))
+    value = hour * 60 + minute
+    if not 0 <= value <= MINUTES_PER_DAY or not 0 <= minute < 60:
+        raise ValueError(f"Hora inválida: {text!r}")
+    return value
+
+
+def _format_minute(value: int) -> str:
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+
+class ExitMetrics:
+    """
+    Métricas de salida en streaming: se actualizan cuando un vehículo sale,
+    por día y por bin de minutos del tick de salida, sin guardar vehículos.
+    El detalle por día (bins, agregados) se libera con release_day() una
+    vez resumido, o solo al pasar `retain_days` días (None = nunca), así
+    que la memoria no crece con la duración de la corrida.
+
+    Cada bin guarda solo conteo y suma de tiempos de viaje, así que
+    cualquier ventana horaria del día se resume en O(bins). Los percentiles
+    salen de sketches de cuantiles (memoria acotada cada uno): el total y
+    cada día (en TravelTimeStats), y cada acceso y cada ventana de
+    `windows`, con un sketch por día que release_day() suma al acumulado
+    de la corrida.
+    """
+
+    def __init__(self, ticks_per_day: int, bin_ticks: int = 10, bin_minutes: int = 1,
+                 windows: Sequence[SummaryWindow] = (), relative_accuracy: float = 0.01,
+                 retain_days: Optional[int] = 7):
+        # Con 1, el día recién terminado se liberaría antes de resumirlo
+        if retain_days is not None and retain_days < 2:
+            raise ValueError("retain_days tiene que ser >= 2 (o None)")
+        self.ticks_per_day = max(1, ticks_per_day)
+        self.retain_days = retain_days
+        self.bin_ticks = bin_ticks
+        self.bin_minutes = bin_minutes
+        self.bins_per_day = -(-MINUTES_PER_DAY // bin_minutes)
+        self.relative_accuracy = relative_accuracy
+
+        self.total = TravelTimeStats(bin_ticks, relative_accuracy)
+        self.by_day: Dict[int, TravelTimeStats] = {}
+        # día -> conteo / suma de tiempos de viaje por bin de minutos
+        self.bin_counts: Dict[int, List[int]] = {}
+        self.bin_totals: Dict[int, List[int]] = {}
+
+        # día -> acceso (Direction) -> sketch, y acumulado de días liberados
+        self.direction_sketches: Dict[int, Dict[Hashable, QuantileSketch]] = {}
+        self.direction_totals: Dict[Hashable, QuantileSketch] = {}
+        # Ventanas con sketch propio, con los mismos bins que window()
+        self.windows_tracked = [(w, self._bin_ranges(w.start_minute, w.end_minute)) for w in windows]
+        # día -> nombre de la ventana -> sketch, y acumulado de días liberados
+        self.window_sketches: Dict[int, Dict[str, QuantileSketch]] = {}
+        self.window_totals: Dict[str, QuantileSketch] = {}
+
+    def record(self, start_time: int, exit_time: int, direction: Hashable = None):
+        travel_time = exit_time - start_time
+        day, tick_in_day = divmod(exit_time, self.ticks_per_day)
+        minute = tick_in_day * MINUTES_PER_DAY // self.ticks_per_day
+
+        self.total.add(travel_time)
+
+        stats = self.by_day.get(day)
+        if stats is None:
+            if self.retain_days is not None:
+                for old in [d for d in self.by_day if d <= day - self.retain_days]:
+                    self.release_day(old)
+            stats = self.by_day[day] = TravelTimeStats(self.bin_ticks, self.relative_accuracy)
+            self.bin_counts[day] = [0] * self.bins_per_day
+            self.bin_totals[day] = [0] * self.bins_per_day
+            self.direction_sketches[day] = {}
+            self.window_sketches[day] = {}
+        stats.add(travel_time)
+
+        b = minute // self.bin_minutes
+        self.bin_counts[day][b] += 1
+        self.bin_totals[day][b] += travel_time
+
+        if direction is not None:
+            sketches = self.direction_sketches[day]
+            sketch = sketches.get(direction)
+            if sketch is None:
+                sketch = sketches[direction] = QuantileSketch(self.relative_accuracy)
+            sketch.add(travel_time)
+
+        for window, ranges in self.windows_tracked:
+            if any(first <= b < last for first, last in ranges):
+                sketches = self.window_sketches[day]
+                sketch = sketches.get(window.name)
+                if sketch is None:
+                    sketch = sketches[window.name] = QuantileSketch(self.relative_accuracy)
+                sketch.add(travel_time)
+
+    def release_day(self, day: int):
+        """
+        Descarta el detalle de un día ya resumido: sus sketches por acceso
+        y por ventana se suman a los acumulados (los totales no cambian).
+        """
+        self.by_day.pop(day, None)
+        self.bin_counts.pop(day, None)
+        self.bin_totals.pop(day, None)
+        for sketches, totals in (
+            (self.direction_sketches.pop(day, {}), self.direction_totals),
+            (self.window_sketches.pop(day, {}), self.window_totals),
+        ):
+            for key, sketch in sketches.items():
+                if key in totals:
+                    totals[key].merge(sketch)
+                else:
+                    totals[key] = sketch
+
+    def day(self, day: int) -> TravelTimeStats:
+        return self.by_day.get(day) or TravelTimeStats(self.bin_ticks, self.relative_accuracy)
+
+    def direction(self, direction: Hashable, day: Optional[int] = None) -> QuantileSketch:
+        """Sketch de un acceso en un día (None = toda la corrida)."""
+        return self._combined(self.direction_sketches, self.direction_totals, direction, day)
+
+    def window_sketch(self, name: str, day: Optional[int] = None) -> QuantileSketch:
+        """Sketch de una ventana seguida en un día (None = toda la corrida)."""
+        return self._combined(self.window_sketches, self.window_totals, name, day)
+
+    def _combined(self, by_day, totals, key, day) -> QuantileSketch:
+        # Copia: el día pedido o, con day=None, el acumulado + los días vivos
+        sketch = QuantileSketch(self.relative_accuracy)
+        if day is None:
+            parts = [totals.get(key)] + [sketches.get(key) for sketches in by_day.values()]
+        else:
+            parts = [by_day.get(day, {}).get(key)]
+        for part in parts:
+            if part is not None:
+                sketch.merge(part)
+        return sketch
+
+    def _bin_ranges(self, start_minute: int, end_minute: int) -> Tuple[Tuple[int, int], ...]:
+        # Bins enteros de [start, end); si end <= start da la vuelta a la medianoche
+        first = start_minute // self.bin_minutes
+        last = -(-end_minute // self.bin_minutes)
+        if end_minute <= start_minute:
+            return (first, self.bins_per_day), (0, last)
+        return ((first, last),)
+
+    def window(self, day: int, start_minute: int, end_minute: int) -> WindowStats:
+        """
+        Salidas del día entre start_minute (incl.) y end_minute (excl.),
+        redondeado a bins enteros. Si end <= start, la ventana da la vuelta
+        a la medianoche (dentro del mismo día). Si es una de las ventanas
+        seguidas, incluye su sketch de cuantiles.
+        """
+        sketch = None
+        for window, _ in self.windows_tracked:
+            if (window.start_minute, window.end_minute) == (start_minute, end_minute):
+                # Un día sin salidas (o una ventana vacía) da un sketch vacío
+                sketch = (self.window_sketches.get(day, {}).get(window.name)
+                          or QuantileSketch(self.relative_accuracy))
+                break
+        counts = self.bin_counts.get(day)
+        if counts is None:
+            return WindowStats(0, 0, sketch)
+        totals = self.bin_totals[day]
+        ranges = self._bin_ranges(start_minute, end_minute)
+        count = sum(sum(counts[a:b]) for a, b in ranges)
+        total = sum(sum(totals[a:b]) for a, b in ranges)
+        return WindowStats(count, total, sketch)
+
+    def hours(self, day: int, start_hour: int, end_hour: int) -> WindowStats:
+        """Agregado de las salidas del día entre start_hour (incl.) y end_hour (excl.)."""
+        return self.window(day, start_hour * 60, end_hour * 60)
+
+    def windows(self, day: int, windows: Sequence[SummaryWindow]) -> Dict[str, WindowStats]:
+        return {w.name: self.window(day, w.start_minute, w.end_minute) for w in windows}
@@ -0,0 +1,177 @@
+import csv
+import json
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+# Métricas que main_visual guarda por variante, día y ventana; en
+# metrics_log.csv son las columnas <variante>_<métrica>_<ventana>
+METRICS = ("veh", "avg_ticks", "avg_min", "p50_min", "p95_min", "p99_min")
+
+_CSV_COLUMN = re.compile(r"^(?P<variant>.+?)_(?P<metric>%s)_(?P<window>.+)$" % "|".join(METRICS))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id               INTEGER PRIMARY KEY,
+    name             TEXT NOT NULL,
+    created          REAL NOT NULL,
+    seconds_per_tick REAL,
+    config           TEXT
+);
+CREATE TABLE IF NOT EXISTS day_metrics (
+    run_id  INTEGER NOT NULL REFERENCES runs(id),
+    day     INTEGER NOT NULL,
+    variant TEXT NOT NULL,
+    window  TEXT NOT NULL,
+    metric  TEXT NOT NULL,
+    value,  -- sin tipo: los enteros (veh) vuelven como int
+    PRIMARY KEY (run_id, day, variant, window, metric)
+) WITHOUT ROWID;
+"""
+
+
+def _parse_number(text):
+    for parse in (int, float):
+        try:
+            return parse(text)
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+class MetricsStore:
+    """
+    Métricas diarias en SQLite (modo WAL): un proceso escribe mientras
+    otros (metrics_ui) leen, sin bloquearse ni releer todo el historial.
+
+    Cada corrida (runs) tiene filas (día, variante, ventana, métrica,
+    valor), así que sirve para cualquier conjunto de variantes de control
+    y ventanas horarias. La clave primaria empieza por (run_id, day), que
+    es el índice de days_since().
+
+    add_day() junta los días en memoria y los escribe en una transacción
+    cuando pasaron `flush_seconds` desde la última (0 = en cada día);
+    flush()/close() escriben lo pendiente.
+    """
+
+    def __init__(self, path: str, flush_seconds: float = 1.0):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        # check_same_thread=False: en main_visual --decoupled escribe el
+        # hilo de simulación (nunca dos hilos a la vez)
+        self._conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    # ---------- CORRIDAS ----------
+
+    def create_run(self, name: str, seconds_per_tick: Optional[float] = None,
+                   config: Optional[Dict] = None) -> int:
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (name, created, seconds_per_tick, config) VALUES (?, ?, ?, ?)",
+                (name, time.time(), seconds_per_tick,
+                 None if config is None else json.dumps(config, sort_keys=True, default=str)),
+            )
+        return cursor.lastrowid
+
+    def latest_run(self) -> Optional[int]:
+        row = self._conn.execute("SELECT MAX(id) FROM runs").fetchone()
+        return row[0]
+
+    def runs(self) -> List[Dict]:
+        cursor = self._conn.execute(
+            "SELECT id, name, created, seconds_per_tick FROM runs ORDER BY id"
+        )
+        return [dict(zip(("id", "name", "created", "seconds_per_tick"), row)) for row in cursor]
+
+    def run_config(self, run_id: int) -> Optional[Dict]:
+        """La config guardada con create_run (None si no hay, p. ej. un CSV importado)."""
+        row = self._conn.execute("SELECT config FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return None if row is None or row[0] is None else json.loads(row[0])
+
+    # ---------- ESCRITURA ----------
+
+    def add_day(self, run_id: int, day: int, values: Dict[str, Dict[str, Dict[str, float]]]):
+        """values[variante][ventana][métrica] = valor. Reescribir un día lo reemplaza."""
+        for variant, windows in values.items():
+            for window, metrics in windows.items():
+                for metric, value in metrics.items():
+                    self._pending.append((run_id, day, variant, window, metric, value))
+        if time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO day_metrics VALUES (?, ?, ?, ?, ?, ?)",
+                    self._pending,
+                )
+            self._pending = []
+        self._last_flush = time.monotonic()
+
+    # ---------- LECTURA ----------
+
+    def days_since(self, run_id: int, day: int = 0) -> List[Dict]:
+        """
+        Días de la corrida posteriores a `day`, en orden, como filas
+        {"day": d, "<variante>_<métrica>_<ventana>": valor, ...} (las
+        columnas del viejo CSV).
+        """
+        cursor = self._conn.execute(
+            "SELECT day, variant, window, metric, value FROM day_metrics "
+            "WHERE run_id = ? AND day > ? ORDER BY day",
+            (run_id, day),
+        )
+        rows = []
+        for d, variant, window, metric, value in cursor:
+            if not rows or rows[-1]["day"] != d:
+                rows.append({"day": d})
+            rows[-1][f"{variant}_{metric}_{window}"] = value
+        return rows
+
+    # ---------- IMPORTACIÓN ----------
+
+    def import_csv(self, path: str, name: Optional[str] = None,
+                   seconds_per_tick: Optional[float] = None) -> int:
+        """
+        Copia un metrics_log.csv (columnas day y <variante>_<métrica>_<ventana>)
+        a una corrida nueva. Las columnas que no siguen ese formato se ignoran.
+        """
+        run_id = self.create_run(name or path, seconds_per_tick)
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            columns = {
+                column: match.group("variant", "metric", "window")
+                for column in reader.fieldnames or ()
+                for match in [_CSV_COLUMN.match(column)]
+                if match
+            }
+            for r in reader:
+                try:
+                    day = int(r["day"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                for column, (variant, metric, window) in columns.items():
+                    value = _parse_number(r[column])
+                    if value is None:
+                        continue
+                    self._pending.append((run_id, day, variant, window, metric, value))
+        self.flush()
+        return run_id
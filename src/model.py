@@ -1,144 +1,300 @@
+import math
 import random
-from typing import List, Dict
+from collections import deque
+from dataclasses import asdict
+from typing import Deque, List, Dict, Optional
 
 from .config import SimulationConfig
-from .agents import VehicleAgent, TrafficLightAgent, Direction
+from .agents import VehicleAgent, VehiclePool, TrafficLightAgent, Direction
+from .lanes import LaneQueue
+from .metrics import ExitMetrics, parse_windows, percentile_summary
+from .demand import arrival_schedule_for
+from .checkpoint import read_checkpoint, write_checkpoint
 
+# Tope del retroceso exponencial de run(): a lo sumo 2**4 - 1 ticks normales
+# entre intentos de fast-forward
+FAST_FORWARD_MAX_BACKOFF = 4
+# Tramos más cortos no compensan el costo de calcularlos
+FAST_FORWARD_MIN_TICKS = 4
+
+
+def draw_arrivals(rng: random.Random, arrival_rate_ns: float, arrival_rate_ew: float):
+    """Llegadas de un tick: a lo sumo una por eje, en un sentido al azar."""
+    arrivals = ()
+
+    if rng.random() < arrival_rate_ns:
+        arrivals += (rng.choice([Direction.NORTH_SOUTH, Direction.SOUTH_NORTH]),)
+
+    if rng.random() < arrival_rate_ew:
+        arrivals += (rng.choice([Direction.EAST_WEST, Direction.WEST_EAST]),)
+
+    return arrivals
+
+
+def control_rng_for(config: SimulationConfig) -> random.Random:
+    """
+    RNG del controlador. Es aparte del de la demanda, así que cambiar de
+    controlador no altera la secuencia de llegadas.
+    """
+    return random.Random(f"control-{config.seed}")
+
+
+class DemandSource:
+    """Llegadas de un SimulationConfig: RNG, tasas por tick y, con arrival_sampler="numpy", el stream."""
 
-class TrafficModel:
     def __init__(self, config: SimulationConfig):
-        self.config = config
         self.rng = random.Random(config.seed)
+        # Probabilidades de llegada por tick (tasas fijas o perfil del día)
+        self.schedule = arrival_schedule_for(config)
+        self.stream = None
+        if config.arrival_sampler == "numpy":
+            from .arrivals import ArrivalStream  # requiere numpy
+            self.stream = ArrivalStream(self.schedule, config.seed, config.arrival_chunk_ticks)
+
+    def draw(self, tick: int):
+        if self.stream is not None:
+            return self.stream.draw(tick)
+        return draw_arrivals(self.rng, *self.schedule.rates(tick))
+
+
+class TrafficModel:
+    def __init__(self, config: SimulationConfig, demand: Optional[DemandSource] = None,
+                 control_rng: Optional[random.Random] = None):
+        """
+        `demand` y `control_rng` se pasan cuando las llegadas vienen de
+        afuera (src/lockstep.py: una sola demanda para todas las variantes);
+        si no, el modelo arma los suyos a partir de config.seed.
+        """
+        self.config = config
+        self.demand = demand if demand is not None else DemandSource(config)
+        self.control_rng = control_rng if control_rng is not None else control_rng_for(config)
 
         self.time = 0  # tick actual
 
         # Agente semáforo
-        self.traffic_light = TrafficLightAgent(config, self.rng)
+        self.traffic_light = TrafficLightAgent(config, self.control_rng)
+
+        self._init_vehicle_state()
+
+        # Serie de tiempo por tick (opcional)
+        self.recorder = None
+        if config.record_every:
+            from .recorder import TimeSeriesRecorder  # requiere numpy
+            self.recorder = TimeSeriesRecorder(config.record_every, config.record_capacity)
+
+    def _init_vehicle_state(self):
+        # Vehículos en el sistema, por id (en orden de llegada)
+        self.active_vehicles: Dict[int, VehicleAgent] = {}
+
+        # Los vehículos que salen se reciclan, salvo que se estén guardando
+        # en exited_vehicles (ahí siguen referenciados)
+        pool_size = self.config.vehicle_pool_size
+        if self.config.exited_vehicles_retention != 0:
+            pool_size = 0
+        self.vehicle_pool = VehiclePool(pool_size)
 
-        # Lista de vehículos en el sistema
-        self.vehicles: List[VehicleAgent] = []
+        # Una cola ordenada por carril (de la línea de stop hacia atrás)
+        self.lanes: Dict[Direction, LaneQueue] = {d: LaneQueue() for d in Direction}
+
+        # Vehículos dentro de la zona de detección, por carril. Se actualiza
+        # cuando un auto entra o sale de la zona, no recorriendo la flota.
+        self.queue_counts: Dict[Direction, int] = {d: 0 for d in Direction}
 
         # Métricas
-        self.exited_vehicles: List[VehicleAgent] = []
+        self._init_metrics()
+
+    def _init_metrics(self):
+        # Agregados en streaming por día y por hora (memoria acotada)
+        ticks_per_day = int(24 * 3600 / self.config.seconds_per_tick)
+        self.exit_metrics = ExitMetrics(
+            ticks_per_day, self.config.histogram_bin_ticks, self.config.exit_bin_minutes,
+            windows=parse_windows(self.config.summary_windows),
+            relative_accuracy=self.config.quantile_accuracy,
+            retain_days=self.config.exit_metrics_retain_days,
+        )
+
+        # Retención opcional de los últimos vehículos que salieron:
+        # 0 = ninguno, N = buffer circular de N, None = todos (sin límite)
+        self.exited_vehicles: Deque[VehicleAgent] = deque(
+            maxlen=self.config.exited_vehicles_retention
+        )
+
+    @property
+    def vehicles(self) -> List[VehicleAgent]:
+        return list(self.active_vehicles.values())
     #------------------------------------------------
     def get_leading_vehicle_distance(self, vehicle):
         
         if vehicle.distance < 0.0:
             return None
 
-        candidates = [
-            v for v in self.vehicles
-            if v is not vehicle
-            and v.exit_time is None
-            and v.direction == vehicle.direction
-            and v.distance >= 0.0              
-            and v.distance < vehicle.distance  
-        ]
-        if not candidates:
-            return None
-
-        leading = max(candidates, key=lambda v: v.distance)
-        return leading.distance
+        return self.lanes[vehicle.direction].leader_distance(vehicle)
     
     def step(self):
-        self._spawn_vehicles()
+        self.step_with_arrivals(self._draw_arrivals())
+
+    def step_with_arrivals(self, arrivals):
+        """Un tick con las llegadas ya sorteadas (ver src/lockstep.py)."""
+        for direction in arrivals:
+            self._add_vehicle(direction)
         self.traffic_light.step(self)
-        for vehicle in sorted(list(self.vehicles), key=lambda v: v.distance):
-            vehicle.step(self)
+        self._step_vehicles()
         self.time += 1
+        if self.recorder is not None:
+            self.recorder.record(self, len(arrivals))
+
+    def run(self, ticks: int):
+        """
+        Avanza `ticks` ticks. Con config.fast_forward, los tramos en los que
+        no cruza ni sale nadie se aplican de una vez (hasta la próxima
+        llegada) en lugar de tick a tick. El resultado es idéntico al de
+        llamar step() `ticks` veces.
+
+        Con recorder y record_every == 1 no hay fast-forward (la serie
+        necesita cada tick); con record_every > 1 los tramos se aplican hasta
+        cada tick muestreado, que se graba igual que tick a tick.
+
+        Con config.checkpoint_every > 0 guarda un checkpoint en
+        config.checkpoint_path cada vez que time llega a un múltiplo.
+        """
+        end = self.time + ticks
+        every = self.config.checkpoint_every
+        if not every or self.config.checkpoint_path is None:
+            self._run_until(end)
+            return
+        while self.time < end:
+            self._run_until(min(end, (self.time // every + 1) * every))
+            if self.time % every == 0:
+                self.save_checkpoint(self.config.checkpoint_path)
+
+    def _run_until(self, end: int):
+        # Con tráfico denso casi nunca hay tramos: tras cada intento fallido
+        # se simulan más ticks normales antes de volver a buscar uno
+        misses = 0
+        wait = 0
+        stepwise = not self.config.fast_forward or (
+            self.recorder is not None and self.recorder.every == 1
+        )
+        while self.time < end:
+            if stepwise or wait:
+                self.step()
+                wait = max(wait - 1, 0)
+            elif self._fast_forward(end):
+                misses = 0
+            else:
+                misses = min(misses + 1, FAST_FORWARD_MAX_BACKOFF)
+                wait = (1 << misses) - 1
+
+    def _fast_forward(self, end: int) -> bool:
+        """Aplica el próximo tramo sin eventos; si no hay, un step() y False."""
+        horizon = min(self._quiet_ticks(), end - self.time)
+        if horizon < FAST_FORWARD_MIN_TICKS:
+            self.step()
+            return False
+
+        # Las llegadas se sortean tick a tick igual que en step() (mismo
+        # orden de llamadas al RNG); el resto del tramo se aplica de una vez
+        # justo antes de la primera llegada, o al final del tramo. Con
+        # recorder, también en cada tick muestreado, para grabar ese estado.
+        recorder = self.recorder
+        quiet = 0    # ticks del tramo ya sorteados
+        applied = 0  # de esos, los ya aplicados
+        while quiet < horizon:
+            arrivals = self._draw_arrivals()
+            if arrivals:
+                self._advance_quiet(quiet - applied)
+                self.step_with_arrivals(arrivals)
+                return True
+            quiet += 1
+            self.time += 1
+            if recorder is not None and not self.time % recorder.every:
+                self._advance_quiet(quiet - applied)
+                applied = quiet
+                recorder.record(self, 0)
+        self._advance_quiet(quiet - applied)
+        return True
+
+    def _quiet_ticks(self) -> float:
+        """Largo máximo del próximo tramo sin eventos (sin contar llegadas)."""
+        if self.is_empty():
+            # Con colas vacías el ciclo del semáforo es determinista
+            return math.inf
+
+        cfg = self.config
+        geometry = (
+            cfg.vehicle_speed, cfg.min_vehicle_gap, cfg.post_cross_distance,
+            cfg.max_distance, cfg.detection_zone_min, cfg.detection_zone_max,
+        )
+        # Con valores no enteros, "avanzar k ticks de una vez" no reproduce
+        # bit a bit los redondeos de k restas: se simula tick a tick
+        if not all(float(x).is_integer() for x in geometry):
+            return 0
+        if cfg.vehicle_speed < 1 or cfg.min_vehicle_gap <= 0:
+            return 0
+
+        # El semáforo no limita el tramo (su ciclo se adelanta con skip());
+        # solo importa cuándo recibe verde el primer auto de cada carril
+        horizon = math.inf
+        track_zone = cfg.control_mode != "fixed"
+        for direction, lane in self.lanes.items():
+            if horizon < 1:
+                break
+            horizon = min(horizon, lane.quiet_ticks(self, direction, track_zone))
+        return horizon
+
+    def _advance_quiet(self, ticks: int):
+        if ticks == 0:
+            return
+        # Primero el semáforo: en cada tick decide antes de que se muevan
+        # los autos, con las colas del tick anterior
+        self.traffic_light.skip(self, ticks)
+        if not self.is_empty():
+            for lane in self.lanes.values():
+                lane.advance_quiet(self, ticks)
+
+    def is_empty(self) -> bool:
+        return not self.active_vehicles
+
+    def vehicle_count(self) -> int:
+        return len(self.active_vehicles)
+
+    def _step_vehicles(self):
+        if self.config.step_order == "sorted":
+            for vehicle in sorted(self.active_vehicles.values(), key=lambda v: v.distance):
+                vehicle.step(self)
+        else:
+            # Cada carril ya está en orden de actualización (de la línea de
+            # stop hacia atrás): no hace falta copiar ni ordenar la flota.
+            for lane in self.lanes.values():
+                vehicle = lane.front
+                while vehicle is not None:
+                    nxt = vehicle.behind
+                    vehicle.step(self)
+                    vehicle = nxt
 
     # LÓGICA DE LLEGADAS 
-    def _spawn_vehicles(self):
-        arrival_rate_ns, arrival_rate_ew = self._get_arrival_rates_for_current_time()
-
-        if self.rng.random() < arrival_rate_ns:
-            direction = self.rng.choice([Direction.NORTH_SOUTH, Direction.SOUTH_NORTH])
-            self._add_vehicle(direction)
-
-        if self.rng.random() < arrival_rate_ew:
-            direction = self.rng.choice([Direction.EAST_WEST, Direction.WEST_EAST])
-            self._add_vehicle(direction)
+    def _draw_arrivals(self):
+        """Sortea las llegadas del tick actual (0, 1 o 2 direcciones)."""
+        demand = self.demand
+        if demand.stream is not None:
+            return demand.stream.draw(self.time)
+        return draw_arrivals(demand.rng, *demand.schedule.rates(self.time))
 
     def _add_vehicle(self, direction: Direction):
-        v = VehicleAgent(
+        v = self.vehicle_pool.acquire(
             direction=direction,
             start_time=self.time,
             start_distance=float(self.config.max_distance),
         )
-        self.vehicles.append(v)
+        self.active_vehicles[v.id] = v
+        self.lanes[direction].insert(v)
+        self._update_detection(v)
 
     #NUEVO: HORA DEL DÍA Y TASAS DINÁMICAS
 
     def _get_arrival_rates_for_current_time(self):
-        if not self.config.use_time_of_day:
-            return self.config.arrival_rate_ns, self.config.arrival_rate_ew
-
-        hour, minute = self.get_simulated_clock()
-
-
-        ticks_per_hour = max(1, int(3600 / self.config.seconds_per_tick))
-
-    def _get_arrival_rates_for_current_time(self):
-
-        if not self.config.use_time_of_day:
-            return self.config.arrival_rate_ns, self.config.arrival_rate_ew
-
-        hour, minute = self.get_simulated_clock()
-
-        ticks_per_hour = max(1, int(3600 / self.config.seconds_per_tick))
-
-        def p_from_rate_per_hour(rate_per_hour: float) -> float:
-            return min(rate_per_hour / ticks_per_hour, 1.0)
-
-        if 0 <= hour < 5:
-            
-            rate_ns_h = 5.0
-            rate_ew_h = 5.0
-
-        elif 5 <= hour < 7:
-            
-            rate_ns_h = 15.0
-            rate_ew_h = 15.0
-
-        elif 7 <= hour < 9:
-            
-            rate_ns_h = 40.0
-            rate_ew_h = 40.0
-
-        elif 9 <= hour < 13:
-            
-            rate_ns_h = 25.0
-            rate_ew_h = 25.0
-
-        elif 13 <= hour < 16:
-            
-            rate_ns_h = 35.0
-            rate_ew_h = 15.0
-
-        elif 16 <= hour < 19:
-            
-            rate_ns_h = 30.0
-            rate_ew_h = 30.0
-
-        elif 19 <= hour < 21:
-            
-            rate_ns_h = 20.0
-            rate_ew_h = 20.0
-
-        elif 21 <= hour < 23:
-            
-            rate_ns_h = 8.0
-            rate_ew_h = 8.0
-
-        else:
-            
-            rate_ns_h = 4.0
-            rate_ew_h = 4.0
-
-        arrival_ns = p_from_rate_per_hour(rate_ns_h)
-        arrival_ew = p_from_rate_per_hour(rate_ew_h)
-
-        return arrival_ns, arrival_ew
+        # Tabla precalculada por config (ver src/demand.py)
+        return self.demand.schedule.rates(self.time)
 
     def get_simulated_clock(self):
         total_seconds = self.time * self.config.seconds_per_tick
@@ -164,43 +320,153 @@ class TrafficModel:
             # resto de horas: algo moderado/balanceado
             return "Escenario: Flujo moderado/balanceado"
 
+    # ---------- CHECKPOINTS ----------
+
+    def save_checkpoint(self, path: str):
+        write_checkpoint(path, self.get_state())
+
+    def get_state(self) -> Dict:
+        """
+        Estado completo del modelo: continuar desde set_state() da
+        exactamente lo mismo que no haberse detenido.
+        """
+        light = self.traffic_light
+        return {
+            "config": asdict(self.config),
+            "time": self.time,
+            "rng": self.demand.rng.getstate(),
+            "control_rng": self.control_rng.getstate(),
+            "arrival_stream": self.demand.stream,
+            "light": (light.phase, light.time_in_phase, light.current_green_direction),
+            "vehicles": self._get_vehicle_state(),
+            "exit_metrics": self.exit_metrics,
+            "exited": [
+                (v.id, v.direction, v.distance, v.start_time, v.exit_time)
+                for v in self.exited_vehicles
+            ],
+            "recorder": self.recorder,
+        }
+
+    def set_state(self, state: Dict):
+        self.time = state["time"]
+        self.demand.rng.setstate(state["rng"])
+        self.control_rng.setstate(state["control_rng"])
+        self.demand.stream = state["arrival_stream"]
+        light = self.traffic_light
+        light.phase, light.time_in_phase, light.current_green_direction = state["light"]
+
+        self._set_vehicle_state(state["vehicles"])
+        self.exit_metrics = state["exit_metrics"]
+        self.exited_vehicles.extend(self._exited_from_row(row) for row in state["exited"])
+        self.recorder = state["recorder"]
+
+    def _get_vehicle_state(self) -> Dict:
+        # Cada carril en su orden (de adelante hacia atrás)
+        return {
+            "last_id": self.vehicle_pool.last_id,
+            "lanes": {
+                direction: [(v.id, v.distance, v.start_time, v.in_detection_zone) for v in lane]
+                for direction, lane in self.lanes.items()
+            },
+        }
+
+    def _set_vehicle_state(self, state: Dict):
+        self._init_vehicle_state()
+        self.vehicle_pool.last_id = state["last_id"]
+        restored = []
+        for direction, rows in state["lanes"].items():
+            lane = self.lanes[direction]
+            for vid, distance, start_time, in_zone in rows:
+                v = VehicleAgent(vid, direction, start_time, distance)
+                v.in_detection_zone = in_zone
+                if in_zone:
+                    self.queue_counts[direction] += 1
+                lane.append(v)
+                restored.append(v)
+        # active_vehicles va en orden de llegada, como al crearlos
+        for v in sorted(restored, key=lambda v: v.id):
+            self.active_vehicles[v.id] = v
+
+    def _exited_from_row(self, row) -> VehicleAgent:
+        vid, direction, distance, start_time, exit_time = row
+        v = VehicleAgent(vid, direction, start_time, distance)
+        v.exit_time = exit_time
+        return v
+
     # ---------- MÉTRICAS Y UTILIDADES ----------
+    def mark_vehicle_crossed(self, vehicle: VehicleAgent):
+        self.lanes[vehicle.direction].mark_crossed(vehicle)
+        self._update_detection(vehicle)
+
+    def mark_vehicle_moved(self, vehicle: VehicleAgent):
+        self.lanes[vehicle.direction].restore_order(vehicle)
+        self._update_detection(vehicle)
+
     def mark_vehicle_exited(self, vehicle: VehicleAgent):
-        if vehicle in self.vehicles:
-            self.vehicles.remove(vehicle)
+        if self.active_vehicles.pop(vehicle.id, None) is not None:
+            self.lanes[vehicle.direction].remove(vehicle)
+            if vehicle.in_detection_zone:
+                vehicle.in_detection_zone = False
+                self.queue_counts[vehicle.direction] -= 1
+        self.exit_metrics.record(vehicle.start_time, vehicle.exit_time, vehicle.direction)
         self.exited_vehicles.append(vehicle)
+        self.vehicle_pool.release(vehicle)
+
+    def _update_detection(self, vehicle: VehicleAgent):
+        cfg = self.config
+        inside = cfg.detection_zone_min < vehicle.distance <= cfg.detection_zone_max
+        if inside != vehicle.in_detection_zone:
+            vehicle.in_detection_zone = inside
+            self.queue_counts[vehicle.direction] += 1 if inside else -1
+
+    def get_queue_size(self, direction: Direction) -> int:
+        return self.queue_counts[direction]
+
+    def get_queue_sizes(self):
+        """Cola de cada acceso, en el orden de Direction."""
+        return self.queue_counts.values()
 
     def get_queue_size_ns(self) -> int:
-        return sum(
-            1
-            for v in self.vehicles
-            if v.direction in (Direction.NORTH_SOUTH, Direction.SOUTH_NORTH)
-            and 0.0 < v.distance <= 5.0   # solo antes del cruce
+        # solo antes del cruce, dentro de la zona de detección
+        return (
+            self.get_queue_size(Direction.NORTH_SOUTH)
+            + self.get_queue_size(Direction.SOUTH_NORTH)
         )
 
     def get_queue_size_ew(self) -> int:
-        return sum(
-            1
-            for v in self.vehicles
-            if v.direction in (Direction.EAST_WEST, Direction.WEST_EAST)
-            and 0.0 < v.distance <= 5.0   # solo antes del cruce
+        return (
+            self.get_queue_size(Direction.EAST_WEST)
+            + self.get_queue_size(Direction.WEST_EAST)
         )
 
     def get_summary(self) -> Dict[str, float]:
-        n_exited = len(self.exited_vehicles)
-        if n_exited > 0:
-            travel_times = [
-                v.exit_time - v.start_time
-                for v in self.exited_vehicles
-                if v.exit_time is not None
-            ]
-            avg_travel_time = sum(travel_times) / len(travel_times)
-        else:
-            avg_travel_time = float("nan")
-
+        totals = self.exit_metrics.total
         return {
             "ticks": self.time,
-            "vehicles_exited": n_exited,
-            "avg_travel_time": avg_travel_time,
-            "vehicles_remaining": len(self.vehicles),
+            "vehicles_exited": totals.count,
+            "avg_travel_time": totals.mean(),
+            **percentile_summary(totals.sketch),
+            "vehicles_remaining": self.vehicle_count(),
         }
+
+
+def load_checkpoint(path: str, **overrides) -> TrafficModel:
+    """
+    Reconstruye un modelo guardado con save_checkpoint(). `overrides`
+    cambia campos de la config que no afectan el resultado (por ejemplo
+    checkpoint_path o checkpoint_every).
+    """
+    state = read_checkpoint(path)
+    model = create_model(SimulationConfig(**{**state["config"], **overrides}))
+    model.set_state(state)
+    return model
+
+
+def create_model(config: SimulationConfig, demand: Optional[DemandSource] = None,
+                 control_rng: Optional[random.Random] = None) -> TrafficModel:
+    """Construye el modelo con el motor indicado en config.engine."""
+    if config.engine == "numpy":
+        # Import diferido: NumPy solo hace falta para este motor
+        from .vectorized import VectorizedTrafficModel
+        return VectorizedTrafficModel(config, demand, control_rng)
+    return TrafficModel(config, demand, control_rng)
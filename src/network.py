@@ -0,0 +1,303 @@
+import heapq
+import multiprocessing as mp
+from dataclasses import replace
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .agents import Direction, VehicleAgent
+from .config import SimulationConfig
+from .metrics import TravelTimeStats, percentile_summary
+from .model import TrafficModel
+from .replications import replication_seeds
+
+# Hacia qué vecino de la grilla sale cada sentido: (fila, columna).
+# NORTH_SOUTH va de la fila 0 hacia abajo; WEST_EAST de la columna 0 a la derecha.
+DOWNSTREAM_OFFSET = {
+    Direction.NORTH_SOUTH: (1, 0),
+    Direction.SOUTH_NORTH: (-1, 0),
+    Direction.EAST_WEST: (0, -1),
+    Direction.WEST_EAST: (0, 1),
+}
+
+
+class Handoff(NamedTuple):
+    """Un auto que salió de una intersección y entra a la siguiente."""
+    due: int          # tick en que llega al acceso de destino
+    source: int       # índice de la intersección de origen
+    seq: int          # orden de salida en el origen (desempate)
+    target: int
+    direction: Direction
+    trip_start: int   # tick en que entró a la red
+
+
+class NodeSpec(NamedTuple):
+    index: int
+    config: SimulationConfig
+    # Vecino aguas abajo por sentido (None = sale de la red)
+    downstream: Dict[Direction, Optional[int]]
+    # Sentidos cuyo acceso está en el borde de la red: solo ahí hay
+    # llegadas desde afuera
+    entries: Tuple[Direction, ...]
+
+
+def grid_specs(config: SimulationConfig, rows: int, cols: int) -> List[NodeSpec]:
+    """
+    Intersecciones de una grilla rows x cols, numeradas por filas. Cada una
+    tiene su propia semilla (derivada de config.seed) y la misma config.
+    """
+    seeds = replication_seeds(config.seed, rows * cols)
+    specs = []
+    for r in range(rows):
+        for c in range(cols):
+            downstream = {}
+            upstream = {}
+            for direction, (dr, dc) in DOWNSTREAM_OFFSET.items():
+                downstream[direction] = _cell(r + dr, c + dc, rows, cols)
+                upstream[direction] = _cell(r - dr, c - dc, rows, cols)
+            index = r * cols + c
+            entries = tuple(d for d in Direction if upstream[d] is None)
+            specs.append(NodeSpec(index, replace(config, seed=seeds[index]), downstream, entries))
+    return specs
+
+
+def _cell(r: int, c: int, rows: int, cols: int) -> Optional[int]:
+    if 0 <= r < rows and 0 <= c < cols:
+        return r * cols + c
+    return None
+
+
+class NetworkNode(TrafficModel):
+    """
+    Una intersección de la red. Las llegadas desde afuera se sortean como
+    en TrafficModel pero solo se aceptan en los accesos del borde; en los
+    demás entran los autos que salen de la intersección anterior.
+
+    Avanza tick a tick (sin fast-forward): las llegadas de los vecinos no
+    se conocen de antemano.
+    """
+
+    def __init__(self, spec: NodeSpec):
+        if spec.config.engine != "object":
+            raise ValueError("La red solo admite engine='object'")
+        super().__init__(spec.config)
+        self.index = spec.index
+        self.downstream = spec.downstream
+        self.entries = frozenset(spec.entries)
+        self.link_ticks = 1
+
+        # Llegadas desde otras intersecciones, ordenadas por Handoff
+        self.pending: List[Handoff] = []
+        self.outbox: List[Handoff] = []
+        self._seq = 0
+        # Tick de entrada a la red de cada auto activo
+        self.trip_start: Dict[int, int] = {}
+        # Autos que salieron de la red por esta intersección
+        self.trips = TravelTimeStats(self.config.histogram_bin_ticks, self.config.quantile_accuracy)
+
+    def step(self):
+        external = [d for d in self._draw_arrivals() if d in self.entries]
+        for direction in external:
+            self._add_vehicle(direction)
+            self.trip_start[self.vehicle_pool.last_id] = self.time
+        while self.pending and self.pending[0].due <= self.time:
+            handoff = heapq.heappop(self.pending)
+            self._add_vehicle(handoff.direction)
+            self.trip_start[self.vehicle_pool.last_id] = handoff.trip_start
+        self.traffic_light.step(self)
+        self._step_vehicles()
+        self.time += 1
+
+    def mark_vehicle_exited(self, vehicle: VehicleAgent):
+        vid, direction, exit_time = vehicle.id, vehicle.direction, vehicle.exit_time
+        super().mark_vehicle_exited(vehicle)
+        trip_start = self.trip_start.pop(vid)
+        target = self.downstream[direction]
+        if target is None:
+            self.trips.add(exit_time - trip_start)
+        else:
+            self._seq += 1
+            self.outbox.append(Handoff(
+                exit_time + self.link_ticks, self.index, self._seq, target, direction, trip_start
+            ))
+
+    def receive(self, handoff: Handoff):
+        heapq.heappush(self.pending, handoff)
+
+
+class Partition:
+    """
+    Un bloque contiguo de intersecciones que avanza junto. Los traspasos
+    internos se entregan acá; los que van a otra partición se devuelven.
+    """
+
+    def __init__(self, specs: Sequence[NodeSpec], link_ticks: int):
+        self.nodes: Dict[int, NetworkNode] = {}
+        for spec in specs:
+            node = NetworkNode(spec)
+            node.link_ticks = link_ticks
+            self.nodes[spec.index] = node
+
+    def advance(self, ticks: int, inbound: Sequence[Handoff]) -> List[Handoff]:
+        for handoff in inbound:
+            self.nodes[handoff.target].receive(handoff)
+        outbound = []
+        for _ in range(ticks):
+            for node in self.nodes.values():
+                node.step()
+            for node in self.nodes.values():
+                for handoff in node.outbox:
+                    target = self.nodes.get(handoff.target)
+                    if target is None:
+                        outbound.append(handoff)
+                    else:
+                        target.receive(handoff)
+                node.outbox.clear()
+        return outbound
+
+    def summary(self) -> Dict:
+        return {
+            index: (node.get_summary(), node.trips, len(node.pending))
+            for index, node in self.nodes.items()
+        }
+
+
+def _partition_worker(conn, specs: Sequence[NodeSpec], link_ticks: int):
+    # A nivel de módulo para que multiprocessing pueda lanzarla
+    partition = Partition(specs, link_ticks)
+    while True:
+        command, *args = conn.recv()
+        if command == "advance":
+            conn.send(partition.advance(*args))
+        elif command == "summary":
+            conn.send(partition.summary())
+        else:
+            break
+    conn.close()
+
+
+class _RemotePartition:
+    """Partición en otro proceso, con la misma API (por mensajes)."""
+
+    def __init__(self, specs: Sequence[NodeSpec], link_ticks: int):
+        self.conn, child = mp.Pipe()
+        self.process = mp.Process(target=_partition_worker, args=(child, specs, link_ticks), daemon=True)
+        self.process.start()
+        child.close()
+
+    def submit(self, ticks: int, inbound: Sequence[Handoff]):
+        self.conn.send(("advance", ticks, list(inbound)))
+
+    def result(self) -> List[Handoff]:
+        return self.conn.recv()
+
+    def summary(self) -> Dict:
+        self.conn.send(("summary",))
+        return self.conn.recv()
+
+    def close(self):
+        self.conn.send(("stop",))
+        self.process.join()
+        self.conn.close()
+
+
+class _LocalPartition(Partition):
+    def submit(self, ticks: int, inbound: Sequence[Handoff]):
+        self._outbound = self.advance(ticks, inbound)
+
+    def result(self) -> List[Handoff]:
+        return self._outbound
+
+    def close(self):
+        pass
+
+
+class NetworkModel:
+    """
+    Red de intersecciones en grilla (rows x cols; un corredor es 1 x n):
+    el auto que sale de una intersección entra, link_ticks ticks después,
+    al acceso del mismo sentido en la siguiente.
+
+    Las intersecciones se reparten en `workers` particiones contiguas, cada
+    una en su proceso (1 = todo en este proceso). Como un traspaso tarda
+    al menos link_ticks, cada partición puede avanzar link_ticks ticks sin
+    esperar a las demás; los traspasos entre particiones se intercambian al
+    final de cada tramo (con link_ticks = 1, en cada tick). El resultado no
+    depende de la cantidad de workers.
+    """
+
+    def __init__(self, config: SimulationConfig, rows: int = 1, cols: int = 1,
+                 link_ticks: int = 1, workers: int = 1):
+        if link_ticks < 1:
+            raise ValueError("link_ticks tiene que ser >= 1")
+        self.config = config
+        self.rows, self.cols = rows, cols
+        self.link_ticks = link_ticks
+        self.time = 0
+
+        specs = grid_specs(config, rows, cols)
+        workers = max(1, min(workers, len(specs)))
+        size, extra = divmod(len(specs), workers)
+        self.owner: Dict[int, int] = {}
+        self.partitions = []
+        start = 0
+        for p in range(workers):
+            block = specs[start:start + size + (p < extra)]
+            start += len(block)
+            for spec in block:
+                self.owner[spec.index] = p
+            if workers == 1:
+                self.partitions.append(_LocalPartition(block, link_ticks))
+            else:
+                self.partitions.append(_RemotePartition(block, link_ticks))
+        self._inbound: List[List[Handoff]] = [[] for _ in self.partitions]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for partition in self.partitions:
+            partition.close()
+        self.partitions = []
+
+    def step(self):
+        self.run(1)
+
+    def run(self, ticks: int):
+        end = self.time + ticks
+        while self.time < end:
+            window = min(self.link_ticks, end - self.time)
+            for partition, inbound in zip(self.partitions, self._inbound):
+                partition.submit(window, inbound)
+            self._inbound = [[] for _ in self.partitions]
+            for partition in self.partitions:
+                for handoff in partition.result():
+                    self._inbound[self.owner[handoff.target]].append(handoff)
+            self.time += window
+
+    def node_summaries(self) -> Dict[int, Dict[str, float]]:
+        """get_summary() de cada intersección (autos que la atravesaron)."""
+        return {index: summary for index, (summary, _, _) in self._collect().items()}
+
+    def get_summary(self) -> Dict[str, float]:
+        """Viajes completos por la red, de la entrada a la salida."""
+        trips = TravelTimeStats(self.config.histogram_bin_ticks, self.config.quantile_accuracy)
+        remaining = sum(len(inbound) for inbound in self._inbound)
+        for summary, node_trips, pending in self._collect().values():
+            trips.merge(node_trips)
+            remaining += summary["vehicles_remaining"] + pending
+        return {
+            "ticks": self.time,
+            "intersections": self.rows * self.cols,
+            "vehicles_exited": trips.count,
+            "avg_travel_time": trips.mean(),
+            **percentile_summary(trips.sketch),
+            "vehicles_remaining": remaining,
+        }
+
+    def _collect(self) -> Dict[int, Tuple]:
+        collected = {}
+        for partition in self.partitions:
+            collected.update(partition.summary())
+        return dict(sorted(collected.items()))
@@ -0,0 +1,172 @@
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+from .cache import config_key
+from .checkpoint import read_checkpoint, write_checkpoint
+from .config import SimulationConfig
+from .model import create_model
+from .runner import ModelSnapshot
+
+
+class ExportStats(NamedTuple):
+    frames: int
+    record_s: float   # simulación + traza
+    render_s: float   # dibujo + escritura de imágenes
+    workers: int
+
+
+# ---------- TRAZA ----------
+
+def record_trace(config: SimulationConfig, stride: int = 1,
+                 ticks: Optional[int] = None) -> List[ModelSnapshot]:
+    """
+    Corre la simulación y guarda el estado a dibujar cada `stride` ticks
+    (desde el tick 0 hasta `ticks`, por defecto config.ticks).
+    """
+    ticks = config.ticks if ticks is None else ticks
+    model = create_model(config)
+    frames = [ModelSnapshot(model)]
+    while model.time + stride <= ticks:
+        model.run(stride)
+        frames.append(ModelSnapshot(model))
+    return frames
+
+
+def trace_key(config: SimulationConfig, stride: int = 1,
+              ticks: Optional[int] = None) -> Dict:
+    """Lo que determina una traza; se guarda con ella para no reusar una vieja."""
+    return {
+        "config": config_key(config),
+        "stride": stride,
+        "ticks": config.ticks if ticks is None else ticks,
+    }
+
+
+def save_trace(path: str, frames: List[ModelSnapshot], key: Optional[Dict] = None):
+    write_checkpoint(path, {"key": key, "frames": frames})
+
+
+def load_trace(path: str) -> List[ModelSnapshot]:
+    return read_checkpoint(path)["frames"]
+
+
+def _cached_trace(path: str, key: Dict) -> Optional[List[ModelSnapshot]]:
+    # None si no hay traza en path, si es de otra versión o si se grabó con
+    # otra config, stride o ticks
+    if not os.path.isfile(path):
+        return None
+    try:
+        trace = read_checkpoint(path)
+    except ValueError:
+        return None
+    return trace["frames"] if trace.get("key") == key else None
+
+
+# ---------- DIBUJO SIN PANTALLA ----------
+
+def _init_headless_display():
+    # Sin pantalla: SDL dibuja en memoria. Tiene que estar antes de
+    # inicializar el display (salvo que el usuario elija otro driver).
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    pygame.display.init()
+    pygame.font.init()
+
+
+def frame_path(out_dir: str, index: int, image_format: str) -> str:
+    return os.path.join(out_dir, f"frame_{index:06d}.{image_format}")
+
+
+def render_range(trace_path: str, start: int, end: int, out_dir: str,
+                 stride: int, image_format: str = "png") -> int:
+    """Dibuja los frames [start, end) de la traza como imágenes en out_dir."""
+    _init_headless_display()
+    import pygame
+    from .visualization import TrafficVisualizer
+
+    frames = load_trace(trace_path)[start:end]
+    if not frames:
+        return 0
+    config = frames[0].config
+    ticks_per_day = int(24 * 3600 / config.seconds_per_tick)
+
+    visualizer = TrafficVisualizer(frames[0])
+    visualizer.sim_speed = stride
+    visualizer.show_frame_time = False
+    for index, frame in enumerate(frames, start):
+        visualizer.model = frame
+        visualizer.current_day = frame.time // ticks_per_day + 1
+        visualizer.render()
+        pygame.image.save(visualizer.screen, frame_path(out_dir, index, image_format))
+    pygame.quit()
+    return len(frames)
+
+
+def _render_job(job) -> int:
+    # A nivel de módulo para que ProcessPoolExecutor pueda serializarla
+    return render_range(*job)
+
+
+def export_frames(
+    config: SimulationConfig,
+    out_dir: str,
+    stride: int = 1,
+    ticks: Optional[int] = None,
+    workers: Optional[int] = None,
+    image_format: str = "png",
+    trace_path: Optional[str] = None,
+) -> ExportStats:
+    """
+    Simula `config` y escribe un frame cada `stride` ticks en out_dir
+    (frame_000000.png, ...), sin ventana. Primero se graba la traza (en
+    trace_path, por defecto out_dir/trace.bin) y luego `workers` procesos
+    dibujan tramos contiguos de frames en paralelo (None = todos los
+    núcleos, 1 = en este proceso).
+
+    Si trace_path ya tiene la traza de esta misma config, stride y ticks,
+    se dibuja esa sin volver a simular; si no, se graba de nuevo.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    trace_path = trace_path or os.path.join(out_dir, "trace.bin")
+
+    t0 = time.perf_counter()
+    key = trace_key(config, stride, ticks)
+    frames = _cached_trace(trace_path, key)
+    if frames is None:
+        frames = record_trace(config, stride, ticks)
+        save_trace(trace_path, frames, key)
+    n = len(frames)
+    del frames  # los procesos leen la traza del archivo
+    record_s = time.perf_counter() - t0
+
+    workers = max(1, min(workers or os.cpu_count() or 1, n))
+    size = -(-n // workers)
+    jobs = [
+        (trace_path, start, min(start + size, n), out_dir, stride, image_format)
+        for start in range(0, n, size)
+    ]
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        rendered = sum(_render_job(job) for job in jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = sum(pool.map(_render_job, jobs))
+    return ExportStats(rendered, record_s, time.perf_counter() - t0, workers)
+
+
+def encode_video(out_dir: str, output: str, fps: int = 30, image_format: str = "png"):
+    """Une los frames de out_dir en un video con ffmpeg (tiene que estar instalado)."""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("No se encontró ffmpeg: los frames quedan en " + out_dir)
+    subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-framerate", str(fps),
+         "-i", os.path.join(out_dir, f"frame_%06d.{image_format}"),
+         "-pix_fmt", "yuv420p", output],
+        check=True,
+    )
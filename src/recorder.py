@@ -0,0 +1,138 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from .agents import Direction
+
+# Columnas y tipos. Las de cola son por acceso (zona de detección);
+# phase es TrafficLightPhase.value. arrivals y exits suman todo el
+# intervalo entre muestras, el resto es el valor en el tick de la muestra.
+COLUMNS = (
+    ("tick", np.int64),
+    *((f"queue_{d.name.lower()}", np.int32) for d in Direction),
+    ("phase", np.int8),
+    ("time_in_phase", np.int32),
+    ("vehicles", np.int32),
+    ("arrivals", np.int32),
+    ("exits", np.int32),
+)
+
+EXITS = len(COLUMNS) - 1
+
+# Filas que se juntan en el buffer antes de volcarlas a los arrays
+FLUSH_ROWS = 4096
+
+
+class TimeSeriesRecorder:
+    """
+    Serie de tiempo por tick de un TrafficModel, guardada por columnas en
+    arrays NumPy.
+
+    - every: una muestra cada `every` ticks (diezmado). Llegadas y salidas
+      se acumulan entre muestras, así que sus totales no se pierden.
+    - capacity: None = guardar todo (los arrays crecen por bloques);
+      N = buffer circular con las últimas N muestras (memoria fija).
+
+    Las muestras se juntan fila tras fila en una lista plana de enteros
+    (un solo extend por tick) que se vuelca a los arrays de a FLUSH_ROWS
+    con un np.fromiter por bloque.
+    """
+
+    def __init__(self, every: int = 1, capacity: Optional[int] = None):
+        if every < 1:
+            raise ValueError("every tiene que ser >= 1")
+        self.every = every
+        self.capacity = capacity
+        size = capacity if capacity is not None else FLUSH_ROWS
+        self._columns = {name: np.zeros(size, dtype=dtype) for name, dtype in COLUMNS}
+        self._size = 0     # filas válidas en los arrays
+        self._written = 0  # filas volcadas en total (buffer circular: posición)
+        self._rows = []
+
+        self._arrivals = 0
+        self._exits_seen = 0
+
+    def record(self, model, arrivals: int):
+        """Llamado por el modelo al final de cada tick."""
+        self._arrivals += arrivals
+        if model.time % self.every:
+            return
+        light = model.traffic_light
+        a, b, c, d = model.get_queue_sizes()
+        rows = self._rows
+        rows.extend((
+            model.time, a, b, c, d,
+            light.phase._value_,  # = .value, sin el descriptor de Enum
+            light.time_in_phase,
+            model.vehicle_count(),
+            self._arrivals,
+            # Total acumulado; se pasa a diferencias al volcar
+            model.exit_metrics.total.count,
+        ))
+        self._arrivals = 0
+        if len(rows) >= FLUSH_ROWS * len(COLUMNS):
+            self._flush()
+
+    def __len__(self) -> int:
+        n = self._size + len(self._rows) // len(COLUMNS)
+        return n if self.capacity is None else min(n, self.capacity)
+
+    # ---------- ALMACENAMIENTO ----------
+
+    def _flush(self):
+        rows = self._rows
+        if not rows:
+            return
+        n = len(rows) // len(COLUMNS)
+        flat = np.fromiter(rows, dtype=np.int64, count=len(rows))
+        block = list(flat.reshape(n, len(COLUMNS)).T)
+        exited = block[EXITS]
+        block[EXITS] = np.diff(exited, prepend=self._exits_seen)
+        self._exits_seen = int(exited[-1])
+
+        if self.capacity is None:
+            self._grow(self._size + n)
+            for (name, _), values in zip(COLUMNS, block):
+                self._columns[name][self._size:self._size + n] = values
+            self._size += n
+        else:
+            # Solo importan las últimas `capacity` filas del bloque
+            keep = min(n, self.capacity)
+            positions = (self._written + n - keep + np.arange(keep)) % self.capacity
+            for (name, _), values in zip(COLUMNS, block):
+                self._columns[name][positions] = values[n - keep:]
+            self._size = min(self._size + n, self.capacity)
+        self._written += n
+        self._rows = []
+
+    def _grow(self, needed: int):
+        size = len(self._columns["tick"])
+        if needed <= size:
+            return
+        while size < needed:
+            size *= 2
+        for name, column in self._columns.items():
+            grown = np.zeros(size, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    # ---------- EXPORTACIÓN ----------
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Copia de las columnas, en orden de tick."""
+        self._flush()
+        if self.capacity is None or self._written <= self.capacity:
+            return {name: column[:self._size].copy() for name, column in self._columns.items()}
+        start = self._written % self.capacity
+        return {name: np.roll(column, -start) for name, column in self._columns.items()}
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.columns())
+
+    def save(self, path: str):
+        """Exporta a .npz (NumPy) o .parquet (requiere pyarrow o fastparquet)."""
+        if path.lower().endswith(".parquet"):
+            self.to_frame().to_parquet(path, index=False)
+        else:
+            np.savez_compressed(path, **self.columns())
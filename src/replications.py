@@ -0,0 +1,174 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from statistics import NormalDist, mean, stdev
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .metrics import PERCENTILES, QuantileSketch
+from .model import create_model
+from .simulation import full_day_config
+
+# Métricas de get_summary() que se agregan entre réplicas
+METRICS = (
+    "vehicles_exited",
+    "avg_travel_time",
+    *(f"p{p}_travel_time" for p in PERCENTILES),
+    "vehicles_remaining",
+)
+
+
+class MetricSummary(NamedTuple):
+    """Media e intervalo de confianza (t de Student) de una métrica."""
+    mean: float
+    ci_low: float
+    ci_high: float
+    std: float
+    n: int
+
+
+class ReplicationReport(NamedTuple):
+    control_mode: str
+    seeds: List[int]
+    summaries: List[Dict[str, float]]
+    stats: Dict[str, MetricSummary]
+    elapsed: float  # segundos de reloj de pared
+    workers: int
+    # Tiempos de viaje de todas las réplicas juntas (sketches combinados)
+    travel_times: QuantileSketch
+
+
+def replication_seeds(base_seed: int, n: int) -> List[int]:
+    """Semillas independientes derivadas de base_seed con SeedSequence."""
+    children = np.random.SeedSequence(base_seed).spawn(n)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+# ---------- ESTADÍSTICA ----------
+
+def _t_cdf(x: float, df: int) -> float:
+    # P(T <= x) para x >= 0, integrando la densidad con Simpson
+    log_c = math.lgamma((df + 1) / 2) - math.lgamma(df / 2) - 0.5 * math.log(df * math.pi)
+    c = math.exp(log_c)
+
+    def pdf(t):
+        return c * (1 + t * t / df) ** (-(df + 1) / 2)
+
+    n = 400
+    h = x / n
+    total = pdf(0.0) + pdf(x)
+    total += 4 * sum(pdf((2 * k - 1) * h) for k in range(1, n // 2 + 1))
+    total += 2 * sum(pdf(2 * k * h) for k in range(1, n // 2))
+    return 0.5 + total * h / 3
+
+
+def t_quantile(p: float, df: int) -> float:
+    """Cuantil p (> 0.5) de la t de Student con df grados de libertad."""
+    if df > 200:
+        return NormalDist().inv_cdf(p)
+    lo, hi = 0.0, 1000.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if _t_cdf(mid, df) < p:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def summarize_metric(values: List[float], confidence: float = 0.95) -> MetricSummary:
+    values = [v for v in values if not math.isnan(v)]
+    n = len(values)
+    if n == 0:
+        nan = float("nan")
+        return MetricSummary(nan, nan, nan, nan, 0)
+    m = mean(values)
+    if n == 1:
+        return MetricSummary(m, m, m, 0.0, 1)
+    s = stdev(values)
+    half = t_quantile(0.5 + confidence / 2, n - 1) * s / math.sqrt(n)
+    return MetricSummary(m, m - half, m + half, s, n)
+
+
+# ---------- RÉPLICAS ----------
+
+def _run_seed(seed: int, **kwargs) -> Tuple[Dict[str, float], QuantileSketch]:
+    # A nivel de módulo para que ProcessPoolExecutor pueda serializarla.
+    # Además del resumen devuelve el sketch de tiempos de viaje, para
+    # combinar los de todas las réplicas.
+    config = full_day_config(seed=seed, **kwargs)
+    model = create_model(config)
+    model.run(config.ticks)
+    return model.get_summary(), model.exit_metrics.total.sketch
+
+
+def run_replications(
+    control_mode: str = "fixed",
+    replications: int = 30,
+    base_seed: int = 42,
+    seconds_per_tick: int = 10,
+    engine: str = "object",
+    workers: Optional[int] = None,
+    confidence: float = 0.95,
+    verbose: bool = True,
+) -> ReplicationReport:
+    """
+    Corre `replications` días completos con semillas independientes,
+    repartidos en `workers` procesos (None = todos los núcleos, 1 = en
+    este proceso), y agrega los resúmenes en media e IC. Los percentiles
+    del conjunto salen de combinar los sketches de cada réplica.
+    """
+    if replications < 1:
+        raise ValueError("replications tiene que ser >= 1")
+    seeds = replication_seeds(base_seed, replications)
+    workers = min(workers or os.cpu_count() or 1, replications)
+    job = partial(
+        _run_seed, control_mode=control_mode,
+        seconds_per_tick=seconds_per_tick, engine=engine,
+    )
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [job(seed) for seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(job, seeds))
+    elapsed = time.perf_counter() - t0
+
+    summaries = [summary for summary, _ in results]
+    travel_times = QuantileSketch(results[0][1].relative_accuracy)
+    for _, sketch in results:
+        travel_times.merge(sketch)
+
+    stats = {
+        name: summarize_metric([s[name] for s in summaries], confidence)
+        for name in METRICS
+    }
+    report = ReplicationReport(control_mode, seeds, summaries, stats, elapsed, workers, travel_times)
+    if verbose:
+        print_report(report, confidence)
+    return report
+
+
+def compare_control_modes(replications: int = 30, base_seed: int = 42,
+                          **kwargs) -> Dict[str, ReplicationReport]:
+    """fixed vs. adaptive con las mismas semillas en ambos modos."""
+    return {
+        mode: run_replications(mode, replications, base_seed, **kwargs)
+        for mode in ("fixed", "adaptive")
+    }
+
+
+def print_report(report: ReplicationReport, confidence: float = 0.95):
+    print(f"\n=== Réplicas | Modo: {report.control_mode} | "
+          f"n={len(report.seeds)} | procesos={report.workers} | "
+          f"{report.elapsed:.1f} s ===")
+    for name, st in report.stats.items():
+        print(f"{name:<20} media {st.mean:10.2f}   "
+              f"IC {confidence:.0%} [{st.ci_low:.2f}, {st.ci_high:.2f}]")
+    pooled = report.travel_times.percentiles()
+    print("Tiempo de viaje (todas las réplicas): "
+          + "  ".join(f"P{p} {value:.1f}" for p, value in pooled.items()))
@@ -0,0 +1,172 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from .agents import TrafficLightPhase, VehicleSnapshot
+from .model import TrafficModel
+
+# Fracción del tiempo de un frame que puede durar un bloque de ticks sin
+# publicar un estado nuevo (con velocidad máxima)
+CHUNK_BUDGET = 0.5
+# Tope de ticks por bloque a velocidad fija (si el hilo se atrasa)
+MAX_CHUNK_TICKS = 1000
+
+
+class LightSnapshot:
+    __slots__ = ("phase", "time_in_phase", "current_green_direction")
+
+    def __init__(self, phase: TrafficLightPhase, time_in_phase: int, current_green_direction: str):
+        self.phase = phase
+        self.time_in_phase = time_in_phase
+        self.current_green_direction = current_green_direction
+
+
+class ModelSnapshot:
+    """
+    Copia de solo lectura de lo que TrafficVisualizer lee de un modelo
+    (tick, semáforo, vehículos, reloj simulado). Se arma en el hilo de la
+    simulación, así que siempre es un estado consistente de un tick.
+    """
+
+    def __init__(self, model: TrafficModel):
+        self.config = model.config
+        self.time = model.time
+        light = model.traffic_light
+        self.traffic_light = LightSnapshot(light.phase, light.time_in_phase, light.current_green_direction)
+        self.vehicles = [
+            VehicleSnapshot(v.id, v.direction, v.distance, v.start_time) for v in model.vehicles
+        ]
+
+    # Solo dependen de time y config
+    get_simulated_clock = TrafficModel.get_simulated_clock
+    get_time_of_day_segment_label = TrafficModel.get_time_of_day_segment_label
+
+
+class SimulationRunner:
+    """
+    Corre la simulación en un hilo aparte, desacoplada del dibujo.
+
+    `step(log)` avanza un tick (y hace lo que haya que hacer al cerrar un
+    día); los ticks pedidos con request_step() llegan con log=False, igual
+    que avanzar de a uno en el bucle de pygame.
+    `snapshot` arma el estado a mostrar. El hilo publica un estado nuevo
+    después de cada bloque de ticks si el renderer ya tomó el anterior, así
+    que copiar vehículos cuesta a lo sumo una vez por frame.
+
+    Velocidad (set_speed): 0 = pausa, N = N ticks por frame a `fps` frames
+    por segundo (el ritmo lo lleva el hilo, un frame lento no frena la
+    simulación), None = lo más rápido posible. En ese caso el tamaño del
+    bloque se ajusta para que dure a lo sumo CHUNK_BUDGET de un frame.
+    """
+
+    def __init__(self, step: Callable[[bool], None], snapshot: Callable[[], object], fps: int = 30):
+        self._step = step
+        self._snapshot = snapshot
+        self.fps = fps
+        self.frame_budget = 1.0 / fps
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._speed: Optional[int] = 1
+        self._pending_steps = 0
+        self._latest = snapshot()
+        self._want_snapshot = False
+        self.error: Optional[BaseException] = None
+
+        # Estadísticas para el HUD
+        self.ticks = 0
+        self.ticks_per_second = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el hilo al terminar el bloque en curso."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+
+    def set_speed(self, speed: Optional[int]):
+        with self._lock:
+            self._speed = speed
+        self._wake.set()
+
+    def request_step(self):
+        """Un tick más (para avanzar de a uno en pausa)."""
+        with self._lock:
+            self._pending_steps += 1
+        self._wake.set()
+
+    def latest(self):
+        """El último estado publicado; pide uno nuevo para el próximo frame."""
+        if self.error is not None:
+            raise RuntimeError("La simulación se detuvo por un error") from self.error
+        self._want_snapshot = True
+        return self._latest
+
+    # ---------- HILO DE SIMULACIÓN ----------
+
+    def _run(self):
+        try:
+            self._loop()
+        except BaseException as exc:  # se re-lanza en latest()
+            self.error = exc
+
+    def _loop(self):
+        per_tick = 1e-4  # media móvil del costo de un tick (s)
+        paced_start = time.perf_counter()
+        paced_done = 0
+        speed = self._speed
+        rate_start = paced_start
+        rate_ticks = 0
+
+        while not self._stop.is_set():
+            with self._lock:
+                if self._speed != speed:
+                    speed = self._speed
+                    paced_start, paced_done = time.perf_counter(), 0
+                steps, self._pending_steps = self._pending_steps, 0
+
+            if speed == 0:
+                n = steps
+            elif speed is None:
+                n = max(1, int(self.frame_budget * CHUNK_BUDGET / per_tick))
+            else:
+                due = int((time.perf_counter() - paced_start) * speed * self.fps)
+                n = min(due - paced_done, MAX_CHUNK_TICKS)
+                if n <= 0:
+                    # Adelantados: esperar al próximo tick (o a un cambio)
+                    self._wake.wait(1.0 / (speed * self.fps))
+                    self._wake.clear()
+                    continue
+                paced_done += n
+
+            if n == 0:
+                self.ticks_per_second = 0.0
+                self._publish()
+                self._wake.wait(self.frame_budget)
+                self._wake.clear()
+                continue
+
+            log = speed != 0  # en pausa, solo ticks pedidos con request_step()
+            t0 = time.perf_counter()
+            for _ in range(n):
+                self._step(log)
+            elapsed = time.perf_counter() - t0
+            per_tick = 0.8 * per_tick + 0.2 * elapsed / n
+            self.ticks += n
+            self._publish()
+
+            rate_ticks += n
+            now = time.perf_counter()
+            if now - rate_start >= 1.0:
+                self.ticks_per_second = rate_ticks / (now - rate_start)
+                rate_start, rate_ticks = now, 0
+
+    def _publish(self):
+        if self._want_snapshot:
+            self._want_snapshot = False
+            self._latest = self._snapshot()
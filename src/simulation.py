@@ -1,10 +1,27 @@
 from statistics import mean
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+from .cache import ResultCache
 from .config import SimulationConfig
-from .model import TrafficModel
+from .model import create_model
 
 
+def run_config(config: SimulationConfig, cache: Optional[ResultCache] = None) -> Dict[str, float]:
+    """Corre config.ticks ticks y devuelve el resumen; con caché, un acierto no simula."""
+    if cache is not None:
+        key = cache.key(config)
+        summary = cache.get(key)
+        if summary is not None:
+            return summary
+
+    model = create_model(config)
+    model.run(config.ticks)
+    summary = model.get_summary()
+
+    if cache is not None:
+        cache.put(key, summary)
+    return summary
+
 
 def run_simulation(
     control_mode: str = "fixed",
@@ -13,6 +30,8 @@ def run_simulation(
     ticks: int = 600,
     seed: int = 42,
     verbose: bool = True,
+    engine: str = "object",
+    cache: Optional[ResultCache] = None,
 ) -> Dict[str, float]:
 
     config = SimulationConfig(
@@ -22,13 +41,9 @@ def run_simulation(
         ticks=ticks,
         seed=seed,
         use_time_of_day=False,  # aquí no usamos hora del día
+        engine=engine,
     )
-    model = TrafficModel(config)
-
-    for _ in range(config.ticks):
-        model.step()
-
-    summary = model.get_summary()
+    summary = run_config(config, cache)
     if verbose:
         print(f"\n=== Modo de control: {control_mode} ===")
         print(f"Ticks simulados:         {summary['ticks']}")
@@ -38,34 +53,43 @@ def run_simulation(
     return summary
 
 
-def run_full_day(
+def full_day_config(
     control_mode: str = "fixed",
     seconds_per_tick: int = 10,
     seed: int = 42,
-    verbose: bool = True,
-) -> Dict[str, float]:
-
+    engine: str = "object",
+) -> SimulationConfig:
     # 24 horas * 3600 s / seconds_per_tick
     ticks_per_day = int(24 * 3600 / seconds_per_tick)
 
-    config = SimulationConfig(
+    return SimulationConfig(
         control_mode=control_mode,
         ticks=ticks_per_day,
         seed=seed,
         seconds_per_tick=seconds_per_tick,
         use_time_of_day=True,  # clave: usar hora del día
+        engine=engine,
     )
-    model = TrafficModel(config)
 
-    for _ in range(ticks_per_day):
-        model.step()
 
-    summary = model.get_summary()
+def run_full_day(
+    control_mode: str = "fixed",
+    seconds_per_tick: int = 10,
+    seed: int = 42,
+    verbose: bool = True,
+    engine: str = "object",
+    cache: Optional[ResultCache] = None,
+) -> Dict[str, float]:
+
+    config = full_day_config(control_mode, seconds_per_tick, seed, engine)
+    summary = run_config(config, cache)
     if verbose:
         print(f"\n=== Simulación de día completo | Modo: {control_mode} ===")
         print(f"Ticks simulados:         {summary['ticks']}")
         print(f"Vehículos que cruzaron:  {summary['vehicles_exited']}")
         print(f"Tiempo medio de viaje:   {summary['avg_travel_time']:.2f}")
+        print(f"Percentiles P50/P95/P99: {summary['p50_travel_time']:.1f} / "
+              f"{summary['p95_travel_time']:.1f} / {summary['p99_travel_time']:.1f}")
         print(f"Vehículos restantes:     {summary['vehicles_remaining']}")
 
     return summary
@@ -0,0 +1,207 @@
+import csv
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import fields
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+import pandas as pd
+
+from .config import SimulationConfig
+from .model import create_model
+
+CONFIG_FIELDS = {f.name for f in fields(SimulationConfig)}
+
+
+class SweepStats(NamedTuple):
+    total: int        # puntos x semillas
+    skipped: int      # ya estaban en la salida (reanudación)
+    completed: int    # corridos en esta llamada
+    elapsed: float    # segundos de reloj de pared
+    points_per_s: float
+    ticks_per_s: float
+
+
+def expand_grid(grid: Dict[str, Sequence]) -> List[Dict]:
+    """Producto cartesiano: {"green_min": [10, 15], "yellow_time": [3]} -> 2 puntos."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def point_id(base: Dict, overrides: Dict, seed: int) -> str:
+    """
+    Id estable de un punto: no depende del orden de las claves ni del de la
+    grilla. Incluye `base`, así que reanudar con otra base no reusa filas.
+    """
+    key = json.dumps({"base": base, "overrides": overrides, "seed": seed},
+                     sort_keys=True, default=str)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+# ---------- EJECUCIÓN DE UN PUNTO ----------
+
+def run_point(base: Dict, overrides: Dict, seed: int,
+              params: Sequence[str] = ()) -> Dict:
+    """
+    Corre un punto y devuelve su fila: id, semilla, el valor efectivo de
+    cada parámetro de `params` (y de los overrides) y el resumen.
+    """
+    config = SimulationConfig(**{**base, **overrides, "seed": seed})
+    model = create_model(config)
+    t0 = time.perf_counter()
+    model.run(config.ticks)
+    row = {"point_id": point_id(base, overrides, seed), "seed": seed}
+    for name in list(params) + [n for n in overrides if n not in params]:
+        row[name] = getattr(config, name)
+    row.update(model.get_summary())
+    row["elapsed_s"] = time.perf_counter() - t0
+    return row
+
+
+def _run_job(job) -> Dict:
+    # A nivel de módulo para que ProcessPoolExecutor pueda serializarla
+    return run_point(*job)
+
+
+# ---------- SALIDA INCREMENTAL ----------
+
+class _TableWriter:
+    """
+    Agrega filas a la tabla de salida a medida que llegan. CSV se escribe
+    fila a fila; Parquet no admite append, así que las filas van a un CSV
+    parcial al lado (<salida>.partial.csv) que se vuelca al terminar.
+
+    Al reanudar, las filas nuevas se escriben en el orden de columnas de la
+    salida existente; si las columnas no son las mismas, ValueError.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = path.lower().endswith(".parquet")
+        self.stream_path = path + ".partial.csv" if self.parquet else path
+        self.columns = None  # orden de columnas de la salida (al primer append)
+
+    def done_ids(self) -> Set[str]:
+        done = set()
+        for frame in self._existing():
+            done.update(frame["point_id"].astype(str))
+        return done
+
+    def append(self, row: Dict):
+        if self.columns is None:
+            self.columns = self._existing_columns() or list(row)
+        if set(row) != set(self.columns):
+            missing = [c for c in self.columns if c not in row]
+            extra = [c for c in row if c not in self.columns]
+            raise ValueError(
+                f"Las columnas no coinciden con las de {self.path}: "
+                f"faltan {missing}, sobran {extra}"
+            )
+        header = not os.path.isfile(self.stream_path) or os.path.getsize(self.stream_path) == 0
+        pd.DataFrame([row], columns=self.columns).to_csv(
+            self.stream_path, mode="a", header=header, index=False
+        )
+
+    def finish(self):
+        if not self.parquet or not os.path.isfile(self.stream_path):
+            return
+        table = pd.concat(self._existing(), ignore_index=True)
+        table.to_parquet(self.path, index=False)  # requiere pyarrow o fastparquet
+        os.remove(self.stream_path)
+
+    def _existing_columns(self) -> Optional[List[str]]:
+        if os.path.isfile(self.stream_path) and os.path.getsize(self.stream_path) > 0:
+            with open(self.stream_path, newline="", encoding="utf-8") as f:
+                return next(csv.reader(f))
+        if self.parquet and os.path.isfile(self.path):
+            return list(pd.read_parquet(self.path).columns)
+        return None
+
+    def _existing(self) -> List[pd.DataFrame]:
+        frames = []
+        if self.parquet and os.path.isfile(self.path):
+            frames.append(pd.read_parquet(self.path))
+        if os.path.isfile(self.stream_path) and os.path.getsize(self.stream_path) > 0:
+            frames.append(pd.read_csv(self.stream_path, dtype={"point_id": str}))
+        return frames
+
+
+def print_progress(done: int, total: int, rate: float, row: Dict):
+    # rate: corridas por segundo en esta llamada (sin contar las reanudadas)
+    eta = (total - done) / rate if rate > 0 else float("nan")
+    print(f"[{done}/{total}] {rate:.2f} pts/s, ETA {eta:.0f} s | "
+          f"avg_travel_time={row['avg_travel_time']:.2f}")
+
+
+# ---------- BARRIDO ----------
+
+def run_sweep(
+    points: Iterable[Dict],
+    output: str,
+    base: Optional[Dict] = None,
+    seeds: Sequence[int] = (42,),
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int, float, Dict], None]] = print_progress,
+) -> SweepStats:
+    """
+    Corre cada punto (overrides de SimulationConfig sobre `base`) con cada
+    semilla, en `workers` procesos (None = todos los núcleos, 1 = en este
+    proceso), y agrega una fila por corrida a `output` (.csv o .parquet)
+    apenas termina. Si `output` ya tiene filas de una corrida anterior,
+    esos puntos no se vuelven a correr.
+    """
+    base = dict(base or {})
+    points = [dict(p) for p in points]
+    for overrides in [base] + points:
+        unknown = set(overrides) - CONFIG_FIELDS
+        if unknown:
+            raise ValueError(f"Campos desconocidos de SimulationConfig: {sorted(unknown)}")
+
+    # Todas las filas llevan las mismas columnas aunque los puntos no
+    # sobrescriban los mismos campos
+    params = list(dict.fromkeys(name for p in points for name in p))
+
+    writer = _TableWriter(output)
+    done = writer.done_ids()
+    jobs = [
+        (base, overrides, seed, params)
+        for overrides in points
+        for seed in seeds
+        if point_id(base, overrides, seed) not in done
+    ]
+    total = len(points) * len(seeds)
+    skipped = total - len(jobs)
+
+    t0 = time.perf_counter()
+    ticks = 0
+    finished = skipped
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+
+    def record(row: Dict):
+        nonlocal ticks, finished
+        writer.append(row)
+        ticks += row["ticks"]
+        finished += 1
+        if progress is not None:
+            elapsed = time.perf_counter() - t0
+            progress(finished, total, (finished - skipped) / elapsed, row)
+
+    if workers == 1:
+        for job in jobs:
+            record(_run_job(job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for future in as_completed([pool.submit(_run_job, job) for job in jobs]):
+                record(future.result())
+    writer.finish()
+
+    elapsed = time.perf_counter() - t0
+    completed = len(jobs)
+    return SweepStats(
+        total, skipped, completed, elapsed,
+        completed / elapsed if elapsed > 0 else 0.0,
+        ticks / elapsed if elapsed > 0 else 0.0,
+    )
@@ -0,0 +1,316 @@
+import math
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .agents import Direction, VehicleSnapshot
+from .model import TrafficModel
+
+# Igual que math.isclose(distance, 0.0, abs_tol=1e-6) en VehicleAgent.step
+STOP_LINE_TOL = 1e-6
+
+# Carriles con hasta tantos autos se actualizan con listas de Python: con
+# colas cortas, el costo fijo de cada llamada a NumPy supera al del bucle
+# (ver benchmarks/engine_equivalence.py)
+SMALL_LANE_MAX = 16
+
+
+def follow_exact(d: np.ndarray, desired: np.ndarray, leader: Optional[float],
+                 gap: float) -> np.ndarray:
+    """Recurrencia de seguimiento auto por auto, como VehicleAgent.step."""
+    new = _follow_list(d.tolist(), desired.tolist(), leader, gap)
+    return np.array(new, dtype=np.float64)
+
+
+def _follow_list(new: List[float], desired: List[float], leader: Optional[float],
+                 gap: float) -> List[float]:
+    # follow_exact sobre listas; `new` se reemplaza en su lugar
+    for i, di in enumerate(new):
+        # Líder: el de mayor distancia ya actualizada estrictamente menor
+        j = i - 1
+        while j >= 0 and new[j] >= di:
+            j -= 1
+        lead = new[j] if j >= 0 else None
+        if leader is not None and leader < di and (lead is None or leader > lead):
+            lead = leader
+        min_allowed = 0.0 if lead is None else lead + gap
+        new[i] = max(max(desired[i], min_allowed), 0.0)
+    return new
+
+
+class LaneArrays:
+    """
+    Estado de un carril como arrays (struct-of-arrays), de adelante hacia
+    atrás con el mismo orden (distance, id) que LaneQueue: primero los que
+    ya cruzaron (distance < 0) y luego los que se acercan (distance >= 0).
+
+    Los vehículos activos ocupan [head, head + size); las salidas solo
+    ocurren por delante y las llegadas casi siempre por detrás, así que
+    basta con mover `head` y compactar de vez en cuando.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.distance = np.zeros(capacity, dtype=np.float64)
+        self.start_time = np.zeros(capacity, dtype=np.int64)
+        self.vid = np.zeros(capacity, dtype=np.int64)
+        self.head = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def active(self) -> slice:
+        return slice(self.head, self.head + self.size)
+
+    def insert(self, vid: int, start_time: int, distance: float):
+        """Inserta respetando el orden (distance, id): va detrás de los <= distance."""
+        if self.head + self.size == len(self.distance):
+            self._make_room()
+        d = self.distance[self.active()]
+        pos = self.head + int(np.searchsorted(d, distance, side="right"))
+        end = self.head + self.size
+        if pos < end:
+            # La cola se extiende más allá del punto de llegada (raro)
+            for arr in (self.distance, self.start_time, self.vid):
+                arr[pos + 1:end + 1] = arr[pos:end]
+        self.distance[pos] = distance
+        self.start_time[pos] = start_time
+        self.vid[pos] = vid
+        self.size += 1
+
+    def pop_front(self, n: int):
+        self.head += n
+        self.size -= n
+        if self.size == 0:
+            self.head = 0
+
+    def _make_room(self):
+        capacity = len(self.distance)
+        if self.size * 2 > capacity:
+            capacity *= 2
+        for name in ("distance", "start_time", "vid"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[self.head:self.head + self.size]
+            setattr(self, name, new)
+        self.head = 0
+
+
+class VectorizedTrafficModel(TrafficModel):
+    """
+    Motor alternativo con la misma API que TrafficModel pero sin un
+    VehicleAgent por auto: el estado de cada carril vive en arrays NumPy y
+    la lógica de VehicleAgent.step se aplica por lotes.
+
+    Llegadas y semáforo son los del modelo base (mismo RNG, mismo orden de
+    llamadas), así que para una semilla dada reproduce al motor de objetos,
+    que sigue siendo la referencia.
+
+    Los carriles con pocos autos (<= SMALL_LANE_MAX) se actualizan con
+    listas de Python en lugar de operaciones NumPy; los lotes solo ganan
+    con colas largas.
+    """
+
+    def _init_vehicle_state(self):
+        self.lanes: Dict[Direction, LaneArrays] = {d: LaneArrays() for d in Direction}
+        self._next_id = 0
+        self._init_metrics()
+
+    # ---------- VEHÍCULOS ----------
+
+    @property
+    def vehicles(self) -> List[VehicleSnapshot]:
+        snapshot = []
+        for direction, lane in self.lanes.items():
+            sl = lane.active()
+            for vid, d, t0 in zip(lane.vid[sl], lane.distance[sl], lane.start_time[sl]):
+                snapshot.append(VehicleSnapshot(int(vid), direction, float(d), int(t0)))
+        return snapshot
+
+    def is_empty(self) -> bool:
+        return not any(lane.size for lane in self.lanes.values())
+
+    def vehicle_count(self) -> int:
+        return sum(lane.size for lane in self.lanes.values())
+
+    def _quiet_ticks(self) -> float:
+        # Solo se salta con la intersección vacía
+        return math.inf if self.is_empty() else 0
+
+    def _add_vehicle(self, direction: Direction):
+        self._next_id += 1
+        self.lanes[direction].insert(
+            self._next_id, self.time, float(self.config.max_distance)
+        )
+
+    def _step_vehicles(self):
+        for direction, lane in self.lanes.items():
+            if lane.size > SMALL_LANE_MAX:
+                self._step_lane(direction, lane)
+            elif lane.size:
+                self._step_small_lane(direction, lane)
+
+    def _step_small_lane(self, direction: Direction, lane: LaneArrays):
+        """_step_lane auto por auto, sobre una lista con las distancias."""
+        cfg = self.config
+        sl = lane.active()
+        d = lane.distance[sl].tolist()
+        n = len(d)
+
+        # 1. Los que ya cruzaron avanzan; los que llegan al final salen
+        n_dep = bisect_left(d, 0.0)
+        for i in range(n_dep):
+            d[i] -= cfg.vehicle_speed
+        n_out = bisect_right(d, -cfg.post_cross_distance, 0, n_dep)
+
+        # 2. Los detenidos en la línea de stop cruzan si el semáforo lo permite
+        n_stop = bisect_right(d, STOP_LINE_TOL, n_dep) - n_dep
+        leader = None
+        if n_stop:
+            if self.traffic_light.can_cross(direction):
+                step = min(cfg.vehicle_speed, cfg.post_cross_distance)
+                for i in range(n_dep, n_dep + n_stop):
+                    d[i] -= step
+            else:
+                leader = d[n_dep + n_stop - 1]
+
+        # 3. El resto avanza en flujo libre, respetando min_vehicle_gap
+        start = n_dep + n_stop
+        moving = d[start:]
+        if moving:
+            desired = [x - min(cfg.vehicle_speed, x) for x in moving]
+            d[start:] = _follow_list(moving, desired, leader, cfg.min_vehicle_gap)
+
+        lane.distance[sl] = d
+        if any(a == b for a, b in zip(d[start:], d[start + 1:])):
+            self._restore_tie_order(lane, lane.head + start, n - start)
+        if n_out:
+            self._record_exits(direction, lane, n_out)
+            lane.pop_front(n_out)
+
+    def _step_lane(self, direction: Direction, lane: LaneArrays):
+        cfg = self.config
+        d = lane.distance[lane.active()]
+
+        # 1. Los que ya cruzaron avanzan y, si llegan al final, salen
+        n_dep = int(np.searchsorted(d, 0.0, side="left"))
+        if n_dep:
+            d[:n_dep] -= cfg.vehicle_speed
+            n_out = int(np.searchsorted(d[:n_dep], -cfg.post_cross_distance, side="right"))
+            if n_out:
+                self._record_exits(direction, lane, n_out)
+                lane.pop_front(n_out)
+                d = d[n_out:]
+                n_dep -= n_out
+
+        approach = d[n_dep:]
+        if not len(approach):
+            return
+
+        # 2. Los detenidos en la línea de stop cruzan si el semáforo lo permite
+        n_stop = int(np.searchsorted(approach, STOP_LINE_TOL, side="right"))
+        leader = None
+        if n_stop:
+            if self.traffic_light.can_cross(direction):
+                approach[:n_stop] -= min(cfg.vehicle_speed, cfg.post_cross_distance)
+            else:
+                leader = float(approach[n_stop - 1])
+
+        # 3. El resto avanza en flujo libre, respetando min_vehicle_gap
+        moving = approach[n_stop:]
+        if len(moving):
+            moving[:] = self._follow(moving, leader)
+            self._restore_tie_order(lane, lane.head + n_dep + n_stop, len(moving))
+
+    def _follow(self, d: np.ndarray, leader: Optional[float]) -> np.ndarray:
+        """
+        Nuevas distancias de un pelotón ordenado de adelante hacia atrás.
+
+        Secuencialmente: n_i = max(d_i - min(v, d_i), n_{i-1} + gap, 0).
+        Esa recurrencia se resuelve con un máximo acumulado; si el resultado
+        no cumple la recurrencia exacta (redondeos con gaps no diádicos, o un
+        auto tan pegado que su líder real es otro), se usa el bucle exacto.
+        """
+        cfg = self.config
+        gap = cfg.min_vehicle_gap
+        desired = d - np.minimum(cfg.vehicle_speed, d)
+
+        idx = np.arange(len(d), dtype=np.float64)
+        c = desired - idx * gap
+        if leader is not None:
+            c[0] = max(c[0], leader + gap)
+        guess = np.maximum.accumulate(c) + idx * gap
+
+        prev = np.empty_like(guess)
+        prev[0] = -np.inf if leader is None else leader
+        prev[1:] = guess[:-1]
+        expected = np.maximum(np.maximum(desired, prev + gap), 0.0)
+        if np.array_equal(guess, expected) and np.all(prev[1:] < d[1:]):
+            return expected
+        return self._follow_exact(d, desired, leader)
+
+    def _follow_exact(self, d: np.ndarray, desired: np.ndarray,
+                      leader: Optional[float]) -> np.ndarray:
+        return follow_exact(d, desired, leader, self.config.min_vehicle_gap)
+
+    def _restore_tie_order(self, lane: LaneArrays, start: int, n: int):
+        # Tras actualizar, empates de distancia deben quedar ordenados por id
+        d = lane.distance[start:start + n]
+        vid = lane.vid[start:start + n]
+        if not np.any((d[1:] == d[:-1]) & (vid[1:] < vid[:-1])):
+            return
+        order = np.lexsort((vid, d))
+        for arr in (lane.distance, lane.start_time, lane.vid):
+            arr[start:start + n] = arr[start:start + n][order]
+
+    def _record_exits(self, direction: Direction, lane: LaneArrays, n: int):
+        sl = slice(lane.head, lane.head + n)
+        rows = zip(lane.vid[sl].tolist(), lane.distance[sl].tolist(), lane.start_time[sl].tolist())
+        for vid, distance, start_time in rows:
+            self.exit_metrics.record(start_time, self.time, direction)
+            if self.exited_vehicles.maxlen != 0:
+                self.exited_vehicles.append(
+                    VehicleSnapshot(vid, direction, distance, start_time, self.time)
+                )
+
+    # ---------- CHECKPOINTS ----------
+
+    def _get_vehicle_state(self) -> Dict:
+        lanes = {}
+        for direction, lane in self.lanes.items():
+            sl = lane.active()
+            lanes[direction] = (lane.vid[sl].copy(), lane.distance[sl].copy(), lane.start_time[sl].copy())
+        return {"last_id": self._next_id, "lanes": lanes}
+
+    def _set_vehicle_state(self, state: Dict):
+        self._init_vehicle_state()
+        self._next_id = state["last_id"]
+        for direction, (vid, distance, start_time) in state["lanes"].items():
+            n = len(vid)
+            lane = self.lanes[direction] = LaneArrays(max(64, 2 * n))
+            lane.vid[:n] = vid
+            lane.distance[:n] = distance
+            lane.start_time[:n] = start_time
+            lane.size = n
+
+    def _exited_from_row(self, row) -> VehicleSnapshot:
+        return VehicleSnapshot(*row)
+
+    # ---------- MÉTRICAS ----------
+
+    def get_queue_size(self, direction: Direction) -> int:
+        # Cada carril está ordenado: la zona de detección es un rango contiguo
+        cfg = self.config
+        lane = self.lanes[direction]
+        if lane.size <= SMALL_LANE_MAX:
+            d = lane.distance[lane.active()].tolist()
+            return bisect_right(d, cfg.detection_zone_max) - bisect_right(d, cfg.detection_zone_min)
+        d = lane.distance[lane.active()]
+        return int(
+            np.searchsorted(d, cfg.detection_zone_max, side="right")
+            - np.searchsorted(d, cfg.detection_zone_min, side="right")
+        )
+
+    def get_queue_sizes(self):
+        return [self.get_queue_size(d) for d in Direction]
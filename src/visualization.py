@@ -1,9 +1,26 @@
+import time
+
 import pygame
 from .agents import Direction, TrafficLightPhase
+from .metrics import PERCENTILES
 from .model import TrafficModel
 
 
+# Máximo de líneas de texto ya renderizadas que se guardan
+TEXT_CACHE_SIZE = 256
+
+
 class TrafficVisualizer:
+    """
+    Dibuja un TrafficModel (o cualquier objeto con la misma interfaz de
+    lectura, como runner.ModelSnapshot) en una ventana de pygame.
+
+    Lo estático (vías, cebras, líneas de stop, cuerpos de los semáforos)
+    se pre-renderiza una vez en una Surface. En cada frame solo se borran
+    (copiando el fondo) y redibujan las zonas que cambian, y se actualizan
+    esas zonas de la pantalla en lugar de hacer flip() completo.
+    """
+
     def __init__(
         self,
         model: TrafficModel,
@@ -59,37 +76,88 @@ class TrafficVisualizer:
             self.crosswalk_offset + self.crosswalk_width // 2 + 10
         )
 
+        # ------ Semáforos ------
+        self.light_box_width = 22
+        self.light_box_height = 60
+        self.light_radius = 6
+        self.light_spacing = 4  # margen interno
+        self.COLOR_LIGHT_OFF = (80, 80, 80)  # color de foco apagado
+        self.COLOR_LIGHT_BOX = (40, 40, 40)  # cuerpo del semáforo
+
         # Indicador de fin de día y resumen
         self.finished = False
         self.final_summary = None
         # Día simulado actual (1, 2, 3, ...)
         self.current_day = 1
 
-    # ---------------- DIBUJO PRINCIPAL ----------------
+        self.font = pygame.font.SysFont("Arial", 18)
+        # Texto de HUD ya renderizado, por contenido de la línea
+        self._text_cache = {}
+        # Capa estática (se arma en el primer draw)
+        self._background = None
+        # Zonas dibujadas en el frame anterior (a borrar en el siguiente)
+        self._dirty = []
 
-    def draw(self):
-        self.screen.fill(self.COLOR_BACKGROUND)
+        # Tiempos de frame (media móvil, en ms) para el HUD
+        self.show_frame_time = True
+        self.frame_ms = 0.0
+        self.draw_ms = 0.0
+        self._last_frame = None
 
-        # 1. Vías + pasos de cebra + líneas de stop
-        self._draw_roads()
+    # ---------------- DIBUJO PRINCIPAL ----------------
 
-        # 2. Semáforos
-        self._draw_traffic_light()
+    def draw(self):
+        t0 = time.perf_counter()
+        if self._last_frame is not None:
+            self.frame_ms = 0.9 * self.frame_ms + 0.1 * (t0 - self._last_frame) * 1000
+        self._last_frame = t0
+
+        self.render()
+        if self._full_redraw:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self._updated)
+
+        self.draw_ms = 0.9 * self.draw_ms + 0.1 * (time.perf_counter() - t0) * 1000
+
+    def render(self):
+        """Dibuja el frame en self.screen sin actualizar la pantalla."""
+        # 1. Vías + pasos de cebra + líneas de stop + cuerpos de semáforos
+        self._full_redraw = self._background is None
+        if self._full_redraw:
+            self._background = self._render_background()
+            self.screen.blit(self._background, (0, 0))
+        else:
+            # Borrar lo dinámico del frame anterior
+            for rect in self._dirty:
+                self.screen.blit(self._background, rect, rect)
+
+        rects = []
+        # 2. Luces de los semáforos
+        rects += self._draw_traffic_light()
 
         # 3. Vehículos
-        self._draw_vehicles()
+        rects += self._draw_vehicles()
 
         # 4. HUD (texto + posible resumen final)
-        self._draw_hud()
+        rects += self._draw_hud()
 
-        pygame.display.flip()
+        self._updated = self._dirty + rects
+        self._dirty = rects
+
+    def _render_background(self) -> pygame.Surface:
+        background = pygame.Surface((self.width, self.height)).convert(self.screen)
+        background.fill(self.COLOR_BACKGROUND)
+        self._draw_roads(background)
+        self._draw_traffic_light_housings(background)
+        return background
 
     # ---------------- COMPONENTES ----------------
 
-    def _draw_roads(self):
+    def _draw_roads(self, surface: pygame.Surface):
         # Carretera horizontal
         pygame.draw.rect(
-            self.screen,
+            surface,
             self.COLOR_ROAD,
             (
                 0,
@@ -100,7 +168,7 @@ class TrafficVisualizer:
         )
         # Carretera vertical
         pygame.draw.rect(
-            self.screen,
+            surface,
             self.COLOR_ROAD,
             (
                 self.cx - self.road_width // 2,
@@ -111,9 +179,9 @@ class TrafficVisualizer:
         )
 
         # Pasos de cebra + líneas de stop
-        self._draw_crosswalks_and_stop_lines()
+        self._draw_crosswalks_and_stop_lines(surface)
 
-    def _draw_crosswalks_and_stop_lines(self):
+    def _draw_crosswalks_and_stop_lines(self, surface: pygame.Surface):
 
         stripe_color = self.COLOR_WHITE
         stripe_width = 8
@@ -140,7 +208,7 @@ class TrafficVisualizer:
             x = x_start
             while x < x_end:
                 pygame.draw.rect(
-                    self.screen,
+                    surface,
                     stripe_color,
                     (x, top, stripe_width, height),
                 )
@@ -158,7 +226,7 @@ class TrafficVisualizer:
                 stop_y = self.cy + self.stop_line_offset
 
             pygame.draw.line(
-                self.screen,
+                surface,
                 stripe_color,
                 (full_x_start, stop_y),
                 (full_x_end, stop_y),
@@ -180,7 +248,7 @@ class TrafficVisualizer:
             y = y_start
             while y < y_end:
                 pygame.draw.rect(
-                    self.screen,
+                    surface,
                     stripe_color,
                     (left, y, width, stripe_width),
                 )
@@ -198,7 +266,7 @@ class TrafficVisualizer:
                 stop_x = self.cx + self.stop_line_offset
 
             pygame.draw.line(
-                self.screen,
+                surface,
                 stripe_color,
                 (stop_x, full_y_start),
                 (stop_x, full_y_end),
@@ -236,15 +304,28 @@ class TrafficVisualizer:
         ns_lights = get_lights_for("NS")
         ew_lights = get_lights_for("EW")
 
-        # --------- Parámetros visuales ---------
-        box_width = 22
-        box_height = 60
-        light_radius = 6
-        spacing = 4  # margen interno
-
-        off_color = (80, 80, 80)  # color de foco apagado
-        box_color = (40, 40, 40)  # cuerpo del semáforo
+        # Dibujar cabeza NS y cabeza EW (solo los focos: las cajas están
+        # en el fondo pre-renderizado)
+        colors = [self.COLOR_RED, self.COLOR_YELLOW, self.COLOR_GREEN]
+        rects = []
+        for (cx, cy), lights in zip(self._light_heads(), (ns_lights, ew_lights)):
+            for on, col, y in zip(lights, colors, self._lamp_ys(cy)):
+                color = col if on else self.COLOR_LIGHT_OFF
+                rects.append(pygame.draw.circle(self.screen, color, (cx, y), self.light_radius))
+        return rects
+
+    def _draw_traffic_light_housings(self, surface: pygame.Surface):
+        for cx, cy in self._light_heads():
+            # Caja
+            pygame.draw.rect(
+                surface,
+                self.COLOR_LIGHT_BOX,
+                (cx - self.light_box_width // 2, cy - self.light_box_height // 2,
+                 self.light_box_width, self.light_box_height),
+                border_radius=4,
+            )
 
+    def _light_heads(self):
         # Posiciones de las cajas (ya al costado de los carriles)
         # NS: al lado del carril que viene desde el norte
         ns_cx = self.cx - self.road_width // 2 - 25
@@ -253,37 +334,19 @@ class TrafficVisualizer:
         # EW: al lado del carril que viene desde el oeste
         ew_cx = self.cx + self.crosswalk_offset + 20
         ew_cy = self.cy - self.road_width // 2 - 25
+        return (ns_cx, ns_cy), (ew_cx, ew_cy)
 
-        def draw_head(cx, cy, lights):
-            # Caja
-            pygame.draw.rect(
-                self.screen,
-                box_color,
-                (cx - box_width // 2, cy - box_height // 2, box_width, box_height),
-                border_radius=4,
-            )
-
-            # Posiciones de los 3 focos (top, mid, bottom)
-            top_y = cy - box_height // 2 + light_radius + spacing
-            mid_y = cy
-            bot_y = cy + box_height // 2 - light_radius - spacing
-
-            colors = [self.COLOR_RED, self.COLOR_YELLOW, self.COLOR_GREEN]
-            ys = [top_y, mid_y, bot_y]
-
-            for on, col, y in zip(lights, colors, ys):
-                color = col if on else off_color
-                pygame.draw.circle(self.screen, color, (cx, y), light_radius)
-
-        # Dibujar cabeza NS y cabeza EW
-        draw_head(ns_cx, ns_cy, ns_lights)
-        draw_head(ew_cx, ew_cy, ew_lights)
+    def _lamp_ys(self, cy: int):
+        # Posiciones de los 3 focos (top, mid, bottom)
+        margin = self.light_box_height // 2 - self.light_radius - self.light_spacing
+        return cy - margin, cy, cy + margin
 
     def _draw_vehicles(self):
         # Tamaño base del auto (vista superior)
         base_length = 26  # largo del auto
         base_width = 12   # ancho del auto
 
+        rects = []
         for v in self.model.vehicles:
             x, y = self._vehicle_to_screen(v)
 
@@ -300,11 +363,10 @@ class TrafficVisualizer:
             # Rectángulo centrado en (x, y) con la orientación adecuada
             rect = pygame.Rect(0, 0, car_width, car_height)
             rect.center = (x, y)
-            pygame.draw.rect(self.screen, color, rect)
+            rects.append(pygame.draw.rect(self.screen, color, rect))
+        return rects
 
     def _draw_hud(self):
-        font = pygame.font.SysFont("Arial", 18)
-
         # Hora simulada (según el modelo que estamos visualizando)
         try:
             hour, minute = self.model.get_simulated_clock()
@@ -329,116 +391,73 @@ class TrafficVisualizer:
             f"Velocidad: x{self.sim_speed}",
             f"Autos en sistema (modo visualizado): {len(self.model.vehicles)}",
         ]
+        if self.show_frame_time:
+            text_lines.append(f"Frame: {self.frame_ms:.1f} ms (dibujo {self.draw_ms:.1f} ms)")
 
         # Resumen del ÚLTIMO día completo para ambos modos (fixed y adaptive)
         if self.finished and self.final_summary is not None:
             fs = self.final_summary
-            cfg = self.model.config
 
             day_index = fs.get("day", current_day - 1)
 
-            summary_fixed = fs.get("fixed")
-            summary_adaptive = fs.get("adaptive")
-
             text_lines.append("")
             text_lines.append(f"=== Resumen del día {day_index} (24h) ===")
 
-            # --------- MODO FIXED ---------
-            if summary_fixed is not None:
-                avg_ticks_f = summary_fixed["avg_travel_time"]
-                avg_minutes_f = (avg_ticks_f * cfg.seconds_per_tick) / 60.0
-                veh_per_hour_f = summary_fixed["vehicles_exited"] / 24.0
-
-                mp_f = summary_fixed.get("morning_peak", {})
-                ep_f = summary_fixed.get("evening_peak", {})
-
-                text_lines.append("[FIXED]")
-                text_lines.append(
-                    f"  Veh. que cruzaron (día): {summary_fixed['vehicles_exited']}"
-                )
-                text_lines.append(
-                    f"  Tiempo medio viaje (día): {avg_ticks_f:.2f} ticks (~{avg_minutes_f:.1f} min)"
-                )
-                text_lines.append(
-                    f"  Flujo medio (día): {veh_per_hour_f:.1f} veh/h"
-                )
-                text_lines.append(
-                    f"  Veh. restantes al final del día: {summary_fixed['vehicles_remaining']}"
-                )
-
-                # Horas punta FIXED
-                mp_veh_f = mp_f.get("vehicles_exited", 0)
-                mp_avg_f = mp_f.get("avg_travel_time", 0.0)
-                mp_min_f = (mp_avg_f * cfg.seconds_per_tick) / 60.0 if mp_veh_f > 0 else 0.0
-
-                ep_veh_f = ep_f.get("vehicles_exited", 0)
-                ep_avg_f = ep_f.get("avg_travel_time", 0.0)
-                ep_min_f = (ep_avg_f * cfg.seconds_per_tick) / 60.0 if ep_veh_f > 0 else 0.0
-
-                text_lines.append("  [Punta mañana 07–09]")
-                text_lines.append(
-                    f"    Veh: {mp_veh_f}, t_med: {mp_avg_f:.1f} ticks (~{mp_min_f:.1f} min)"
-                    if mp_veh_f > 0 else
-                    "    (sin vehículos en este intervalo)"
-                )
-                text_lines.append("  [Punta tarde 18–21]")
-                text_lines.append(
-                    f"    Veh: {ep_veh_f}, t_med: {ep_avg_f:.1f} ticks (~{ep_min_f:.1f} min)"
-                    if ep_veh_f > 0 else
-                    "    (sin vehículos en este intervalo)"
-                )
-
-            # --------- MODO ADAPTIVE ---------
-            if summary_adaptive is not None:
-                avg_ticks_a = summary_adaptive["avg_travel_time"]
-                avg_minutes_a = (avg_ticks_a * cfg.seconds_per_tick) / 60.0
-                veh_per_hour_a = summary_adaptive["vehicles_exited"] / 24.0
-
-                mp_a = summary_adaptive.get("morning_peak", {})
-                ep_a = summary_adaptive.get("evening_peak", {})
-
-                text_lines.append("[ADAPTIVE]")
-                text_lines.append(
-                    f"  Veh. que cruzaron (día): {summary_adaptive['vehicles_exited']}"
-                )
-                text_lines.append(
-                    f"  Tiempo medio viaje (día): {avg_ticks_a:.2f} ticks (~{avg_minutes_a:.1f} min)"
-                )
-                text_lines.append(
-                    f"  Flujo medio (día): {veh_per_hour_a:.1f} veh/h"
-                )
-                text_lines.append(
-                    f"  Veh. restantes al final del día: {summary_adaptive['vehicles_remaining']}"
-                )
-
-                # Horas punta ADAPTIVE
-                mp_veh_a = mp_a.get("vehicles_exited", 0)
-                mp_avg_a = mp_a.get("avg_travel_time", 0.0)
-                mp_min_a = (mp_avg_a * cfg.seconds_per_tick) / 60.0 if mp_veh_a > 0 else 0.0
-
-                ep_veh_a = ep_a.get("vehicles_exited", 0)
-                ep_avg_a = ep_a.get("avg_travel_time", 0.0)
-                ep_min_a = (ep_avg_a * cfg.seconds_per_tick) / 60.0 if ep_veh_a > 0 else 0.0
-
-                text_lines.append("  [Punta mañana 07–09]")
-                text_lines.append(
-                    f"    Veh: {mp_veh_a}, t_med: {mp_avg_a:.1f} ticks (~{mp_min_a:.1f} min)"
-                    if mp_veh_a > 0 else
-                    "    (sin vehículos en este intervalo)"
-                )
-                text_lines.append("  [Punta tarde 18–21]")
-                text_lines.append(
-                    f"    Veh: {ep_veh_a}, t_med: {ep_avg_a:.1f} ticks (~{ep_min_a:.1f} min)"
-                    if ep_veh_a > 0 else
-                    "    (sin vehículos en este intervalo)"
-                )
+            for mode in ("fixed", "adaptive"):
+                summary = fs.get(mode)
+                if summary is not None:
+                    text_lines.extend(self._day_summary_lines(mode, summary))
 
         x = 10
         y = 10
+        rects = []
         for line in text_lines:
-            surface = font.render(line, True, self.COLOR_WHITE)
-            self.screen.blit(surface, (x, y))
+            if line:
+                rects.append(self.screen.blit(self._render_text(line), (x, y)))
             y += 22
+        return rects
+
+    def _day_summary_lines(self, mode: str, summary):
+        cfg = self.model.config
+
+        def ticks_to_min(ticks):
+            return (ticks * cfg.seconds_per_tick) / 60.0
+
+        avg_ticks = summary["avg_travel_time"]
+        veh_per_hour = summary["vehicles_exited"] / 24.0
+
+        lines = [
+            f"[{mode.upper()}]",
+            f"  Veh. que cruzaron (día): {summary['vehicles_exited']}",
+            f"  Tiempo medio viaje (día): {avg_ticks:.2f} ticks (~{ticks_to_min(avg_ticks):.1f} min)",
+            "  P50 / P95 / P99 (día): " + " / ".join(
+                f"{ticks_to_min(summary[f'p{p}_travel_time']):.1f}" for p in PERCENTILES
+            ) + " min",
+            f"  Flujo medio (día): {veh_per_hour:.1f} veh/h",
+            f"  Veh. restantes al final del día: {summary['vehicles_remaining']}",
+        ]
+
+        # Ventanas horarias (config.summary_windows)
+        for window in summary.get("windows", {}).values():
+            veh = window["vehicles_exited"]
+            avg = window["avg_travel_time"]
+            lines.append(f"  [{window['label']}]")
+            lines.append(
+                f"    Veh: {veh}, t_med: {avg:.1f} ticks (~{ticks_to_min(avg):.1f} min), "
+                f"P95: ~{ticks_to_min(window['p95_travel_time']):.1f} min"
+                if veh > 0 else
+                "    (sin vehículos en este intervalo)"
+            )
+        return lines
+
+    def _render_text(self, line: str) -> pygame.Surface:
+        # Solo se vuelve a renderizar una línea cuando cambia su contenido
+        surface = self._text_cache.get(line)
+        if surface is None:
+            if len(self._text_cache) >= TEXT_CACHE_SIZE:
+                self._text_cache.clear()
+            surface = self._text_cache[line] = self.font.render(line, True, self.COLOR_WHITE)
+        return surface
 
     # ---------------- UTILIDADES ----------------
 
@@ -0,0 +1,21 @@
+from main_visual import compute_day_summary
+from src.config import SimulationConfig
+from src.model import create_model
+
+
+def test_day_without_exits():
+    # Sin llegadas no sale nadie: las ventanas y los accesos quedan vacíos
+    config = SimulationConfig(
+        seconds_per_tick=30, arrival_rate_ns=0.0, arrival_rate_ew=0.0,
+    )
+    ticks_per_day = int(24 * 3600 / config.seconds_per_tick)
+    model = create_model(config)
+    model.run(ticks_per_day)
+
+    summary = compute_day_summary(model, 0, ticks_per_day, 1, ticks_per_day)
+
+    assert summary["vehicles_exited"] == 0
+    for stats in list(summary["windows"].values()) + list(summary["directions"].values()):
+        assert stats["vehicles_exited"] == 0
+        assert stats["p50_travel_time"] == 0.0
+        assert stats["p99_travel_time"] == 0.0